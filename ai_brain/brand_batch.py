@@ -0,0 +1,231 @@
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from datetime import datetime
+
+from ai_brain import metrics
+from ai_brain.config import BASE_DIR, OUTPUT_DIR, BRAND_WORKERS, SERP_INCREMENTAL, DEDUP_DB
+from ai_brain.daily_pipeline import run_daily_pipeline
+from ai_brain.news_clustering import cluster_news, cluster_members
+from ai_brain.post_payload_builder import build_post_payload
+from ai_brain.records import NewsItem, CATEGORIES
+from ai_brain.stage_executor import StageExecutor
+from ai_brain.trend_fetcher import fetch_real_news, mark_news_seen, SEARCH_QUERIES, SERP_WINDOW
+from ai_brain.yoi_templates import build_slide_1_cover, build_news_slide, build_slide_5_cta
+
+logger = logging.getLogger("brand_batch")
+
+
+class BrandProfile:
+    """
+    One brand or account in a batch run.
+
+    logo_path: logo drawn on every slide
+    backgrounds: {slide_type: path} overrides for the static backgrounds
+    cta: {"title", "body", "button"} overrides for the CTA slide
+    categories: only publish approvals in these categories (empty = all)
+    dedup_db: the brand's own posting history (default
+        posted_titles_<slug>.db next to the default one)
+    """
+    __slots__ = ("name", "logo_path", "backgrounds", "cta", "categories", "dedup_db")
+
+    def __init__(self, name, logo_path="assets/yoi_logo.png", backgrounds=None, cta=None,
+                 categories=None, dedup_db=None):
+        self.name = name
+        # Relative paths are relative to the project, like DEDUP_DB
+        self.logo_path = os.path.join(BASE_DIR, logo_path)
+        self.backgrounds = {slide: os.path.join(BASE_DIR, path) for slide, path in (backgrounds or {}).items()}
+        self.cta = dict(cta or {})
+        self.categories = list(categories or [])
+        self.dedup_db = os.path.join(BASE_DIR, dedup_db or f"posted_titles_{self.slug}.db")
+
+    @classmethod
+    def default(cls):
+        """
+        The main account: default assets and DEDUP_DB.
+        """
+        return cls("default", dedup_db=DEDUP_DB)
+
+    @property
+    def slug(self) -> str:
+        return re.sub(r"[^a-z0-9]+", "_", self.name.lower()).strip("_") or "brand"
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """
+        Build from one entry of the brands file. Raises ValueError on a
+        missing name or an unknown category.
+        """
+        name = str(data.get("name") or "").strip()
+        if not name:
+            raise ValueError("Brand profile needs a name")
+
+        categories = [str(c).lower() for c in data.get("categories") or []]
+        unknown = [c for c in categories if c not in CATEGORIES]
+        if unknown:
+            raise ValueError(f"Brand {name}: unknown categories {unknown}")
+
+        return cls(
+            name,
+            logo_path=data.get("logo_path") or "assets/yoi_logo.png",
+            backgrounds=data.get("backgrounds"),
+            cta=data.get("cta"),
+            categories=categories,
+            dedup_db=data.get("dedup_db")
+        )
+
+
+def load_brand_profiles(path: str):
+    """
+    Read brand profiles from a JSON file: a list of profiles, or
+    {"brands": [...]}. Brand slugs must be unique (they name the run
+    folders and default databases).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("brands", [])
+
+    brands = [BrandProfile.from_dict(entry) for entry in data]
+    slugs = [brand.slug for brand in brands]
+    duplicates = sorted({slug for slug in slugs if slugs.count(slug) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate brand names: {duplicates}")
+    return brands
+
+
+def render_carousel(items, output_dir, brand=None):
+    """
+    Render a brand's cover, 3 news/insight slides and CTA in parallel.
+    Returns the slide paths in order.
+    """
+    brand = brand or BrandProfile.default()
+    slides = StageExecutor(name="render", tags={"brand": brand.name})
+
+    slides.add("cover", lambda: build_slide_1_cover(
+        output_dir, brand.logo_path, backgrounds=brand.backgrounds
+    ))
+    for idx, item in enumerate(items[:3]):
+        slide_num = idx + 2
+        slides.add(f"slide_{slide_num}", lambda n=slide_num, item=item: build_news_slide(
+            output_dir, n, item.headline, item.subheadline, brand.logo_path, backgrounds=brand.backgrounds
+        ))
+    slides.add("cta", lambda: build_slide_5_cta(
+        output_dir, brand.logo_path, backgrounds=brand.backgrounds, cta=brand.cta
+    ))
+
+    paths = slides.run()
+    return [paths[name] for name in slides.stages]
+
+
+def new_batch_id() -> str:
+    return f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+
+
+def batch_folder(run_id: str) -> str:
+    return os.path.join(OUTPUT_DIR, f"batch_{run_id}")
+
+
+def run_carousel(run_id: str, output_dir: str, brand=None, news=None, judged: list = None):
+    """
+    One carousel: pipeline (checkpointed in `output_dir`), payload and
+    slides. `brand` defaults to the main account and history; `news` is a
+    batch's shared fetch and `judged` receives the signals its gate judged
+    (see run_daily_pipeline). Errors are returned, not raised, so one brand
+    can't stop the others.
+    """
+    brand = brand or BrandProfile.default()
+    os.makedirs(output_dir, exist_ok=True)
+
+    try:
+        pipeline_result = run_daily_pipeline(
+            run_id=run_id,
+            run_dir=output_dir,
+            news=news,
+            dedup_db=brand.dedup_db,
+            categories=brand.categories,
+            judged=judged
+        )
+        if pipeline_result.get("status") == "no_publish_today":
+            return {"brand": brand.name, "status": "no_publish_today", "run_id": run_id, "output_dir": output_dir}
+
+        with metrics.timed("payload", brand=brand.name):
+            items = build_post_payload(pipeline_result).get("items", [])
+        if len(items) < 3:
+            return {"brand": brand.name, "status": "error", "run_id": run_id,
+                    "error": f"Expected 3 items, got {len(items)}"}
+
+        files = render_carousel(items, output_dir, brand)
+    except Exception as e:
+        logger.warning("Brand %s failed: %s", brand.name, e)
+        return {"brand": brand.name, "status": "error", "run_id": run_id, "error": str(e)}
+
+    return {
+        "brand": brand.name,
+        "status": "success",
+        "run_id": run_id,
+        "output_dir": output_dir,
+        "files": [os.path.basename(path) for path in files],
+        "approved_count": len(pipeline_result.get("approved", []))
+    }
+
+
+def run_brand_batch(brands, run_id: str = None, max_workers: int = None):
+    """
+    Produce one carousel per brand from a single news fetch.
+
+    SerpAPI is queried and the results clustered once for the batch; the
+    fetch is checkpointed in outputs/batch_<run_id>/ like a single run's.
+    Each brand then runs its own gate (against its own posting history and
+    categories) and renders into outputs/batch_<run_id>/<slug>/, with up
+    to `max_workers` (default BRAND_WORKERS) brands in flight, so Groq
+    calls from all brands share the rate-limit scheduler.
+    Re-running with the same run_id resumes every brand where it stopped.
+    """
+    run_id = run_id or new_batch_id()
+    batch_dir = batch_folder(run_id)
+    os.makedirs(batch_dir, exist_ok=True)
+
+    executor = StageExecutor(batch_dir, max_workers=max_workers or BRAND_WORKERS, name="batch", tags={"run_id": run_id})
+    executor.add(
+        "fetch", fetch_real_news,
+        key={"day": datetime.utcnow().strftime("%Y-%m-%d"), "window": SERP_WINDOW, "queries": SEARCH_QUERIES},
+        dump=lambda items: [item.to_dict() for item in items],
+        load=lambda data: [NewsItem.from_dict(item) for item in data]
+    )
+    # Clustering updates cluster_size on the items, so it runs once here
+    # and brands only read the representatives
+    executor.add("cluster", lambda fetch: cluster_news(fetch), deps=("fetch",), persist=False)
+    judged = {brand.slug: [] for brand in brands}
+    for brand in brands:
+        executor.add(
+            f"brand_{brand.slug}",
+            lambda cluster, brand=brand: run_carousel(
+                f"{run_id}-{brand.slug}", os.path.join(batch_dir, brand.slug), brand, cluster,
+                judged=judged[brand.slug]
+            ),
+            deps=("cluster",), persist=False
+        )
+
+    results = executor.run()
+    brand_results = [results[f"brand_{brand.slug}"] for brand in brands]
+
+    # Brands share the fetch, so it's marked seen once, after the gates, and
+    # only where every brand's gate got to the item (one brand compacting an
+    # item away or failing must not hide it from that brand's next batch)
+    if SERP_INCREMENTAL and brands:
+        done = set.intersection(*({(item.title, item.url) for item in items} for items in judged.values()))
+        common = [item for item in results["cluster"] if (item.title, item.url) in done]
+        seen = cluster_members(results["fetch"], common)
+        seen_ids = {id(item) for item in seen}
+        mark_news_seen(seen, pending=[item for item in results["fetch"] if id(item) not in seen_ids])
+
+    return {
+        "status": "success" if any(r["status"] == "success" for r in brand_results) else "no_publish_today",
+        "run_id": run_id,
+        "output_dir": batch_dir,
+        "brands": brand_results
+    }
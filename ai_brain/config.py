@@ -13,6 +13,7 @@ SERPAPI_KEY = os.getenv("SERPAPI_KEY")
 
 # Endpoints
 GROQ_URL = "https://api.groq.com/openai/v1/chat/completions"
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.3-70b-versatile")
 LEONARDO_CREATE_URL = "https://cloud.leonardo.ai/api/rest/v1/generations"
 LEONARDO_GET_URL = "https://cloud.leonardo.ai/api/rest/v1/generations"  # GET {LEONARDO_GET_URL}/{generationId}
 
@@ -30,3 +31,110 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 # Polling
 LEONARDO_POLL_INTERVAL = float(os.getenv("LEONARDO_POLL_INTERVAL", "2.5"))
 LEONARDO_POLL_MAX_SECS = int(os.getenv("LEONARDO_POLL_MAX_SECS", "300"))
+
+# SerpAPI fan-out (SERP_CONCURRENCY=1 fetches queries one after another)
+SERP_CONCURRENCY = int(os.getenv("SERP_CONCURRENCY", "4"))
+SERP_QUERY_TIMEOUT = float(os.getenv("SERP_QUERY_TIMEOUT", "20"))
+SERP_TOTAL_TIMEOUT = float(os.getenv("SERP_TOTAL_TIMEOUT", "60"))
+
+# Local caches
+CACHE_DIR = os.getenv("CACHE_DIR") or os.path.join(BASE_DIR, ".cache")
+
+# SerpAPI response cache (SERP_CACHE_TTL=0 disables, SERP_CACHE_REFRESH=1 bypasses reads)
+SERP_CACHE_TTL = float(os.getenv("SERP_CACHE_TTL", "3600"))
+SERP_CACHE_MAX_ENTRIES = int(os.getenv("SERP_CACHE_MAX_ENTRIES", "200"))
+SERP_CACHE_REFRESH = os.getenv("SERP_CACHE_REFRESH", "0") == "1"
+
+# Shared HTTP client (keep-alive pools + retry with backoff on 429/5xx)
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "30"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+
+# Incremental fetch: skip SERP items already sent to the gate by earlier runs.
+# The state lives in DEDUP_DB; FETCH_STATE_FILE is the old JSON state,
+# imported once.
+SERP_INCREMENTAL = os.getenv("SERP_INCREMENTAL", "0") == "1"
+FETCH_STATE_FILE = os.getenv("FETCH_STATE_FILE") or os.path.join(BASE_DIR, "fetch_state.json")
+FETCH_STATE_MAX_SEEN = int(os.getenv("FETCH_STATE_MAX_SEEN", "500"))
+
+# Pre-gate near-duplicate clustering (token Jaccard of titles / snippets)
+NEWS_CLUSTER_THRESHOLD = float(os.getenv("NEWS_CLUSTER_THRESHOLD", "0.5"))
+
+# Streaming pipeline: gate micro-batches while SERP queries are still returning
+PIPELINE_STREAMING = os.getenv("PIPELINE_STREAMING", "0") == "1"
+GATE_BATCH_SIZE = int(os.getenv("GATE_BATCH_SIZE", "5"))
+
+# Chunked editorial gate (GATE_CHUNK_SIZE=0 sends everything in one prompt)
+GATE_CHUNK_SIZE = int(os.getenv("GATE_CHUNK_SIZE", "10"))
+GATE_CONCURRENCY = int(os.getenv("GATE_CONCURRENCY", "3"))
+
+# Per-item editorial verdict cache (VERDICT_CACHE_TTL=0 disables)
+VERDICT_CACHE_TTL = float(os.getenv("VERDICT_CACHE_TTL", str(3 * 24 * 3600)))
+VERDICT_CACHE_MAX_ENTRIES = int(os.getenv("VERDICT_CACHE_MAX_ENTRIES", "2000"))
+
+# Stream Groq completions (SSE) and act on each approved item as it arrives
+GROQ_STREAMING = os.getenv("GROQ_STREAMING", "0") == "1"
+
+# Prompt token budget for Groq calls (estimated locally; 0 = no limit)
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+
+# Per-call LLM metrics kept in memory (oldest dropped first); per-label
+# totals cover every call since the last reset
+USAGE_LOG_MAX_ENTRIES = int(os.getenv("USAGE_LOG_MAX_ENTRIES", "500"))
+
+# Groq request scheduler: concurrent calls in flight, and how long a call
+# may queue for rate-limit headroom before giving up (seconds)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "3"))
+LLM_MAX_QUEUE_WAIT = float(os.getenv("LLM_MAX_QUEUE_WAIT", "60"))
+
+# Local pre-gate scoring: items scoring below the threshold are rejected as
+# "low_impact" without reaching Groq (lower = fewer local rejects)
+PREGATE_ENABLED = os.getenv("PREGATE_ENABLED", "1") == "1"
+PREGATE_THRESHOLD = float(os.getenv("PREGATE_THRESHOLD", "-1.5"))
+
+# HTTP record/replay (HTTP_REPLAY_MODE: off | record | replay). Record writes
+# every exchange to HTTP_FIXTURE; replay serves them from a local stand-in.
+HTTP_REPLAY_MODE = os.getenv("HTTP_REPLAY_MODE", "off").lower()
+HTTP_FIXTURE = os.getenv("HTTP_FIXTURE") or os.path.join(BASE_DIR, "fixtures", "session.json")
+# 1 = recorded latency, 0 = instant, 2 = twice as slow
+REPLAY_LATENCY_SCALE = float(os.getenv("REPLAY_LATENCY_SCALE", "1"))
+# Force N "pending" responses before the final one on repeated calls such as
+# Leonardo polls (-1 = replay the recorded sequence)
+REPLAY_PENDING_POLLS = int(os.getenv("REPLAY_PENDING_POLLS", "-1"))
+
+# Posting history (SQLite); entries older than DEDUP_MAX_AGE_DAYS expire
+DEDUP_DB = os.getenv("DEDUP_DB") or os.path.join(BASE_DIR, "posted_titles.db")
+DEDUP_MAX_AGE_DAYS = float(os.getenv("DEDUP_MAX_AGE_DAYS", "365"))
+
+# Near-duplicate check against posting history (token Jaccard, 0-1)
+HISTORY_DUPLICATE_THRESHOLD = float(os.getenv("HISTORY_DUPLICATE_THRESHOLD", "0.6"))
+
+# Past posts retrieved into each gate prompt (most related to the batch)
+HISTORY_PROMPT_K = int(os.getenv("HISTORY_PROMPT_K", "15"))
+
+# Items claimed by a run stay reserved for at most this long (a crashed
+# run's claims expire)
+RESERVATION_TTL_HOURS = float(os.getenv("RESERVATION_TTL_HOURS", "6"))
+
+# Multi-brand batch: brand profiles file and brands gated/rendered at once
+BRANDS_FILE = os.getenv("BRANDS_FILE") or os.path.join(BASE_DIR, "brands.json")
+BRAND_WORKERS = int(os.getenv("BRAND_WORKERS", "3"))
+
+# Render service (python -m ai_brain.render_service, or gunicorn
+# "ai_brain.render_service:create_app()"); PNG compression for /render/slide
+# responses (0-9: lower = faster, larger)
+RENDER_SERVICE_HOST = os.getenv("RENDER_SERVICE_HOST", "127.0.0.1")
+RENDER_SERVICE_PORT = int(os.getenv("RENDER_SERVICE_PORT", "8080"))
+RENDER_PNG_COMPRESS_LEVEL = int(os.getenv("RENDER_PNG_COMPRESS_LEVEL", "1"))
+
+# Job queue (python -m ai_brain.job_queue): jobs database and worker
+# processes (default one per core). A running job's lease is renewed every
+# JOB_LEASE_SECONDS / 3; once it lapses (worker died) the job is requeued,
+# up to JOB_MAX_ATTEMPTS runs in total.
+JOBS_DB = os.getenv("JOBS_DB") or os.path.join(BASE_DIR, "jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS") or os.cpu_count() or 1)
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))
@@ -1,7 +1,31 @@
-from ai_brain.trend_fetcher import fetch_real_news
-from ai_brain.editorial_gate import evaluate_news
-from ai_brain.dedup_memory import load_posted_titles, save_posted_title
+import logging
+from datetime import datetime
+
+from ai_brain.config import SERP_INCREMENTAL, PIPELINE_STREAMING, PREGATE_ENABLED
+from ai_brain.trend_fetcher import (
+    fetch_real_news,
+    iter_real_news,
+    mark_news_seen,
+    SEARCH_QUERIES,
+    SERP_WINDOW,
+)
+from ai_brain.editorial_gate import evaluate_news, evaluate_news_batches, VERDICT_CACHE
+from ai_brain.dedup_memory import (
+    load_posted_titles,
+    save_posted_titles,
+    new_run_id,
+    reservation_key,
+    reserve_items,
+    release_reservations,
+)
 from ai_brain.insight_filler import generate_insight_items
+from ai_brain.news_clustering import cluster_news, cluster_members, NewsClusterer
+from ai_brain.pregate_scorer import PregateScorer
+from ai_brain.history_index import HistoryIndex, save_history
+from ai_brain.records import NewsItem, ApprovedItem
+from ai_brain.stage_executor import StageExecutor
+
+logger = logging.getLogger("daily_pipeline")
 
 
 def _deduplicate_entities(approved_items):
@@ -12,7 +36,7 @@ def _deduplicate_entities(approved_items):
     filtered = []
     
     for item in approved_items:
-        entity = item.get("entity", "").lower()
+        entity = item.entity.lower()
         if entity not in seen:
             seen.add(entity)
             filtered.append(item)
@@ -20,14 +44,148 @@ def _deduplicate_entities(approved_items):
     return filtered
 
 
-def run_daily_pipeline():
+def _local_verdict(item, scorer=None, history=None):
+    """
+    Reason to reject an item before the gate, or None: a near-duplicate
+    of a past post, or a pre-gate score below the threshold.
+    """
+    if history is not None and history.nearest(item.title):
+        return "duplicate"
+    if scorer is not None and not scorer.check(item):
+        return "low_impact"
+    return None
+
+
+def _is_posted(item, history=None) -> bool:
+    """
+    True if an approved item's summary nearly repeats a past post.
+    """
+    return history is not None and history.nearest(item.summary) is not None
+
+
+def _reserve(run_id, items, dedup_db=None):
+    """
+    Claim items for this run. Returns (items claimed, rejections for items
+    another running pipeline already holds).
+    """
+    granted = reserve_items(run_id, [reservation_key(item.title) for item in items], path=dedup_db)
+    claimed = []
+    rejected = []
+    for item in items:
+        if reservation_key(item.title) in granted:
+            claimed.append(item)
+        else:
+            rejected.append({"title": item.title, "reason": "reserved"})
+    return claimed, rejected
+
+
+def _gate_streaming(posted_titles, scorer=None, history=None, run_id=None, dedup_db=None):
+    """
+    Overlap fetch and gate: cluster signals as queries return, evaluate
+    micro-batches as they fill, and stop fetching once 3 entity-unique
+    items are approved. With GROQ_STREAMING, approvals are counted as they
+    arrive mid-response. Items settled locally (see `_local_verdict`)
+    never reach the gate.
+
+    Returns (signals consumed, editorial result, local rejections). The
+    result's "judged" lists the items settled locally or given a verdict;
+    the rest of a batch cut short by an early stop is left out, and
+    "stopped_early" says whether queries were left unread.
     """
-    Daily pipeline: fetch → evaluate → deduplicate → fill to 3.
+    signals = []
+    clusterer = NewsClusterer()
+    approved = []
+    rejected = []
+    local_rejected = []
+    judged = []
+    errors = []
+
+    news = iter_real_news()
+
+    def candidates():
+        for item in news:
+            signals.append(item)
+            if not clusterer.add(item):
+                continue
+            reason = _local_verdict(item, scorer, history)
+            if reason is not None:
+                local_rejected.append({"title": item.title, "reason": reason})
+                judged.append(item)
+                continue
+            if run_id is not None:
+                claimed, taken = _reserve(run_id, [item], dedup_db)
+                local_rejected.extend(taken)
+                if not claimed:
+                    continue
+            yield item
+
+    batches = evaluate_news_batches(candidates(), posted_titles, history=history)
+
+    try:
+        for _, verdicts in batches:
+            try:
+                for verdict, value in verdicts:
+                    if verdict == "judged":
+                        judged.append(value)
+                    elif verdict == "error":
+                        errors.append(value)
+                    elif verdict == "rejected":
+                        rejected.append(value)
+                    elif _is_posted(value, history):
+                        rejected.append({"title": value.summary, "reason": "duplicate"})
+                    else:
+                        approved = _deduplicate_entities(approved + [value])
+                        if len(approved) >= 3:
+                            break
+            finally:
+                verdicts.close()
+
+            if len(approved) >= 3:
+                break
+    finally:
+        batches.close()
+        news.close()
+
+    # Every batch failed: same outcome as a failed single gate call
+    if errors and not approved and not rejected:
+        return signals, {"approved": [], "rejected": [], "judged": judged, "error": errors[0]}, local_rejected
+
+    result = {"approved": approved, "rejected": rejected, "judged": judged, "stopped_early": len(approved) >= 3}
+    return signals, result, local_rejected
+
+
+def run_daily_pipeline(streaming: bool = None, run_id: str = None, run_dir: str = None,
+                       news=None, dedup_db: str = None, categories=None, judged: list = None):
+    """
+    Daily pipeline: fetch → cluster → pre-score / history check → reserve
+    → evaluate → history check → deduplicate → fill to 3.
+    
+    With streaming (default PIPELINE_STREAMING), fetch and gate overlap and
+    the run stops early once 3 entity-unique items are approved.
+    
+    Runs may overlap (retries, cron, several brands): each one reserves its
+    candidates under `run_id` before the gate, so no item goes to two runs.
+    Reservations of items that were not posted are released at the end.
+    
+    With a `run_dir`, each stage's output is checkpointed there (see
+    StageExecutor). Running again with the same run_id and run_dir resumes
+    at the first unfinished stage instead of repeating SerpAPI and Groq
+    calls, and a finished run returns its saved result.
+    
+    Batch runs (several brands, see brand_batch) pass:
+    - news: signals already fetched and clustered once for the whole
+      batch; the fetch stage is skipped and marking them seen is left
+      to the caller
+    - judged: list that receives the signals this run's gate judged or
+      settled locally, for the caller to mark seen
+    - dedup_db: the brand's own posting history database (default DEDUP_DB)
+    - categories: only approvals in these categories are kept
     
     Returns:
     {
         "approved": [...],  # Always 3 items if any real news exists
-        "rejected": [...]
+        "rejected": [...],
+        "pregate": {"scored": int, "rejected": int, "tokens_saved": int}
     }
     
     OR:
@@ -35,20 +193,167 @@ def run_daily_pipeline():
         "status": "no_publish_today"
     }
     """
+    run_id = run_id or new_run_id()
+    posted_keys = []
     
-    news_signals = fetch_real_news()
+    try:
+        return _run_pipeline(streaming, run_id, posted_keys, run_dir, news, dedup_db, categories, judged)
+    finally:
+        release_reservations(run_id, keep=posted_keys, path=dedup_db)
+
+
+# ----------------------------
+# Stage checkpoints
+# ----------------------------
+
+_RECORD_FIELDS = {
+    "signals": NewsItem,
+    "kept": NewsItem,
+    "settled": NewsItem,
+    "judged": NewsItem,
+    "approved": ApprovedItem,
+}
+
+
+def _dump_news(items):
+    return [item.to_dict() for item in items]
+
+
+def _load_news(data):
+    return [NewsItem.from_dict(item) for item in data]
+
+
+def _dump_fields(result):
+    return {
+        key: [item.to_dict() for item in value] if key in _RECORD_FIELDS else value
+        for key, value in result.items()
+    }
+
+
+def _load_fields(data):
+    return {
+        key: [_RECORD_FIELDS[key].from_dict(item) for item in value] if key in _RECORD_FIELDS else value
+        for key, value in data.items()
+    }
+
+
+def _gate_succeeded(result) -> bool:
+    return "error" not in result
+
+
+# ----------------------------
+# Stages
+# ----------------------------
+
+def _load_context(dedup_db=None):
+    """
+    Posting history, history index and pre-gate scorer. Local and cheap,
+    so rebuilt on every run rather than checkpointed.
+    """
+    posted_titles = load_posted_titles(path=dedup_db)
     
-    if not news_signals:
-        return {"status": "no_publish_today"}
+    # Obvious rejects (recaps, near-copies of posted titles, terms the gate
+    # keeps rejecting) are settled locally and never enter the prompt
+    history = HistoryIndex.load(path=dedup_db)
+    scorer = None
+    if PREGATE_ENABLED:
+        scorer = PregateScorer.from_history(VERDICT_CACHE.values(), posted_titles, history_index=history)
     
-    posted_titles = load_posted_titles()
+    return {"posted_titles": posted_titles, "history": history, "scorer": scorer, "dedup_db": dedup_db}
+
+
+def _screen(fetch, context, clustered=False):
+    """
+    Cluster fetched signals (unless a batch already did) and settle what
+    can be settled locally.
+    """
+    scorer = context["scorer"]
+    
+    # One representative per near-duplicate cluster reaches the LLM
+    candidates = fetch if clustered else cluster_news(fetch)
     
-    editorial_result = evaluate_news(news_signals, posted_titles)
+    kept = []
+    settled = []
+    local_rejected = []
+    for item in candidates:
+        reason = _local_verdict(item, scorer, context["history"])
+        if reason is None:
+            kept.append(item)
+        else:
+            settled.append(item)
+            local_rejected.append({"title": item.title, "reason": reason})
     
-    if "error" in editorial_result:
+    return {
+        "kept": kept,
+        "settled": settled,
+        "rejected": local_rejected,
+        "pregate": scorer.stats() if scorer is not None else None
+    }
+
+
+def _gate(fetch, screen, context, run_id):
+    """
+    Reserve the screened items for this run (again, when resuming: the
+    first attempt released them) and send them to the editorial gate.
+    
+    "judged" lists the items settled locally or given a verdict. Items
+    held by another run, compacted out of the prompt or lost with a failed
+    chunk are left out, so they aren't marked seen.
+    """
+    if not fetch:
+        return {"signals": [], "approved": [], "rejected": [], "judged": [], "pregate": screen["pregate"]}
+    
+    kept, taken = _reserve(run_id, screen["kept"], context["dedup_db"])
+    result = evaluate_news(kept, context["posted_titles"], history=context["history"])
+    gate = {
+        "signals": fetch,
+        "approved": result.get("approved", []),
+        "rejected": screen["rejected"] + taken + result.get("rejected", []),
+        "judged": screen.get("settled", []) + result.get("judged", []),
+        "pregate": screen["pregate"]
+    }
+    if "error" in result:
+        gate["error"] = result["error"]
+    return gate
+
+
+def _gate_stream(context, run_id):
+    scorer = context["scorer"]
+    signals, result, local_rejected = _gate_streaming(
+        context["posted_titles"], scorer, context["history"], run_id, context["dedup_db"]
+    )
+    gate = {
+        "signals": signals,
+        "approved": result.get("approved", []),
+        "rejected": local_rejected + result.get("rejected", []),
+        "judged": result.get("judged", []),
+        "stopped_early": result.get("stopped_early", False),
+        "pregate": scorer.stats() if scorer is not None else None
+    }
+    if "error" in result:
+        gate["error"] = result["error"]
+    return gate
+
+
+def _select(gate, context, categories=None):
+    """
+    Final picks: drop repeats of past posts and (with `categories`)
+    off-category items, one item per entity, fill to 3 with Market
+    Insights.
+    """
+    if not gate["signals"] or "error" in gate:
         return {"status": "no_publish_today"}
     
-    approved = editorial_result.get("approved", [])
+    # The gate only sees part of the history; catch repeats it let through
+    rejected = list(gate["rejected"])
+    approved = []
+    for item in gate["approved"]:
+        if _is_posted(item, context["history"]):
+            rejected.append({"title": item.summary, "reason": "duplicate"})
+        elif categories and item.category not in categories:
+            rejected.append({"title": item.summary, "reason": "category"})
+        else:
+            approved.append(item)
     
     approved = _deduplicate_entities(approved)
     
@@ -62,11 +367,99 @@ def run_daily_pipeline():
         insights = generate_insight_items(approved, needed)
         approved.extend(insights)
     
-    for item in approved:
-        if item.get("entity") != "Market Insight":
-            save_posted_title(item.get("summary", ""))
-    
     return {
         "approved": approved,
-        "rejected": editorial_result.get("rejected", [])
+        "rejected": rejected,
+        "pregate": gate["pregate"]
     }
+
+
+def _commit(gate, select, dedup_db=None, mark_seen=True):
+    """
+    Record what this run consumed and posted. Returns the reservation
+    keys of posted items. Checkpointed, so a resumed run never saves twice.
+    
+    Only signals the gate judged (plus the near-duplicates clustered into
+    them) are marked seen; the rest come back on the next fetch. After a
+    streaming gate stopped early, high-water marks stay put, since older
+    results it never read may still be waiting.
+    """
+    if mark_seen and gate["signals"] and "error" not in gate and SERP_INCREMENTAL:
+        seen = cluster_members(gate["signals"], gate.get("judged", []))
+        done = {id(item) for item in seen}
+        mark_news_seen(
+            seen,
+            pending=[item for item in gate["signals"] if id(item) not in done],
+            advance=not gate.get("stopped_early", False)
+        )
+    
+    if "approved" not in select:
+        return []
+    
+    posted = [item for item in select["approved"] if item.entity != "Market Insight"]
+    save_posted_titles((item.summary for item in posted), dedup_db)
+    save_history(((item.summary, [item.summary, item.title]) for item in posted), dedup_db)
+    return [reservation_key(item.title) for item in posted if item.title]
+
+
+def _run_pipeline(streaming, run_id, posted_keys, run_dir=None, news=None, dedup_db=None, categories=None,
+                  judged=None):
+    if streaming is None:
+        streaming = PIPELINE_STREAMING
+    
+    executor = StageExecutor(run_dir, name="pipeline", tags={"run_id": run_id})
+    executor.add("context", lambda: _load_context(dedup_db), persist=False, key={"dedup_db": dedup_db})
+    
+    if streaming and news is None:
+        # Fetch and gate overlap, so they checkpoint as one stage
+        executor.add(
+            "gate", lambda context: _gate_stream(context, run_id), deps=("context",),
+            key={"streaming": True, "day": _today(), "queries": SEARCH_QUERIES},
+            dump=_dump_fields, load=_load_fields, keep=_gate_succeeded
+        )
+    else:
+        if news is not None:
+            # Shared by a batch: fetched and clustered once, keyed by content
+            executor.add("fetch", lambda: news, persist=False, key=_dump_news(news))
+        else:
+            executor.add(
+                "fetch", fetch_real_news,
+                key={"day": _today(), "window": SERP_WINDOW, "queries": SEARCH_QUERIES},
+                dump=_dump_news, load=_load_news
+            )
+        executor.add(
+            "screen", lambda fetch, context: _screen(fetch, context, clustered=news is not None),
+            deps=("fetch", "context"), dump=_dump_fields, load=_load_fields
+        )
+        executor.add(
+            "gate", lambda fetch, screen, context: _gate(fetch, screen, context, run_id),
+            deps=("fetch", "screen", "context"),
+            dump=_dump_fields, load=_load_fields, keep=_gate_succeeded
+        )
+    
+    executor.add(
+        "select", lambda gate, context: _select(gate, context, categories), deps=("gate", "context"),
+        key={"categories": sorted(categories or [])}, dump=_dump_fields, load=_load_fields
+    )
+    executor.add(
+        "commit", lambda gate, select: _commit(gate, select, dedup_db, mark_seen=news is None),
+        deps=("gate", "select")
+    )
+    
+    results = executor.run()
+    posted_keys.extend(results["commit"])
+    if judged is not None and "error" not in results["gate"]:
+        judged.extend(results["gate"].get("judged", []))
+    
+    pregate = results["gate"]["pregate"]
+    if pregate is not None:
+        logger.info(
+            "Pre-gate rejected %d of %d items (~%d tokens saved)",
+            pregate["rejected"], pregate["scored"], pregate["tokens_saved"]
+        )
+    
+    return results["select"]
+
+
+def _today() -> str:
+    return datetime.utcnow().strftime("%Y-%m-%d")
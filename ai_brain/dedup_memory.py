@@ -1,9 +1,35 @@
+import hashlib
 import json
 import os
+import sqlite3
+import time
+import uuid
+from contextlib import closing, contextmanager
 from pathlib import Path
 
+from ai_brain.config import DEDUP_DB, DEDUP_MAX_AGE_DAYS, RESERVATION_TTL_HOURS
+
+# Legacy JSON memory; imported into the database once
 MEMORY_FILE = Path(__file__).parent.parent / "posted_titles.json"
-MAX_MEMORY = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posted (
+    hash TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    posted_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posted_at_idx ON posted (posted_at);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS reservations (
+    item_key TEXT PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    reserved_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reservations_run_idx ON reservations (run_id);
+"""
 
 
 def normalize_title(title: str) -> str:
@@ -14,47 +40,185 @@ def normalize_title(title: str) -> str:
     return "".join(c.lower() for c in title if c.isalnum() or c.isspace()).strip()
 
 
-def load_posted_titles():
+def title_hash(title: str) -> str:
+    return hashlib.sha1(normalize_title(title).encode("utf-8")).hexdigest()
+
+
+def _connect(path=None) -> sqlite3.Connection:
     """
-    Load previously posted titles from memory.
-    Returns list of normalized titles.
+    Open the history database. Several runs may use it at once: writes go
+    through `transaction` and wait up to 30s for another writer.
     """
-    if not MEMORY_FILE.exists():
-        return []
-    
+    path = Path(path or DEDUP_DB)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    legacy = path.resolve() == Path(DEDUP_DB).resolve()
+
+    # Autocommit mode; `transaction` issues BEGIN IMMEDIATE itself
+    conn = sqlite3.connect(str(path), timeout=30, isolation_level=None)
+    conn.execute("PRAGMA busy_timeout = 30000")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    # Only the default database inherits the legacy JSON memory (a brand's
+    # own database starts empty)
+    if legacy:
+        _migrate_json(conn)
+    return conn
+
+
+@contextmanager
+def transaction(conn):
+    """
+    Write transaction that takes the database write lock up front, so
+    concurrent read-modify-write sequences can't interleave.
+    """
+    conn.execute("BEGIN IMMEDIATE")
     try:
-        with open(MEMORY_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except:
-        return []
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
 
 
-def save_posted_title(title: str):
+def _migrate_json(conn):
+    """
+    One-time import of posted_titles.json, keeping its order.
+    """
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_json'").fetchone():
+        return
+
+    titles = []
+    if MEMORY_FILE.exists():
+        try:
+            with open(MEMORY_FILE, "r", encoding="utf-8") as f:
+                titles = [t for t in json.load(f) if isinstance(t, str)]
+        except (OSError, ValueError):
+            titles = []
+
+    now = time.time()
+    with transaction(conn):
+        # Another run may have migrated while we were reading the file
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_json'").fetchone():
+            return
+        conn.executemany(
+            "INSERT OR IGNORE INTO posted (hash, title, posted_at) VALUES (?, ?, ?)",
+            [(title_hash(t), normalize_title(t), now - (len(titles) - i)) for i, t in enumerate(titles)]
+        )
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_json', '1')")
+
+
+def _cutoff(max_age_days) -> float:
+    max_age_days = DEDUP_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    return time.time() - max_age_days * 86400
+
+
+def load_posted_titles(max_age_days: float = None, path=None):
+    """
+    Load previously posted titles from memory.
+    Returns list of normalized titles posted within max_age_days
+    (default DEDUP_MAX_AGE_DAYS), oldest first.
+    path: database file (default DEDUP_DB), e.g. one per brand
+    """
+    with closing(_connect(path)) as conn:
+        rows = conn.execute(
+            "SELECT title FROM posted WHERE posted_at >= ? ORDER BY posted_at, rowid",
+            (_cutoff(max_age_days),)
+        ).fetchall()
+    return [row[0] for row in rows]
+
+
+def save_posted_titles(titles, path=None):
+    """
+    Add posted titles to memory in one transaction, then drop entries
+    older than DEDUP_MAX_AGE_DAYS. Re-posting a title refreshes its age.
+    """
+    now = time.time()
+    rows = {}
+    for title in titles:
+        normalized = normalize_title(title)
+        if normalized:
+            rows[title_hash(normalized)] = (title_hash(normalized), normalized, now)
+
+    with closing(_connect(path)) as conn, transaction(conn):
+        conn.executemany(
+            "INSERT OR REPLACE INTO posted (hash, title, posted_at) VALUES (?, ?, ?)",
+            list(rows.values())
+        )
+        conn.execute("DELETE FROM posted WHERE posted_at < ?", (_cutoff(None),))
+
+
+def save_posted_title(title: str, path=None):
     """
     Add a new posted title to memory.
-    Keeps only last MAX_MEMORY items.
-    """
-    normalized = normalize_title(title)
-    
-    posted = load_posted_titles()
-    
-    # Avoid duplicates in memory itself
-    if normalized not in posted:
-        posted.append(normalized)
-    
-    # Keep only recent items
-    posted = posted[-MAX_MEMORY:]
-    
-    MEMORY_FILE.parent.mkdir(parents=True, exist_ok=True)
-    
-    with open(MEMORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(posted, f, indent=2)
-
-
-def is_duplicate(title: str) -> bool:
-    """
-    Check if title was already posted.
-    """
-    normalized = normalize_title(title)
-    posted = load_posted_titles()
-    return normalized in posted
+    """
+    save_posted_titles([title], path)
+
+
+def is_duplicate(title: str, path=None) -> bool:
+    """
+    Check if title was already posted (within DEDUP_MAX_AGE_DAYS).
+    """
+    with closing(_connect(path)) as conn:
+        row = conn.execute(
+            "SELECT 1 FROM posted WHERE hash = ? AND posted_at >= ?",
+            (title_hash(title), _cutoff(None))
+        ).fetchone()
+    return row is not None
+
+
+# ----------------------------
+# Run reservations
+# ----------------------------
+
+def new_run_id() -> str:
+    return f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+
+
+def reservation_key(title: str) -> str:
+    return title_hash(title)
+
+
+def reserve_items(run_id: str, keys, ttl_hours: float = None, path=None):
+    """
+    Atomically claim item keys for a run. Returns the set of keys this run
+    now holds; keys held by another live run are left out, so overlapping
+    runs split candidates instead of both posting them. Reservations older
+    than `ttl_hours` (default RESERVATION_TTL_HOURS) are treated as
+    abandoned by a crashed run.
+    """
+    ttl_hours = RESERVATION_TTL_HOURS if ttl_hours is None else ttl_hours
+    keys = list(dict.fromkeys(keys))
+    if not keys:
+        return set()
+
+    now = time.time()
+    granted = set()
+
+    with closing(_connect(path)) as conn, transaction(conn):
+        conn.execute("DELETE FROM reservations WHERE reserved_at < ?", (now - ttl_hours * 3600,))
+        for key in keys:
+            row = conn.execute("SELECT run_id FROM reservations WHERE item_key = ?", (key,)).fetchone()
+            if row is None:
+                conn.execute(
+                    "INSERT INTO reservations (item_key, run_id, reserved_at) VALUES (?, ?, ?)",
+                    (key, run_id, now)
+                )
+                granted.add(key)
+            elif row[0] == run_id:
+                granted.add(key)
+
+    return granted
+
+
+def release_reservations(run_id: str, keep=(), path=None):
+    """
+    Release a run's reservations, except `keep` (items it posted; those
+    stay claimed until they expire, while other runs' history catches up).
+    """
+    keep = set(keep)
+    with closing(_connect(path)) as conn, transaction(conn):
+        rows = conn.execute("SELECT item_key FROM reservations WHERE run_id = ?", (run_id,)).fetchall()
+        conn.executemany(
+            "DELETE FROM reservations WHERE item_key = ?",
+            [(key,) for (key,) in rows if key not in keep]
+        )
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+
+class DiskCache:
+    """
+    Small JSON-file cache with a TTL and size-bounded eviction.
+
+    Each key is stored as one file named by its sha256, so entries can be
+    written safely from several threads or processes. When the cache grows
+    past `max_entries`, expired entries go first, then the oldest ones,
+    down to 90% of `max_entries`.
+    """
+
+    def __init__(self, directory, ttl: float, max_entries: int = 200):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Entries counted at the last scan plus new keys written since; the
+        # directory is only rescanned once this passes max_entries (other
+        # processes' writes are picked up at the next scan)
+        self._count = None
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.directory / f"{digest}.json"
+
+    def get(self, key: str):
+        """
+        Return the cached value for key, or None if missing or expired.
+        """
+        if self.ttl <= 0:
+            return None
+
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if time.time() - entry.get("created_at", 0) > self.ttl:
+            return None
+
+        return entry.get("value")
+
+    def set(self, key: str, value):
+        if self.ttl <= 0:
+            return
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        added = not path.exists()
+
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "created_at": time.time(), "value": value}, f)
+        os.replace(tmp, path)
+
+        with self._lock:
+            if self._count is not None and added:
+                self._count += 1
+            full = self._count is None or self._count > self.max_entries
+        if full:
+            self._evict()
+
+    def values(self):
+        """
+        Iterate over all unexpired values (in no particular order).
+        """
+        if self.ttl <= 0:
+            return
+
+        now = time.time()
+        for path in self.directory.glob("*.json"):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if now - entry.get("created_at", 0) <= self.ttl:
+                yield entry.get("value")
+
+    def delete(self, key: str):
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        for path in self.directory.glob("*.json"):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        with self._lock:
+            self._count = 0
+
+    def _evict(self):
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                entries.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+
+        if len(entries) <= self.max_entries:
+            with self._lock:
+                self._count = len(entries)
+            return
+
+        now = time.time()
+        entries.sort()
+        # Trim below the limit, so the next scan is max_entries / 10 new keys away
+        excess = len(entries) - (self.max_entries - self.max_entries // 10)
+
+        # Expired entries first, then the oldest of the rest
+        expired = [p for mtime, p in entries if now - mtime > self.ttl]
+        fresh = [p for mtime, p in entries if now - mtime <= self.ttl]
+        removed = (expired + fresh)[:max(excess, len(expired))]
+
+        for path in removed:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+        with self._lock:
+            self._count = len(entries) - len(removed)
@@ -1,17 +1,52 @@
-import json
-import requests
-from ai_brain.config import GROQ_API_KEY, GROQ_URL
+import os
+from concurrent.futures import ThreadPoolExecutor
+from ai_brain import llm_client
+from ai_brain.records import ApprovedItem
+from ai_brain.disk_cache import DiskCache
+from ai_brain.dedup_memory import normalize_title
+from ai_brain.news_clustering import normalize_url
+from ai_brain.text_similarity import token_set, jaccard
+from ai_brain.json_stream import JsonItemStream, load_llm_json
+from ai_brain.token_budget import fit_prompt
+from ai_brain.config import (
+    GATE_BATCH_SIZE,
+    GATE_CHUNK_SIZE,
+    GATE_CONCURRENCY,
+    CACHE_DIR,
+    VERDICT_CACHE_TTL,
+    VERDICT_CACHE_MAX_ENTRIES,
+    GROQ_STREAMING,
+    PROMPT_TOKEN_BUDGET,
+    HISTORY_PROMPT_K,
+)
 
+# Bump whenever the gate prompt changes, so cached verdicts are re-judged
+GATE_PROMPT_VERSION = "2"
 
-def evaluate_news(news_items, posted_titles):
+VERDICT_CACHE = DiskCache(
+    os.path.join(CACHE_DIR, "verdicts"),
+    ttl=VERDICT_CACHE_TTL,
+    max_entries=VERDICT_CACHE_MAX_ENTRIES
+)
+
+# Approved summaries this similar across chunks are treated as one story
+CROSS_CHUNK_DUPLICATE_THRESHOLD = 0.6
+
+
+def evaluate_news(news_items, posted_titles, chunk_size: int = None, history=None):
     """
     Editorial gatekeeper: decide what is REAL + WORTH POSTING.
     
     Input:
-    - news_items: list from trend_fetcher (raw signals)
+    - news_items: list of NewsItem from trend_fetcher (raw signals)
     - posted_titles: list of previously posted normalized titles
+    - chunk_size: evaluate in concurrent chunks of this many items
+      (default GATE_CHUNK_SIZE, 0 = one prompt)
+    - history: optional HistoryIndex; each prompt then lists only the
+      HISTORY_PROMPT_K past posts most related to its items instead of
+      all of posted_titles
     
-    Output schema:
+    Output schema (approved entries are validated ApprovedItem records):
     {
         "approved": [
             {
@@ -27,16 +62,161 @@ def evaluate_news(news_items, posted_titles):
                 "title": str,
                 "reason": str  # duplicate | opinion | recap | low_impact
             }
-        ]
+        ],
+        "judged": [NewsItem]  # inputs that got a verdict (cached or in a
+                              # prompt that succeeded); the rest (compacted
+                              # away, failed chunks) were never judged
     }
     """
     
     if not news_items:
-        return {"approved": [], "rejected": []}
+        return {"approved": [], "rejected": [], "judged": []}
+    
+    chunk_size = GATE_CHUNK_SIZE if chunk_size is None else chunk_size
+    
+    # Items judged by an earlier run (same title + URL + prompt version)
+    # skip the LLM entirely
+    cached_approved, cached_rejected, uncached = _cached_verdicts(news_items, posted_titles, history)
+    
+    if not uncached:
+        result = {"approved": [], "rejected": [], "judged": []}
+    elif chunk_size <= 0 or len(uncached) <= chunk_size:
+        result = _evaluate_chunk(uncached, posted_titles, history)
+    else:
+        result = _evaluate_chunked(uncached, posted_titles, chunk_size, history)
     
+    if len(uncached) == len(news_items):
+        return result
+    
+    return _merge_cached(result, cached_approved, cached_rejected, news_items, uncached)
+
+
+def verdict_key(item) -> str:
+    return f"{GATE_PROMPT_VERSION}|{normalize_title(item.title)}|{normalize_url(item.url)}"
+
+
+def _cached_verdicts(news_items, posted_titles, history=None):
+    """
+    Split items into cached approvals, cached rejections and items still
+    to evaluate. A cached approval whose summary has since been posted (or
+    nearly repeats a post in `history`) is turned into a "duplicate"
+    rejection. Cached "duplicate" rejections are ignored: they depend on
+    the posting history of whoever was judged, and batch brands share the
+    cache.
+    """
+    posted = set(posted_titles or [])
+    approved = []
+    rejected = []
+    uncached = []
+    
+    for item in news_items:
+        entry = VERDICT_CACHE.get(verdict_key(item))
+        
+        if entry is None or entry["item"].get("reason") == "duplicate":
+            uncached.append(item)
+        elif entry.get("verdict") == "approved":
+            cached = ApprovedItem.from_dict(entry["item"])
+            if (normalize_title(cached.summary) in posted
+                    or (history is not None and history.nearest(cached.summary))):
+                rejected.append({"title": item.title, "reason": "duplicate"})
+            else:
+                approved.append(cached)
+        else:
+            rejected.append(entry["item"])
+    
+    return approved, rejected, uncached
+
+
+def _merge_cached(result, cached_approved, cached_rejected, news_items, uncached):
+    """
+    Merge cached verdicts with fresh ones, keeping approvals in input order.
+    An LLM failure only loses the uncached items.
+    """
+    errors = list(result.get("chunk_errors", []))
+    if "error" in result:
+        errors.append(result["error"])
+    
+    position = {}
+    for i, item in enumerate(news_items):
+        position.setdefault(item.url, i)
+    
+    approved = sorted(
+        cached_approved + result.get("approved", []),
+        key=lambda a: position.get(a.url, len(news_items))
+    )
+    approved, duplicates = _settle_duplicates(approved)
+    
+    rejected = cached_rejected + result.get("rejected", [])
+    rejected.extend({"title": item.summary, "reason": "duplicate"} for item in duplicates)
+    
+    pending = {id(item) for item in uncached}
+    judged = [item for item in news_items if id(item) not in pending] + result.get("judged", [])
+    
+    merged = {"approved": approved, "rejected": rejected, "judged": judged}
+    if errors:
+        merged["chunk_errors"] = errors
+    return merged
+
+
+def _evaluate_chunked(news_items, posted_titles, chunk_size, history=None):
+    """
+    Evaluate fixed-size chunks concurrently and merge them in input order.
+    
+    A failed chunk only loses its own items; the result carries an "error"
+    only if every chunk failed. Approved items that several chunks produced
+    for the same story are settled locally, without another LLM call.
+    """
+    chunks = [news_items[i:i + chunk_size] for i in range(0, len(news_items), chunk_size)]
+    
+    with ThreadPoolExecutor(max_workers=max(1, GATE_CONCURRENCY)) as executor:
+        results = list(executor.map(lambda chunk: _evaluate_chunk(chunk, posted_titles, history), chunks))
+    
+    errors = [r["error"] for r in results if "error" in r]
+    
+    if len(errors) == len(results):
+        return {"approved": [], "rejected": [], "judged": [], "error": errors[0]}
+    
+    approved = []
+    rejected = []
+    judged = []
+    for r in results:
+        approved.extend(r.get("approved", []))
+        rejected.extend(r.get("rejected", []))
+        judged.extend(r.get("judged", []))
+    
+    approved, duplicates = _settle_duplicates(approved)
+    rejected.extend({"title": item.summary, "reason": "duplicate"} for item in duplicates)
+    
+    merged = {"approved": approved, "rejected": rejected, "judged": judged}
+    if errors:
+        merged["chunk_errors"] = errors
+    return merged
+
+
+def _settle_duplicates(approved):
+    """
+    Keep the first approved item per story; later ones whose summaries
+    overlap strongly (token Jaccard) are returned as duplicates.
+    """
+    kept = []
+    kept_tokens = []
+    duplicates = []
+    
+    for item in approved:
+        tokens = token_set(item.summary)
+        if any(jaccard(tokens, other) >= CROSS_CHUNK_DUPLICATE_THRESHOLD for other in kept_tokens):
+            duplicates.append(item)
+        else:
+            kept.append(item)
+            kept_tokens.append(tokens)
+    
+    return kept, duplicates
+
+
+def _build_prompt(news_items, posted_titles) -> str:
     news_block = "\n".join(
-        f"- {n['title']} ({n['source']})"
-        for n in news_items
+        f"- [{i}] {n.title} ({n.source})"
+        for i, n in enumerate(news_items, start=1)
     )
     
     posted_block = "\n".join(posted_titles) if posted_titles else "(none)"
@@ -59,6 +239,7 @@ INPUT NEWS:
 {news_block}
 
 For each APPROVED item, return:
+- id: the [number] of the input item
 - entity
 - category: platform | ads | seo | privacy | commerce | creator_monetization
 - summary: factual one-line description
@@ -71,6 +252,7 @@ FORMAT:
 {{
   "approved": [
     {{
+      "id": 1,
       "entity": "...",
       "category": "...",
       "summary": "...",
@@ -80,6 +262,7 @@ FORMAT:
   ],
   "rejected": [
     {{
+      "id": 2,
       "title": "...",
       "reason": "duplicate | opinion | recap | low_impact"
     }}
@@ -87,25 +270,213 @@ FORMAT:
 }}
 """
     
-    payload = {
-        "model": "llama-3.3-70b-versatile",
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.1
-    }
-    
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json"
-    }
+    return prompt
+
+
+def _prompt_history(news_items, posted_titles, history=None):
+    """
+    Past posts for the prompt: with a HistoryIndex, the HISTORY_PROMPT_K
+    most related to these items, least related first so budget
+    compaction drops those first; otherwise all of posted_titles.
+    """
+    if history is None:
+        return posted_titles
+    related = history.related([n.title for n in news_items], k=HISTORY_PROMPT_K)
+    return related[::-1]
+
+
+def _fit_prompt(news_items, posted_titles, history=None):
+    """
+    Build the gate prompt within PROMPT_TOKEN_BUDGET. Returns
+    (prompt, items in the prompt, estimated tokens). Items compacted away
+    are left out of "judged", so they aren't marked seen and come back on
+    a later run.
+    """
+    prompt, items, _, tokens = fit_prompt(
+        _build_prompt, news_items, _prompt_history(news_items, posted_titles, history),
+        budget=PROMPT_TOKEN_BUDGET
+    )
+    return prompt, items, tokens
+
+
+def _evaluate_chunk(news_items, posted_titles, history=None):
+    """
+    One Groq call over `news_items`. Same output schema as `evaluate_news`.
+    """
+    prompt, news_items, estimated = _fit_prompt(news_items, posted_titles, history)
     
     try:
-        r = requests.post(GROQ_URL, headers=headers, json=payload, timeout=30)
-        raw = r.json()["choices"][0]["message"]["content"]
-        raw = raw.strip().replace("```json", "").replace("```", "")
-        return json.loads(raw)
+        raw = llm_client.complete("editorial_gate", prompt, estimated)
+        result = _resolve_verdicts(load_llm_json(raw), news_items)
     except Exception as e:
         return {
             "approved": [],
             "rejected": [],
+            "judged": [],
             "error": str(e)
         }
+    
+    result["judged"] = news_items
+    return result
+
+
+def _source_item(data, news_items):
+    try:
+        index = int(data.get("id"))
+    except (TypeError, ValueError):
+        return None
+    if 1 <= index <= len(news_items):
+        return news_items[index - 1]
+    return None
+
+
+def _resolve_approved(data, news_items):
+    """
+    Validate one approved verdict, link it to its input item by id and
+    cache it. Returns None if the verdict is invalid.
+    """
+    item = ApprovedItem.from_llm(data)
+    if item is None:
+        return None
+    
+    source = _source_item(data, news_items)
+    if source is not None:
+        item.title = source.title
+        item.url = source.url
+        VERDICT_CACHE.set(verdict_key(source), {
+            "verdict": "approved",
+            "item": item.to_dict(),
+            "title": source.title,
+            "url": source.url
+        })
+    
+    return item
+
+
+def _resolve_rejected(data, news_items):
+    if not isinstance(data, dict):
+        return None
+    
+    source = _source_item(data, news_items)
+    entry = {
+        "title": data.get("title") or (source.title if source else ""),
+        "reason": data.get("reason", "")
+    }
+    # "duplicate" is judged against this run's posting history, so it isn't cached
+    if source is not None and entry["reason"] != "duplicate":
+        VERDICT_CACHE.set(verdict_key(source), {
+            "verdict": "rejected",
+            "item": entry,
+            "title": source.title,
+            "url": source.url
+        })
+    
+    return entry
+
+
+def _resolve_verdicts(result, news_items):
+    """
+    Validate the LLM verdicts, link each one back to its input item by id
+    and store it in the verdict cache.
+    """
+    approved = [_resolve_approved(d, news_items) for d in result.get("approved", [])]
+    rejected = [_resolve_rejected(d, news_items) for d in result.get("rejected", [])]
+    
+    return {
+        "approved": [a for a in approved if a is not None],
+        "rejected": [r for r in rejected if r is not None]
+    }
+
+
+def iter_news_verdicts(news_items, posted_titles, history=None):
+    """
+    Streaming gate over one batch: yield ("approved", ApprovedItem) and
+    ("rejected", dict) pairs as soon as each object is complete in the
+    Groq SSE stream, so downstream work can start on the first approval
+    while the model is still writing the rest. Cached verdicts come first.
+    A failed request yields a final ("error", message).
+    
+    Each input item that gets a verdict is announced first as
+    ("judged", NewsItem), so a consumer that stops early knows which items
+    the gate never got to.
+    """
+    cached_approved, cached_rejected, uncached = _cached_verdicts(news_items, posted_titles, history)
+    
+    pending = {id(item) for item in uncached}
+    for item in news_items:
+        if id(item) not in pending:
+            yield "judged", item
+    for item in cached_approved:
+        yield "approved", item
+    for entry in cached_rejected:
+        yield "rejected", entry
+    
+    if not uncached:
+        return
+    
+    parser = JsonItemStream(keys=("approved", "rejected"))
+    prompt, uncached, estimated = _fit_prompt(uncached, posted_titles, history)
+    deltas = llm_client.stream("editorial_gate", prompt, estimated)
+    
+    judged = set()
+    try:
+        for delta in deltas:
+            for key, data in parser.feed(delta):
+                source = _source_item(data, uncached) if isinstance(data, dict) else None
+                if source is not None and id(source) not in judged:
+                    judged.add(id(source))
+                    yield "judged", source
+                if key == "approved":
+                    item = _resolve_approved(data, uncached)
+                else:
+                    item = _resolve_rejected(data, uncached)
+                if item is not None:
+                    yield key, item
+    except Exception as e:
+        yield "error", str(e)
+    finally:
+        deltas.close()
+
+
+def _result_verdicts(result):
+    """
+    Flatten an `evaluate_news` result into the (verdict, value) pairs
+    produced by `iter_news_verdicts`.
+    """
+    for item in result.get("judged", []):
+        yield "judged", item
+    if "error" in result:
+        yield "error", result["error"]
+    for item in result.get("approved", []):
+        yield "approved", item
+    for entry in result.get("rejected", []):
+        yield "rejected", entry
+
+
+def evaluate_news_batches(news_iter, posted_titles, batch_size: int = GATE_BATCH_SIZE,
+                          stream: bool = None, history=None):
+    """
+    Streaming gate: pull items from any iterable (e.g. `iter_real_news`)
+    and evaluate them in micro-batches of `batch_size` as they arrive.
+
+    Yields (batch, verdicts) per micro-batch, where verdicts iterates
+    ("judged" | "approved" | "rejected" | "error", value) pairs. With stream (default
+    GROQ_STREAMING) they come straight off the Groq SSE stream. Stop
+    iterating to stop pulling input.
+    """
+    stream = GROQ_STREAMING if stream is None else stream
+    batch = []
+
+    def verdicts(items):
+        if stream:
+            return iter_news_verdicts(items, posted_titles, history)
+        return _result_verdicts(evaluate_news(items, posted_titles, history=history))
+
+    for item in news_iter:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch, verdicts(batch)
+            batch = []
+
+    if batch:
+        yield batch, verdicts(batch)
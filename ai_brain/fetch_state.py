@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+from contextlib import closing
+from datetime import datetime
+
+from ai_brain.config import FETCH_STATE_FILE, FETCH_STATE_MAX_SEEN
+from ai_brain.dedup_memory import _connect, transaction
+from ai_brain.utils import normalize_date
+
+# Kept in the posting history database, so overlapping runs (batch brands,
+# job workers) update it in transactions instead of overwriting a file
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fetch_queries (
+    query TEXT PRIMARY KEY,
+    high_water TEXT
+);
+CREATE TABLE IF NOT EXISTS fetch_seen (
+    query TEXT NOT NULL,
+    url_hash TEXT NOT NULL,
+    PRIMARY KEY (query, url_hash)
+);
+"""
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha1(url.strip().encode("utf-8")).hexdigest()[:16]
+
+
+def _connect_state(path=None):
+    conn = _connect(path)
+    conn.executescript(_SCHEMA)
+    _migrate_json(conn)
+    return conn
+
+
+def _migrate_json(conn):
+    """
+    One-time import of the legacy fetch_state.json (FETCH_STATE_FILE).
+    """
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_fetch_state'").fetchone():
+        return
+
+    queries = {}
+    if os.path.exists(FETCH_STATE_FILE):
+        try:
+            with open(FETCH_STATE_FILE, "r", encoding="utf-8") as f:
+                queries = json.load(f).get("queries") or {}
+        except (OSError, ValueError, AttributeError):
+            queries = {}
+
+    with transaction(conn):
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_fetch_state'").fetchone():
+            return
+        for query, entry in queries.items():
+            conn.execute(
+                "INSERT OR REPLACE INTO fetch_queries (query, high_water) VALUES (?, ?)",
+                (query, entry.get("high_water"))
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO fetch_seen (query, url_hash) VALUES (?, ?)",
+                [(query, key) for key in entry.get("seen", [])]
+            )
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_fetch_state', '1')")
+
+
+def load_fetch_state(path=None) -> dict:
+    """
+    Load per-query high-water marks from the history database at `path`
+    (default DEDUP_DB):
+    {
+        "queries": {
+            "<query>": {
+                "high_water": "2026-01-01T00:00:00",  # newest published_at seen
+                "seen": {"<url hash>", ...}           # last FETCH_STATE_MAX_SEEN
+            }
+        }
+    }
+    """
+    with closing(_connect_state(path)) as conn:
+        marks = conn.execute("SELECT query, high_water FROM fetch_queries").fetchall()
+        seen = conn.execute("SELECT query, url_hash FROM fetch_seen").fetchall()
+
+    queries = {query: {"high_water": high_water, "seen": set()} for query, high_water in marks}
+    for query, key in seen:
+        queries.setdefault(query, {"high_water": None, "seen": set()})["seen"].add(key)
+    return {"queries": queries}
+
+
+def is_new(state: dict, query: str, url: str, published_at: str) -> bool:
+    """
+    An item is new if its URL hash is unseen for the query and it is not
+    older than the query's high-water mark. Items with unparseable dates
+    are judged on the URL alone.
+    """
+    entry = state.get("queries", {}).get(query)
+    if not entry:
+        return True
+
+    if url_key(url) in entry.get("seen", ()):
+        return False
+
+    high_water = entry.get("high_water")
+    published = normalize_date(published_at)
+    if high_water and published:
+        return published >= datetime.fromisoformat(high_water)
+
+    return True
+
+
+def save_seen(entries, path=None, pending=(), advance: bool = True):
+    """
+    Record (query, url, published_at) entries as seen in one transaction:
+    URL hashes are added (each query keeps its last FETCH_STATE_MAX_SEEN)
+    and high-water marks only move forward, so concurrent runs merge
+    instead of overwriting each other.
+
+    pending: (query, published_at) of fetched items that were not judged;
+    a query's mark is not raised past the oldest of them, so they still
+    count as new next time. advance=False records URL hashes only (the
+    fetch was cut short, so older unread items may still be waiting).
+    """
+    entries = list(entries)
+    if not entries:
+        return
+
+    caps = {}
+    for query, published_at in pending:
+        published = normalize_date(published_at)
+        if published and (query not in caps or published < caps[query]):
+            caps[query] = published
+
+    with closing(_connect_state(path)) as conn, transaction(conn):
+        for query, url, published_at in entries:
+            conn.execute("INSERT OR IGNORE INTO fetch_seen (query, url_hash) VALUES (?, ?)", (query, url_key(url)))
+
+            published = normalize_date(published_at)
+            if published and query in caps:
+                published = min(published, caps[query])
+            if not published or not advance:
+                continue
+            row = conn.execute("SELECT high_water FROM fetch_queries WHERE query = ?", (query,)).fetchone()
+            if row is None or not row[0] or published > datetime.fromisoformat(row[0]):
+                conn.execute(
+                    "INSERT OR REPLACE INTO fetch_queries (query, high_water) VALUES (?, ?)",
+                    (query, published.isoformat())
+                )
+
+        for query in {query for query, _, _ in entries}:
+            conn.execute(
+                "DELETE FROM fetch_seen WHERE query = ? AND rowid NOT IN "
+                "(SELECT rowid FROM fetch_seen WHERE query = ? ORDER BY rowid DESC LIMIT ?)",
+                (query, query, FETCH_STATE_MAX_SEEN)
+            )
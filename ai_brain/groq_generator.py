@@ -1,12 +1,21 @@
-import json
-import requests
-from ai_brain.config import GROQ_API_KEY, GROQ_URL
-
-def _clean_json(raw: str) -> str:
-    if not isinstance(raw, str):
-        return raw
-    return raw.strip().replace("```json", "").replace("```", "").strip()
+import copy
+from ai_brain import llm_client
+from ai_brain.config import GROQ_API_KEY, PROMPT_TOKEN_BUDGET
+from ai_brain.json_stream import load_llm_json
+from ai_brain.token_budget import fit_prompt
 
+FALLBACK_RESULT = {
+    "approved": [
+        {
+            "entity": "Instagram",
+            "update_type": "feature_release",
+            "summary": "Instagram expands Reels to 10 minutes",
+            "takeaway": "Creators can now publish longer-form content without external platforms",
+            "confidence": "confirmed"
+        }
+    ],
+    "rejected": []
+}
 
 def evaluate_and_summarize(news_items):
     """
@@ -45,20 +54,22 @@ def evaluate_and_summarize(news_items):
     
     if not GROQ_API_KEY:
         # Fallback: minimal approved set
-        return {
-            "approved": [
-                {
-                    "entity": "Instagram",
-                    "update_type": "feature_release",
-                    "summary": "Instagram expands Reels to 10 minutes",
-                    "takeaway": "Creators can now publish longer-form content without external platforms",
-                    "confidence": "confirmed"
-                }
-            ],
-            "rejected": []
-        }
+        return copy.deepcopy(FALLBACK_RESULT)
+
+    prompt, estimated = _fit_prompt(news_items)
+
+    try:
+        raw = llm_client.complete("groq_generator", prompt, estimated)
+    except Exception as e:
+        return {"error": f"Groq request failed: {e}"}
+
+    try:
+        return load_llm_json(raw)
+    except ValueError as e:
+        return {"error": "Failed to parse Groq JSON", "raw": raw, "err": str(e)}
 
-    # Build editorial prompt
+
+def _build_prompt(news_items) -> str:
     prompt = f"""You are an editorial gatekeeper for a tech marketing news channel.
 
 INPUT: {len(news_items)} news signals from SERP.
@@ -111,32 +122,15 @@ OUTPUT FORMAT (valid JSON only):
 }
 """
 
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json"
-    }
+    return prompt
 
-    payload = {
-        "model": "llama-3.3-70b-versatile",
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.1  # Lower temp = more deterministic
-    }
 
-    try:
-        r = requests.post(GROQ_URL, headers=headers, json=payload, timeout=30)
-        data = r.json()
-    except Exception as e:
-        return {"error": f"Groq request failed: {e}"}
-
-    raw = data["choices"][0]["message"]["content"]
-    raw = _clean_json(raw)
-
-    try:
-        return json.loads(raw)
-    except:
-        try:
-            start = raw.index("{")
-            end = raw.rindex("}") + 1
-            return json.loads(raw[start:end])
-        except Exception as e:
-            return {"error": "Failed to parse Groq JSON", "raw": raw, "err": str(e)}
+def _fit_prompt(news_items):
+    """
+    Build the prompt within PROMPT_TOKEN_BUDGET (long snippets are
+    shortened first). Returns (prompt, estimated tokens).
+    """
+    prompt, _, _, tokens = fit_prompt(
+        lambda items, _history: _build_prompt(items), news_items, budget=PROMPT_TOKEN_BUDGET
+    )
+    return prompt, tokens
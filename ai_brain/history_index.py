@@ -0,0 +1,234 @@
+import heapq
+import math
+import threading
+import time
+from array import array
+from contextlib import closing
+
+from ai_brain.config import HISTORY_DUPLICATE_THRESHOLD, DEDUP_MAX_AGE_DAYS
+from ai_brain.dedup_memory import _connect, title_hash, transaction
+from ai_brain.text_similarity import token_set, jaccard, minhash
+
+# 64 permutations in 21 bands of 3 rows: pairs at Jaccard 0.5 become
+# candidates with ~94% probability, pairs at 0.1 with ~2%, so lookups stay
+# small on a large history. Candidates are then checked exactly.
+NUM_PERM = 64
+NUM_BANDS = 21
+_BAND_WIDTH = (NUM_PERM // NUM_BANDS) * 4  # bytes of uint32 rows per band
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history_index (
+    post_hash TEXT NOT NULL,
+    text TEXT NOT NULL,
+    signature BLOB NOT NULL,
+    posted_at REAL NOT NULL,
+    PRIMARY KEY (post_hash, text)
+);
+CREATE INDEX IF NOT EXISTS history_posted_at_idx ON history_index (posted_at);
+"""
+
+
+def _connect_index(path=None):
+    conn = _connect(path)
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _signature(tokens) -> bytes:
+    return array("I", minhash(tokens, NUM_PERM)).tobytes()
+
+
+def _band_keys(signature: bytes):
+    # Byte slices of the packed signature: no per-band tuples to build
+    return [signature[i * _BAND_WIDTH:(i + 1) * _BAND_WIDTH] for i in range(NUM_BANDS)]
+
+
+class HistoryIndex:
+    """
+    MinHash LSH index over posted summaries and source titles.
+
+    `nearest(text)` answers "near-duplicate of past post X with similarity
+    S" by looking up the text's LSH bands and checking only those
+    candidates with exact token Jaccard. Entries can be added at any time.
+    Tokens of indexed texts are only computed once they become candidates.
+    """
+
+    def __init__(self, threshold: float = HISTORY_DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self._texts = []
+        self._tokens = []
+        self._bands = [{} for _ in range(NUM_BANDS)]
+        self._seen = set()
+        self._postings = None  # token -> entry indexes, built on first `related`
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._texts)
+
+    def add(self, text: str, signature: bytes = None) -> bool:
+        """
+        Index a posted text (`signature` as stored by `save_history`).
+        Returns False if it was already indexed or has no tokens.
+        """
+        if not text or text in self._seen:
+            return False
+
+        tokens = None
+        if signature is None:
+            tokens = token_set(text)
+            if not tokens:
+                return False
+            signature = _signature(tokens)
+
+        index = len(self._texts)
+        self._texts.append(text)
+        self._tokens.append(tokens)
+        self._seen.add(text)
+        for band, key in zip(self._bands, _band_keys(signature)):
+            band.setdefault(key, []).append(index)
+        if self._postings is not None:
+            self._post(index)
+        return True
+
+    def _tokens_of(self, index):
+        tokens = self._tokens[index]
+        if tokens is None:
+            tokens = self._tokens[index] = token_set(self._texts[index])
+        return tokens
+
+    def _post(self, index, postings=None):
+        postings = self._postings if postings is None else postings
+        for token in self._tokens_of(index):
+            postings.setdefault(token, []).append(index)
+
+    def query(self, text: str, threshold: float = None, limit: int = None):
+        """
+        Past texts at least `threshold` similar to `text`, most similar
+        first, as (text, similarity) pairs.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        tokens = token_set(text)
+        if not tokens or not self._texts:
+            return []
+
+        checked = set()
+        matches = []
+        for band, key in zip(self._bands, _band_keys(_signature(tokens))):
+            for index in band.get(key, ()):
+                if index in checked:
+                    continue
+                checked.add(index)
+                similarity = jaccard(tokens, self._tokens_of(index))
+                if similarity >= threshold:
+                    matches.append((self._texts[index], similarity))
+
+        matches.sort(key=lambda m: m[1], reverse=True)
+        return matches[:limit] if limit else matches
+
+    def nearest(self, text: str, threshold: float = None):
+        """
+        The most similar past text as (text, similarity), or None.
+        """
+        matches = self.query(text, threshold, limit=1)
+        return matches[0] if matches else None
+
+    def related(self, texts, k: int = 10):
+        """
+        The `k` past texts most related to any of `texts`, most related
+        first. Relatedness is IDF-weighted token Jaccard, so shared rare
+        terms (entities, feature names) count more than common ones. Unlike
+        `query`, this also ranks loosely related posts.
+        """
+        if not self._texts or k <= 0:
+            return []
+
+        # Gate chunks call this from several threads
+        with self._lock:
+            if self._postings is None:
+                postings = {}
+                for index in range(len(self._texts)):
+                    self._post(index, postings)
+                self._postings = postings
+
+        total = len(self._texts)
+        idf = {}
+
+        def weight(token):
+            w = idf.get(token)
+            if w is None:
+                df = len(self._postings.get(token, ())) or 1
+                w = idf[token] = math.log(1 + total / df)
+            return w
+
+        best = {}
+        for text in texts:
+            tokens = token_set(text)
+            if not tokens:
+                continue
+            query_weight = sum(weight(t) for t in tokens)
+
+            shared = {}
+            for token in tokens:
+                for index in self._postings.get(token, ()):
+                    shared[index] = shared.get(index, 0.0) + weight(token)
+
+            for index, overlap in shared.items():
+                entry_weight = sum(weight(t) for t in self._tokens_of(index))
+                score = overlap / (query_weight + entry_weight - overlap)
+                if score > best.get(index, 0.0):
+                    best[index] = score
+
+        top = heapq.nlargest(k, best.items(), key=lambda pair: pair[1])
+        return [self._texts[index] for index, _ in top]
+
+    @classmethod
+    def load(cls, threshold: float = HISTORY_DUPLICATE_THRESHOLD, max_age_days: float = None, path=None):
+        """
+        Build the index from the posting history database at `path`
+        (default DEDUP_DB), using stored signatures (no re-hashing).
+        """
+        max_age_days = DEDUP_MAX_AGE_DAYS if max_age_days is None else max_age_days
+        index = cls(threshold)
+
+        with closing(_connect_index(path)) as conn:
+            # Posts saved before the index existed (e.g. imported JSON memory)
+            missing = conn.execute(
+                "SELECT title FROM posted WHERE hash NOT IN (SELECT post_hash FROM history_index)"
+            ).fetchall()
+        if missing:
+            save_history(((title, [title]) for (title,) in missing), path)
+
+        with closing(_connect_index(path)) as conn:
+            rows = conn.execute(
+                "SELECT text, signature FROM history_index WHERE posted_at >= ? ORDER BY posted_at",
+                (time.time() - max_age_days * 86400,)
+            ).fetchall()
+
+        for text, signature in rows:
+            index.add(text, signature)
+        return index
+
+
+def save_history(posts, path=None):
+    """
+    Persist posted texts, as (post title, [texts to index]) pairs, and drop
+    entries older than DEDUP_MAX_AGE_DAYS. One transaction per call.
+    """
+    now = time.time()
+    rows = []
+    for post_title, texts in posts:
+        key = title_hash(post_title)
+        for text in texts:
+            tokens = token_set(text or "")
+            if tokens:
+                rows.append((key, text, _signature(tokens), now))
+
+    with closing(_connect_index(path)) as conn, transaction(conn):
+        conn.executemany(
+            "INSERT OR REPLACE INTO history_index (post_hash, text, signature, posted_at) VALUES (?, ?, ?, ?)",
+            rows
+        )
+        conn.execute(
+            "DELETE FROM history_index WHERE posted_at < ?",
+            (now - DEDUP_MAX_AGE_DAYS * 86400,)
+        )
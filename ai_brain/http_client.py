@@ -0,0 +1,195 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ai_brain import http_replay, metrics
+from ai_brain.config import (
+    HTTP_TIMEOUT,
+    HTTP_MAX_RETRIES,
+    HTTP_BACKOFF_BASE,
+    HTTP_BACKOFF_MAX,
+    HTTP_POOL_SIZE,
+)
+
+# Statuses worth retrying for idempotent calls. Non-idempotent calls
+# (e.g. Leonardo job creation) only retry 429, which means "not processed".
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+_sessions = {}
+_stats = {}
+_lock = threading.Lock()
+
+
+def _session_for(url: str) -> requests.Session:
+    """
+    One keep-alive session (and connection pool) per host.
+    """
+    host = urlsplit(url).netloc
+
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[host] = session
+
+    return session
+
+
+def _record(provider: str, latency: float = 0.0, request: bool = True,
+            retry: bool = False, error: bool = False):
+    with _lock:
+        s = _stats.setdefault(provider, {
+            "requests": 0,
+            "retries": 0,
+            "errors": 0,
+            "latency_total": 0.0,
+            "latency_max": 0.0
+        })
+        if request:
+            s["requests"] += 1
+            s["latency_total"] += latency
+            s["latency_max"] = max(s["latency_max"], latency)
+        if retry:
+            s["retries"] += 1
+        if error:
+            s["errors"] += 1
+
+
+def _retry_after(response) -> float:
+    """
+    Parse a Retry-After header (seconds or HTTP date). None if absent.
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+def _backoff(attempt: int) -> float:
+    """
+    Exponential backoff with full jitter.
+    """
+    cap = min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt))
+    return random.uniform(0, cap)
+
+
+def _past(deadline: float, delay: float) -> bool:
+    """
+    True if waiting `delay` seconds would reach the deadline (if any).
+    """
+    return deadline is not None and time.monotonic() + delay >= deadline
+
+
+def request(provider: str, method: str, url: str, timeout: float = None,
+            retries: int = None, idempotent: bool = None, deadline: float = None, **kwargs):
+    """
+    Send a request through the shared per-host session.
+
+    Retries 429/5xx and connection failures with exponential backoff and
+    jitter, honouring Retry-After. Calls that are not idempotent only retry
+    429 and connect timeouts. The last response is returned as-is, so
+    callers keep their own status handling; the last exception is raised
+    when every attempt failed to connect.
+
+    `deadline` (a time.monotonic() value) bounds the whole call: each
+    attempt's timeout is cut to the time left, and no retry is made whose
+    backoff would end past it.
+
+    Every attempt is timed into the run metrics (see metrics.record_http).
+
+    With HTTP_REPLAY_MODE=record the returned exchange is written to the
+    fixture file; with replay it is served by the local stand-in instead.
+    """
+    method = method.upper()
+    timeout = HTTP_TIMEOUT if timeout is None else timeout
+    retries = HTTP_MAX_RETRIES if retries is None else retries
+    if idempotent is None:
+        idempotent = method in IDEMPOTENT_METHODS
+
+    retry_statuses = RETRY_STATUSES if idempotent else {429}
+    retry_errors = (requests.ConnectionError, requests.Timeout) if idempotent else (requests.ConnectTimeout,)
+
+    upstream_url = url
+    if http_replay.is_replaying():
+        url = http_replay.local_url(url)
+
+    session = _session_for(url)
+    attempt = 0
+
+    while True:
+        start = time.monotonic()
+        attempt_timeout = timeout if deadline is None else max(0.001, min(timeout, deadline - start))
+        try:
+            response = session.request(method, url, timeout=attempt_timeout, **kwargs)
+        except requests.RequestException as e:
+            _record(provider, time.monotonic() - start, error=True)
+            metrics.record_http(provider, method, http_replay.canonical_url(upstream_url), None,
+                                time.monotonic() - start, attempt)
+            if attempt >= retries or not isinstance(e, retry_errors):
+                raise
+            delay = _backoff(attempt)
+            if _past(deadline, delay):
+                raise
+        else:
+            latency = time.monotonic() - start
+            _record(provider, latency)
+            metrics.record_http(provider, method, http_replay.canonical_url(upstream_url),
+                                response.status_code, latency, attempt)
+            delay = None
+            if response.status_code in retry_statuses and attempt < retries:
+                delay = _retry_after(response)
+                if delay is None:
+                    delay = _backoff(attempt)
+                delay = min(delay, HTTP_BACKOFF_MAX)
+            if delay is None or _past(deadline, delay):
+                if http_replay.is_recording():
+                    http_replay.record(provider, method, upstream_url, kwargs, response, latency)
+                return response
+            response.close()
+
+        _record(provider, request=False, retry=True)
+        time.sleep(delay)
+        attempt += 1
+
+
+def get(provider: str, url: str, **kwargs):
+    return request(provider, "GET", url, **kwargs)
+
+
+def post(provider: str, url: str, **kwargs):
+    return request(provider, "POST", url, **kwargs)
+
+
+def get_stats() -> dict:
+    """
+    Per-provider counters: requests, retries, errors and latency (seconds).
+    """
+    with _lock:
+        stats = {}
+        for provider, s in _stats.items():
+            stats[provider] = dict(s)
+            stats[provider]["latency_avg"] = (
+                s["latency_total"] / s["requests"] if s["requests"] else 0.0
+            )
+        return stats
+
+
+def reset_stats():
+    with _lock:
+        _stats.clear()
@@ -0,0 +1,287 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl, urlencode, quote, unquote
+
+from ai_brain.config import (
+    HTTP_REPLAY_MODE,
+    HTTP_FIXTURE,
+    REPLAY_LATENCY_SCALE,
+    REPLAY_PENDING_POLLS,
+)
+
+# Never written to fixtures or used in request keys
+SECRET_PARAMS = {"api_key", "key", "token", "access_token"}
+
+# Response headers worth replaying (rate limits, retry hints, content type)
+KEPT_HEADERS = ("content-type", "retry-after")
+KEPT_HEADER_PREFIXES = ("x-ratelimit-",)
+
+# Share of a streamed response's latency spent before the first byte;
+# the rest is spread over the body lines
+STREAM_FIRST_BYTE = 0.2
+
+_lock = threading.Lock()
+_fixture = None
+_server = None
+_cursors = {}
+
+
+# ----------------------------
+# Request keys
+# ----------------------------
+
+def canonical_url(url: str) -> str:
+    """
+    URL with secret query params dropped and the rest sorted.
+    """
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if k.lower() not in SECRET_PARAMS)
+    return parts._replace(query=urlencode(query), fragment="").geturl()
+
+
+def route_key(method: str, url: str) -> str:
+    parts = urlsplit(url)
+    return f"{method.upper()} {parts.netloc}{parts.path}"
+
+
+def request_key(method: str, url: str, body=None) -> str:
+    """
+    Exact match key: method, canonical URL and a hash of the body.
+    """
+    if isinstance(body, (dict, list)):
+        body = json.dumps(body, sort_keys=True)
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    digest = hashlib.sha1(body or b"").hexdigest()[:16]
+    return f"{method.upper()} {canonical_url(url)} {digest}"
+
+
+def _request_body(kwargs):
+    if kwargs.get("json") is not None:
+        return kwargs["json"]
+    return kwargs.get("data")
+
+
+# ----------------------------
+# Fixture file
+# ----------------------------
+
+def _load_fixture():
+    global _fixture
+    if _fixture is None:
+        try:
+            with open(HTTP_FIXTURE, "r", encoding="utf-8") as f:
+                _fixture = json.load(f)
+        except (OSError, ValueError):
+            _fixture = {"exchanges": []}
+    return _fixture
+
+
+def _save_fixture():
+    os.makedirs(os.path.dirname(HTTP_FIXTURE), exist_ok=True)
+    tmp = f"{HTTP_FIXTURE}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(_fixture, f, indent=1)
+    os.replace(tmp, HTTP_FIXTURE)
+
+
+def _encode_body(content: bytes, content_type: str) -> dict:
+    if content_type.startswith(("application/json", "text/")):
+        try:
+            return {"body_text": content.decode("utf-8")}
+        except UnicodeDecodeError:
+            pass
+    return {"body_b64": base64.b64encode(content).decode("ascii")}
+
+
+def _decode_body(exchange) -> bytes:
+    if "body_text" in exchange:
+        return exchange["body_text"].encode("utf-8")
+    return base64.b64decode(exchange.get("body_b64", ""))
+
+
+def _kept_headers(headers) -> dict:
+    return {
+        k.lower(): v for k, v in headers.items()
+        if k.lower() in KEPT_HEADERS or k.lower().startswith(KEPT_HEADER_PREFIXES)
+    }
+
+
+def _append(exchange: dict):
+    with _lock:
+        _load_fixture()["exchanges"].append(exchange)
+        _save_fixture()
+
+
+def record(provider: str, method: str, url: str, kwargs: dict, response, latency: float):
+    """
+    Store one exchange made through `http_client`. Streamed bodies are
+    read in full here; requests replays them to the caller's iter_lines.
+    """
+    started = time.monotonic()
+    content = response.content
+    if kwargs.get("stream"):
+        latency += time.monotonic() - started
+    content_type = response.headers.get("content-type", "")
+    exchange = {
+        "provider": provider,
+        "method": method.upper(),
+        "url": canonical_url(url),
+        "key": request_key(method, url, _request_body(kwargs)),
+        "route": route_key(method, url),
+        "status": response.status_code,
+        "headers": _kept_headers(response.headers),
+        "latency": round(latency, 4),
+        "stream": bool(kwargs.get("stream")),
+    }
+    exchange.update(_encode_body(content, content_type))
+    _append(exchange)
+
+
+def record_call(provider: str, key: str, result):
+    """
+    Record a result from a client that doesn't go through `http_client`
+    (e.g. the Drive SDK).
+    """
+    _append({"provider": provider, "method": "CALL", "key": f"CALL {provider} {key}",
+             "route": f"CALL {provider}", "result": result, "latency": 0.0})
+
+
+def replay_call(provider: str, key: str):
+    """
+    The recorded result for a `record_call`, or None.
+    """
+    exchange = _next_exchange(f"CALL {provider} {key}", f"CALL {provider}")
+    return exchange.get("result") if exchange else None
+
+
+# ----------------------------
+# Replay
+# ----------------------------
+
+def _next_exchange(key: str, route: str):
+    """
+    Next recorded response for an exact key; repeated calls walk the
+    recorded sequence (e.g. Leonardo PENDING -> COMPLETE) and then stick to
+    the last one. Without an exact match, responses recorded on the same
+    route are served in order (prompts differ from run to run).
+    """
+    with _lock:
+        exchanges = _load_fixture()["exchanges"]
+        sequence = [e for e in exchanges if e.get("key") == key]
+        cursor_key = key
+        if not sequence:
+            sequence = [e for e in exchanges if e.get("route") == route]
+            cursor_key = route
+        if not sequence:
+            return None
+
+        n = _cursors.get(cursor_key, 0)
+        _cursors[cursor_key] = n + 1
+
+    if REPLAY_PENDING_POLLS >= 0 and len(sequence) > 1 and cursor_key == key:
+        return sequence[0] if n < REPLAY_PENDING_POLLS else sequence[-1]
+    return sequence[min(n, len(sequence) - 1)]
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    """
+    Serves recorded exchanges. The original URL is carried in the path:
+    /<scheme>/<host>/<path>?<query>.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _original_url(self) -> str:
+        scheme, _, rest = self.path.lstrip("/").partition("/")
+        return f"{scheme}://{unquote(rest)}"
+
+    def _serve(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        try:
+            body = json.loads(body) if body else None
+        except ValueError:
+            pass
+
+        url = self._original_url()
+        exchange = _next_exchange(request_key(self.command, url, body), route_key(self.command, url))
+
+        if exchange is None:
+            payload = json.dumps({"error": f"No recorded exchange for {self.command} {canonical_url(url)}"})
+            self._send(404, {"content-type": "application/json"}, payload.encode("utf-8"), 0.0, False)
+            return
+
+        self._send(
+            exchange["status"], exchange.get("headers", {}), _decode_body(exchange),
+            exchange.get("latency", 0.0) * REPLAY_LATENCY_SCALE, exchange.get("stream", False)
+        )
+
+    def _send(self, status, headers, content, latency, stream):
+        if not stream:
+            time.sleep(latency)
+        else:
+            time.sleep(latency * STREAM_FIRST_BYTE)
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+
+        if not stream:
+            self.wfile.write(content)
+            return
+
+        lines = content.splitlines(keepends=True) or [content]
+        pause = latency * (1 - STREAM_FIRST_BYTE) / len(lines)
+        for line in lines:
+            self.wfile.write(line)
+            self.wfile.flush()
+            time.sleep(pause)
+
+    do_GET = _serve
+    do_POST = _serve
+    do_PUT = _serve
+    do_DELETE = _serve
+
+
+def start_server() -> str:
+    """
+    Start the stand-in server once per process; returns its base URL.
+    """
+    global _server
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+        host, port = _server.server_address
+    return f"http://{host}:{port}"
+
+
+def local_url(url: str) -> str:
+    """
+    Rewrite an upstream URL to the stand-in server.
+    """
+    parts = urlsplit(url)
+    path = quote(f"{parts.netloc}{parts.path}")
+    query = f"?{parts.query}" if parts.query else ""
+    return f"{start_server()}/{parts.scheme}/{path}{query}"
+
+
+def is_recording() -> bool:
+    return HTTP_REPLAY_MODE == "record"
+
+
+def is_replaying() -> bool:
+    return HTTP_REPLAY_MODE == "replay"
@@ -1,3 +1,5 @@
+from ai_brain.records import ApprovedItem
+
 INSIGHT_TEMPLATES = {
     "privacy": {
         "entity": "Market Insight",
@@ -49,16 +51,16 @@ def generate_insight_items(existing_items, needed_count):
     Generate deterministic insight items based on categories of existing news.
     
     Input:
-    - existing_items: list of approved news items
+    - existing_items: list of ApprovedItem news items
     - needed_count: how many insight items to generate
     
     Output:
-    - list of insight items (max = needed_count)
+    - list of ApprovedItem insight items (max = needed_count)
     """
     if needed_count <= 0:
         return []
     
-    categories = [item.get("category", "platform") for item in existing_items]
+    categories = [item.category or "platform" for item in existing_items]
     
     if not categories:
         categories = ["platform"]
@@ -66,11 +68,11 @@ def generate_insight_items(existing_items, needed_count):
     insights = []
     for category in categories:
         if category in INSIGHT_TEMPLATES:
-            insights.append(INSIGHT_TEMPLATES[category].copy())
+            insights.append(ApprovedItem(**INSIGHT_TEMPLATES[category]))
             if len(insights) >= needed_count:
                 break
     
     while len(insights) < needed_count and "platform" in INSIGHT_TEMPLATES:
-        insights.append(INSIGHT_TEMPLATES["platform"].copy())
+        insights.append(ApprovedItem(**INSIGHT_TEMPLATES["platform"]))
     
     return insights[:needed_count]
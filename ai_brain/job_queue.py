@@ -0,0 +1,395 @@
+"""
+Durable local job queue (SQLite) for carousel runs, so a trigger returns
+a job ID at once and worker processes do the rendering.
+
+    submit("carousel", {"brand": "Acme"}, idempotency_key="n8n-2024-05-01")
+
+Submitting again with the same idempotency key returns the existing job
+instead of starting a second run, so n8n timeouts and retries are safe.
+A job's run folder is named after its ID, so a retried job resumes from
+its stage checkpoints. Start workers with:
+
+    python -m ai_brain.job_queue --workers 4
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+
+from ai_brain import http_client, metrics
+from ai_brain.brand_batch import (
+    BrandProfile,
+    load_brand_profiles,
+    run_carousel,
+    run_brand_batch,
+    new_batch_id,
+    batch_folder,
+)
+from ai_brain.config import (
+    OUTPUT_DIR,
+    BRANDS_FILE,
+    JOBS_DB,
+    JOB_WORKERS,
+    JOB_LEASE_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    JOB_POLL_SECONDS,
+)
+from ai_brain.dedup_memory import transaction
+from ai_brain.token_budget import usage_summary, reset_usage
+
+logger = logging.getLogger("job_queue")
+
+# queued -> running -> done | failed (running -> queued on retry)
+JOB_STATUSES = ("queued", "running", "done", "failed")
+
+
+class JobError(Exception):
+    """
+    The job can't succeed as submitted (unknown kind or brand, bad brands
+    file): it fails at once instead of being retried.
+    """
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    idempotency_key TEXT UNIQUE,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_idx ON jobs (status, created_at);
+"""
+
+_COLUMNS = ("id", "idempotency_key", "kind", "payload", "status", "result", "error",
+            "attempts", "worker", "lease_until", "created_at", "started_at", "finished_at")
+
+
+def _connect(path=None) -> sqlite3.Connection:
+    path = Path(path or JOBS_DB)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Autocommit mode; `transaction` issues BEGIN IMMEDIATE itself
+    conn = sqlite3.connect(str(path), timeout=30, isolation_level=None)
+    conn.execute("PRAGMA busy_timeout = 30000")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _job(row):
+    if row is None:
+        return None
+    job = dict(zip(_COLUMNS, row))
+    job["payload"] = json.loads(job["payload"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+def _select(conn, where: str, params):
+    return _job(conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE {where}", params).fetchone())
+
+
+def submit(kind: str, payload: dict = None, idempotency_key: str = None, path=None):
+    """
+    Queue a job. Returns (job, created); with an idempotency key that was
+    already used, the existing job (whatever its state) and created=False.
+    """
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown job kind: {kind}")
+
+    payload = dict(payload or {})
+    with closing(_connect(path)) as conn, transaction(conn):
+        if idempotency_key:
+            existing = _select(conn, "idempotency_key = ?", (idempotency_key,))
+            if existing is not None:
+                return existing, False
+
+        job_id = new_batch_id()
+        conn.execute(
+            "INSERT INTO jobs (id, idempotency_key, kind, payload, status, created_at) VALUES (?, ?, ?, ?, 'queued', ?)",
+            (job_id, idempotency_key or None, kind, json.dumps(payload, ensure_ascii=False), time.time())
+        )
+        return _select(conn, "id = ?", (job_id,)), True
+
+
+def get_job(job_id: str, path=None):
+    """
+    The job as a dict (payload and result decoded), or None.
+    """
+    with closing(_connect(path)) as conn:
+        return _select(conn, "id = ?", (job_id,))
+
+
+def _requeue_expired(conn, now: float):
+    """
+    Jobs whose worker stopped renewing its lease: back to the queue, or
+    failed once they've used up their attempts.
+    """
+    conn.execute(
+        "UPDATE jobs SET status = 'failed', error = 'worker lost (lease expired)', worker = NULL, "
+        "lease_until = NULL, finished_at = ? WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+        (now, now, JOB_MAX_ATTEMPTS)
+    )
+    conn.execute(
+        "UPDATE jobs SET status = 'queued', error = 'worker lost (lease expired)', worker = NULL, "
+        "lease_until = NULL WHERE status = 'running' AND lease_until < ?",
+        (now,)
+    )
+
+
+def claim(worker: str, lease_seconds: float = None, path=None):
+    """
+    Take the oldest queued job for `worker`, holding it for
+    `lease_seconds` (default JOB_LEASE_SECONDS). Returns the job, or None
+    if the queue is empty.
+    """
+    lease_seconds = JOB_LEASE_SECONDS if lease_seconds is None else lease_seconds
+    now = time.time()
+
+    with closing(_connect(path)) as conn, transaction(conn):
+        _requeue_expired(conn, now)
+        job = _select(conn, "status = 'queued' ORDER BY created_at, rowid LIMIT 1", ())
+        if job is None:
+            return None
+        conn.execute(
+            "UPDATE jobs SET status = 'running', worker = ?, lease_until = ?, attempts = attempts + 1, "
+            "started_at = ? WHERE id = ?",
+            (worker, now + lease_seconds, now, job["id"])
+        )
+        return _select(conn, "id = ?", (job["id"],))
+
+
+def heartbeat(job_id: str, worker: str, lease_seconds: float = None, path=None) -> bool:
+    """
+    Extend a running job's lease. False if the worker no longer holds it.
+    """
+    lease_seconds = JOB_LEASE_SECONDS if lease_seconds is None else lease_seconds
+    with closing(_connect(path)) as conn, transaction(conn):
+        cursor = conn.execute(
+            "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'running'",
+            (time.time() + lease_seconds, job_id, worker)
+        )
+        return cursor.rowcount == 1
+
+
+def finish(job_id: str, worker: str, result: dict = None, error: str = None, retry: bool = True,
+           path=None) -> str:
+    """
+    Record a run's outcome. On error the job goes back to the queue until
+    it has run JOB_MAX_ATTEMPTS times (retry=False fails it at once).
+    Returns the new status, or None if the worker no longer held the job
+    (its lease expired meanwhile).
+    """
+    now = time.time()
+    with closing(_connect(path)) as conn, transaction(conn):
+        job = _select(conn, "id = ? AND worker = ? AND status = 'running'", (job_id, worker))
+        if job is None:
+            return None
+
+        if error is None:
+            status = "done"
+        elif retry and job["attempts"] < JOB_MAX_ATTEMPTS:
+            status = "queued"
+        else:
+            status = "failed"
+
+        conn.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, worker = NULL, lease_until = NULL, "
+            "finished_at = ? WHERE id = ?",
+            (status, json.dumps(result, ensure_ascii=False) if result is not None else None, error,
+             now if status != "queued" else None, job_id)
+        )
+        return status
+
+
+def release(job_id: str, worker: str, path=None):
+    """
+    Put a job the worker is giving up on (e.g. shutdown) back in the
+    queue without counting the attempt.
+    """
+    with closing(_connect(path)) as conn, transaction(conn):
+        conn.execute(
+            "UPDATE jobs SET status = 'queued', attempts = attempts - 1, worker = NULL, lease_until = NULL "
+            "WHERE id = ? AND worker = ? AND status = 'running'",
+            (job_id, worker)
+        )
+
+
+# ----------------------------
+# Job kinds
+# ----------------------------
+
+def _brands_by_name():
+    if not os.path.exists(BRANDS_FILE):
+        return {}
+    try:
+        return {brand.name: brand for brand in load_brand_profiles(BRANDS_FILE)}
+    except ValueError as e:
+        raise JobError(f"Bad brands file {BRANDS_FILE}: {e}") from e
+
+
+def _named(brands, names):
+    unknown = [name for name in names if name not in brands]
+    if unknown:
+        raise JobError(f"Unknown brands: {unknown}")
+    return [brands[name] for name in names]
+
+
+def _carousel_job(job):
+    """
+    {"brand"?: name in BRANDS_FILE} -> run_carousel into
+    outputs/static_run_<job id>/.
+    """
+    name = job["payload"].get("brand")
+    brand = _named(_brands_by_name(), [name])[0] if name else BrandProfile.default()
+    output_dir = os.path.join(OUTPUT_DIR, f"static_run_{job['id']}")
+
+    metrics.attach(os.path.join(output_dir, "metrics.jsonl"))
+    result = run_carousel(job["id"], output_dir, brand)
+    return result, result.get("error") if result["status"] == "error" else None
+
+
+def _batch_job(job):
+    """
+    {"brands"?: [names in BRANDS_FILE]} -> run_brand_batch into
+    outputs/batch_<job id>/ (all brands by default).
+    """
+    brands = _brands_by_name()
+    selected = _named(brands, job["payload"].get("brands") or list(brands))
+    if not selected:
+        raise JobError(f"No brand profiles in {BRANDS_FILE}")
+
+    metrics.attach(os.path.join(batch_folder(job["id"]), "metrics.jsonl"))
+    result = run_brand_batch(selected, job["id"])
+
+    failed = [r for r in result["brands"] if r["status"] == "error"]
+    return result, "; ".join(f"{r['brand']}: {r['error']}" for r in failed) or None
+
+
+# kind -> fn(job) returning (result, error message or None)
+HANDLERS = {
+    "carousel": _carousel_job,
+    "batch": _batch_job,
+}
+
+
+# ----------------------------
+# Workers
+# ----------------------------
+
+def _keep_lease(job_id, worker, stop, path):
+    while not stop.wait(JOB_LEASE_SECONDS / 3):
+        try:
+            if not heartbeat(job_id, worker, path=path):
+                logger.warning("Job %s: lease lost", job_id)
+                return
+        except sqlite3.Error as e:
+            logger.warning("Job %s: heartbeat failed: %s", job_id, e)
+
+
+def run_job(job, worker: str, path=None) -> str:
+    """
+    Run a claimed job, renewing its lease meanwhile, and record the
+    outcome. Returns the job's new status. HTTP and LLM counters are
+    reset first, so each job's metrics cover that job only.
+    """
+    stop = threading.Event()
+    keeper = threading.Thread(target=_keep_lease, args=(job["id"], worker, stop, path), daemon=True)
+    keeper.start()
+
+    http_client.reset_stats()
+    reset_usage()
+    metrics.start()
+    result, error, retry = None, None, True
+    try:
+        with metrics.timed("job", job_id=job["id"], kind=job["kind"], attempt=job["attempts"]):
+            if job["kind"] not in HANDLERS:
+                raise JobError(f"Unknown job kind: {job['kind']}")
+            result, error = HANDLERS[job["kind"]](job)
+    except KeyboardInterrupt:
+        release(job["id"], worker, path=path)
+        raise
+    except JobError as e:
+        logger.error("Job %s: %s", job["id"], e)
+        error, retry = str(e), False
+    except Exception as e:
+        logger.exception("Job %s failed", job["id"])
+        error = str(e) or type(e).__name__
+    finally:
+        stop.set()
+        keeper.join()
+        metrics.stop(http=http_client.get_stats(), llm=usage_summary())
+
+    status = finish(job["id"], worker, result, error, retry=retry, path=path)
+    logger.info("Job %s (%s, attempt %s): %s", job["id"], job["kind"], job["attempts"], status or "lease lost")
+    return status
+
+
+def work(drain: bool = False, path=None):
+    """
+    Worker loop: claim and run jobs until interrupted (or, with drain=True,
+    until the queue is empty).
+    """
+    worker = f"{socket.gethostname()}-{os.getpid()}"
+    logger.info("Worker %s started", worker)
+    while True:
+        job = claim(worker, path=path)
+        if job is None:
+            if drain:
+                return
+            time.sleep(JOB_POLL_SECONDS)
+            continue
+        run_job(job, worker, path=path)
+
+
+def _work_process(drain, path):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(name)s: %(message)s")
+    try:
+        work(drain, path)
+    except KeyboardInterrupt:
+        pass
+
+
+def run_workers(count: int = None, drain: bool = False, path=None):
+    """
+    Drain the queue with `count` (default JOB_WORKERS) worker processes.
+    A worker killed mid-job leaves its lease to expire; the job is then
+    picked up again by another worker.
+    """
+    count = count or JOB_WORKERS
+    processes = [
+        multiprocessing.Process(target=_work_process, args=(drain, path), name=f"job-worker-{i + 1}")
+        for i in range(count)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run carousel job workers.")
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS, help="worker processes (default JOB_WORKERS)")
+    parser.add_argument("--drain", action="store_true", help="exit once the queue is empty")
+    args = parser.parse_args()
+
+    run_workers(args.workers, args.drain)
@@ -0,0 +1,148 @@
+import json
+
+from ai_brain.utils import repair_json, safe_load_json
+
+
+class JsonItemStream:
+    """
+    Incremental parser for LLM output shaped like
+    {"approved": [{...}, ...], "rejected": [{...}, ...]}.
+
+    Feed text chunks as they arrive; `feed` returns (key, object) pairs for
+    every object in one of the watched top-level arrays whose closing brace
+    has arrived. String literals and escapes are tracked, so braces inside
+    summaries don't confuse it. Text before the first "{" (e.g. a ```json
+    fence) is ignored.
+    """
+
+    def __init__(self, keys=("approved", "rejected")):
+        self.keys = set(keys)
+        self._buf = ""
+        self._pos = 0
+        self._stack = []         # open containers: ("{" | "[", key in parent)
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string = None
+        self._key = None         # key awaiting its value in the top-level object
+        self._item_start = None  # buffer offset where the current item began
+        self._item_key = None
+
+    def feed(self, chunk: str):
+        self._buf += chunk
+        emitted = []
+        buf = self._buf
+        i = self._pos
+
+        while i < len(buf):
+            ch = buf[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = buf[self._string_start:i]
+                i += 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i + 1
+            elif ch == ":" and len(self._stack) == 1:
+                self._key = self._last_string
+            elif ch in "{[":
+                parent_key = self._key if len(self._stack) == 1 else None
+                if (ch == "{" and len(self._stack) == 2 and self._stack[1][0] == "["
+                        and self._stack[1][1] in self.keys):
+                    self._item_start = i
+                    self._item_key = self._stack[1][1]
+                self._stack.append((ch, parent_key))
+            elif ch in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if ch == "}" and len(self._stack) == 2 and self._item_start is not None:
+                    item = _load_item(buf[self._item_start:i + 1])
+                    if item is not None:
+                        emitted.append((self._item_key, item))
+                    self._item_start = None
+            i += 1
+
+        # Drop text that can no longer be part of an item
+        keep_from = self._item_start if self._item_start is not None else i
+        if self._in_string:
+            keep_from = min(keep_from, self._string_start)
+        if keep_from > 0:
+            self._buf = buf[keep_from:]
+            if self._item_start is not None:
+                self._item_start -= keep_from
+            if self._in_string:
+                self._string_start -= keep_from
+            i -= keep_from
+        self._pos = i
+
+        return emitted
+
+
+def _load_item(text: str):
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    try:
+        return json.loads(repair_json(text))
+    except ValueError:
+        return None
+
+
+def load_llm_json(text: str, keys=("approved", "rejected")):
+    """
+    Parse a complete LLM response. Falls back to local repair (see
+    `utils.safe_load_json`), and finally to salvaging every complete item
+    of the `keys` arrays, so one broken object doesn't cost the whole call.
+    Raises ValueError if nothing can be recovered.
+    """
+    try:
+        return safe_load_json(text)
+    except ValueError as e:
+        error = e
+
+    items = JsonItemStream(keys=keys).feed(text or "")
+    if not items:
+        raise error
+
+    result = {key: [] for key in keys}
+    for key, item in items:
+        result[key].append(item)
+    return result
+
+
+def iter_chat_stream(response, on_usage=None):
+    """
+    Yield content deltas from an OpenAI-compatible chat-completions SSE
+    stream (`"stream": true`), as used by Groq. If given, `on_usage` is
+    called with the token usage reported in the final chunk.
+    """
+    for line in response.iter_lines(decode_unicode=True):
+        if not line or not line.startswith("data:"):
+            continue
+
+        data = line[5:].strip()
+        if data == "[DONE]":
+            return
+
+        try:
+            event = json.loads(data)
+        except ValueError:
+            continue
+
+        usage = event.get("usage") or (event.get("x_groq") or {}).get("usage")
+        if usage and on_usage is not None:
+            on_usage(usage)
+
+        for choice in event.get("choices", []):
+            content = (choice.get("delta") or {}).get("content")
+            if content:
+                yield content
@@ -15,10 +15,10 @@ def build_leonardo_payload(post_payload):
         slides.append({
             "slide_index": idx,
             "text_blocks": {
-                "headline": item.get("headline", ""),
-                "subheadline": item.get("subheadline", "")
+                "headline": item.headline,
+                "subheadline": item.subheadline
             },
-            "style_hint": item.get("visual_direction", "")
+            "style_hint": item.visual_direction
         })
     
     return {
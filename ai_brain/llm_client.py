@@ -0,0 +1,257 @@
+import re
+import threading
+import time
+
+from ai_brain import http_client
+from ai_brain.json_stream import iter_chat_stream
+from ai_brain.token_budget import estimate_tokens, record_usage
+from ai_brain.config import (
+    GROQ_API_KEY,
+    GROQ_URL,
+    GROQ_MODEL,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_QUEUE_WAIT,
+)
+
+# Tokens reserved for the completion when pacing a call
+COMPLETION_RESERVE = 1024
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_DURATION_UNITS = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+
+
+class LLMError(Exception):
+    pass
+
+
+def parse_reset(value) -> float:
+    """
+    Parse a Groq reset header ("2m59.56s", "7.66s", "120ms") into seconds.
+    None if absent or unparseable.
+    """
+    if not value:
+        return None
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return sum(float(n) * _DURATION_UNITS[unit] for n, unit in parts)
+
+
+class _Bucket:
+    """
+    Token bucket rebuilt from one limit/remaining/reset header triple:
+    `level` refills linearly to `capacity` over the reset period.
+    Unknown until the first response arrives, in which case it never blocks.
+    """
+
+    def __init__(self):
+        self.capacity = None
+        self.level = None
+        self.rate = 0.0
+        self.updated = 0.0
+
+    def update(self, limit, remaining, reset, now):
+        try:
+            remaining = float(remaining)
+        except (TypeError, ValueError):
+            return
+        try:
+            capacity = float(limit)
+        except (TypeError, ValueError):
+            capacity = max(remaining, self.capacity or 0.0)
+        reset = parse_reset(reset)
+
+        self.capacity = capacity
+        self.level = remaining
+        self.rate = (capacity - remaining) / reset if reset else 0.0
+        self.updated = now
+
+    def available(self, now) -> float:
+        if self.level is None:
+            return float("inf")
+        return min(self.capacity, self.level + self.rate * (now - self.updated))
+
+    def wait_time(self, amount, now) -> float:
+        """
+        Seconds until `amount` is available (0 if it already is). A request
+        larger than the whole bucket only waits for a full bucket.
+        """
+        available = self.available(now)
+        amount = min(amount, self.capacity) if self.capacity else amount
+        if available >= amount:
+            return 0.0
+        if self.rate <= 0:
+            # No reset time to pace by; let the HTTP retries handle a 429
+            return 0.0
+        return (amount - available) / self.rate
+
+    def take(self, amount, now):
+        if self.level is not None:
+            self.level = self.available(now) - amount
+            self.updated = now
+
+
+class RateLimitScheduler:
+    """
+    Paces LLM calls against Groq's x-ratelimit-* headers.
+
+    Calls queue until a concurrency slot is free and both the request and
+    token buckets have room for them, rather than being fired into 429s.
+    Each response refreshes the buckets from its headers.
+    """
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, max_wait: float = LLM_MAX_QUEUE_WAIT):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_wait = max_wait
+        self.requests = _Bucket()
+        self.tokens = _Bucket()
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, tokens: int) -> float:
+        """
+        Block until the call may go out; returns the seconds spent queued.
+        Raises LLMError if that would take longer than `max_wait`.
+        """
+        started = time.monotonic()
+        deadline = started + self.max_wait
+
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if self.in_flight < self.max_concurrency:
+                    wait = max(self.requests.wait_time(1, now), self.tokens.wait_time(tokens, now))
+                    if wait <= 0:
+                        break
+                else:
+                    wait = None
+
+                if wait is not None and now + wait > deadline:
+                    raise LLMError(f"Rate limit headroom not available within {self.max_wait:.0f}s")
+                if now >= deadline:
+                    raise LLMError(f"No LLM slot free within {self.max_wait:.0f}s")
+                self._cond.wait(timeout=min(deadline - now, wait if wait is not None else deadline - now))
+
+            self.in_flight += 1
+            self.requests.take(1, now)
+            self.tokens.take(tokens, now)
+
+        return time.monotonic() - started
+
+    def update(self, headers):
+        """
+        Refresh the buckets from a response's rate-limit headers.
+        """
+        now = time.monotonic()
+        with self._cond:
+            self.requests.update(
+                headers.get("x-ratelimit-limit-requests"),
+                headers.get("x-ratelimit-remaining-requests"),
+                headers.get("x-ratelimit-reset-requests"),
+                now
+            )
+            self.tokens.update(
+                headers.get("x-ratelimit-limit-tokens"),
+                headers.get("x-ratelimit-remaining-tokens"),
+                headers.get("x-ratelimit-reset-tokens"),
+                now
+            )
+            self._cond.notify_all()
+
+    def release(self):
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            self._cond.notify_all()
+
+
+SCHEDULER = RateLimitScheduler()
+
+
+def clean_content(raw: str) -> str:
+    """
+    Strip markdown code fences the model wraps around JSON.
+    """
+    if not isinstance(raw, str):
+        return raw
+    return raw.strip().replace("```json", "").replace("```", "").strip()
+
+
+def _payload(prompt: str, temperature: float, stream: bool) -> dict:
+    payload = {
+        "model": GROQ_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": temperature
+    }
+    if stream:
+        payload["stream"] = True
+    return payload
+
+
+def _post(prompt: str, temperature: float, stream: bool):
+    headers = {
+        "Authorization": f"Bearer {GROQ_API_KEY}",
+        "Content-Type": "application/json"
+    }
+    return http_client.post(
+        "groq", GROQ_URL, headers=headers, json=_payload(prompt, temperature, stream),
+        timeout=30, idempotent=True, stream=stream
+    )
+
+
+def complete(label: str, prompt: str, estimated_tokens: int = None, temperature: float = 0.1) -> str:
+    """
+    One paced Groq chat completion. Returns the message content with code
+    fences stripped; raises LLMError on a non-2xx response. Usage, latency
+    and queue time are recorded under `label`.
+    """
+    if estimated_tokens is None:
+        estimated_tokens = estimate_tokens(prompt)
+
+    queue_wait = SCHEDULER.acquire(estimated_tokens + COMPLETION_RESERVE)
+    started = time.monotonic()
+    try:
+        r = _post(prompt, temperature, stream=False)
+        SCHEDULER.update(r.headers)
+    finally:
+        SCHEDULER.release()
+
+    latency = time.monotonic() - started
+    if not r.ok:
+        record_usage(label, None, latency, estimated_tokens, queue_wait, r.status_code)
+        raise LLMError(f"Groq HTTP {r.status_code}: {r.text[:200]}")
+
+    data = r.json()
+    record_usage(label, data.get("usage"), latency, estimated_tokens, queue_wait, r.status_code)
+    return clean_content(data["choices"][0]["message"]["content"])
+
+
+def stream(label: str, prompt: str, estimated_tokens: int = None, temperature: float = 0.1):
+    """
+    Streaming variant of `complete`: yields content deltas as they arrive.
+    The scheduler slot is held until the stream ends or the generator is
+    closed. Raises LLMError before the first delta on a non-2xx response.
+    """
+    if estimated_tokens is None:
+        estimated_tokens = estimate_tokens(prompt)
+
+    queue_wait = SCHEDULER.acquire(estimated_tokens + COMPLETION_RESERVE)
+    started = time.monotonic()
+    usage = {}
+    r = None
+
+    try:
+        r = _post(prompt, temperature, stream=True)
+        SCHEDULER.update(r.headers)
+        if not r.ok:
+            raise LLMError(f"Groq HTTP {r.status_code}: {r.text[:200]}")
+        yield from iter_chat_stream(r, on_usage=usage.update)
+    finally:
+        SCHEDULER.release()
+        if r is not None:
+            r.close()
+            record_usage(
+                label, usage, time.monotonic() - started, estimated_tokens, queue_wait, r.status_code
+            )
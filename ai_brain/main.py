@@ -1,7 +1,11 @@
+import argparse
 import json
 import os
+from ai_brain import http_client, metrics
 from ai_brain.editorial_gate import evaluate_news
 from ai_brain.trend_fetcher import fetch_real_news
+from ai_brain.records import ApprovedItem
+from ai_brain.token_budget import usage_summary
 from ai_brain.carousel_generator import make_dir, generate_leonardo_slide
 from ai_brain.yoi_templates import (
     build_slide_1_cover,
@@ -14,12 +18,14 @@ def main():
     print("\n🚀 YOI Carousel Automation Starting...\n")
 
     # STEP 1: Fetch real SERP news
-    raw_news = fetch_real_news()
-    print("📌 Raw SERP news items:", raw_news)
+    with metrics.timed("fetch"):
+        raw_news = fetch_real_news()
+    print("📌 Raw SERP news items:", [n.to_dict() for n in raw_news])
 
     # STEP 2: Editorial Gate (Filter & Format)
     print("🧠 analyzing news signals with Editorial Gate...")
-    editorial_output = evaluate_news(raw_news, [])
+    with metrics.timed("gate"):
+        editorial_output = evaluate_news(raw_news, [])
     approved_items = editorial_output.get("approved", [])
     
     print(f"✅ Approved {len(approved_items)} items.")
@@ -27,18 +33,18 @@ def main():
     if not approved_items:
         print("⚠️ No approved news items found. Using fallback content.")
         approved_items = [
-             {
-                "summary": "Instagram expands Reels to 10 minutes",
-                "marketer_impact": "Creators need to rethink their content strategy for longer-form retention."
-             },
-             {
-                "summary": "Google pushes new standard for SEO",
-                 "marketer_impact": "Websites must optimize for user experience metrics."
-             },
-             {
-                 "summary": "TikTok launches new ad format",
-                 "marketer_impact": "Brands can now target users with interactive polls."
-             }
+             ApprovedItem(
+                summary="Instagram expands Reels to 10 minutes",
+                marketer_impact="Creators need to rethink their content strategy for longer-form retention."
+             ),
+             ApprovedItem(
+                summary="Google pushes new standard for SEO",
+                marketer_impact="Websites must optimize for user experience metrics."
+             ),
+             ApprovedItem(
+                 summary="TikTok launches new ad format",
+                 marketer_impact="Brands can now target users with interactive polls."
+             )
         ]
 
     # Map to slide format (Limit to 3)
@@ -46,8 +52,8 @@ def main():
     for i, item in enumerate(approved_items[:3]):
         slides_list.append({
             "slide": i + 2,
-            "headline": item.get("summary", "No Headline"),
-            "insight": item.get("marketer_impact", "No Insight")
+            "headline": item.summary or "No Headline",
+            "insight": item.marketer_impact or "No Insight"
         })
     
     slides_data = {"slides": slides_list}
@@ -55,10 +61,11 @@ def main():
     print(json.dumps(slides_data, indent=2))
 
     out_dir = make_dir("yoi_carousel")
+    metrics.attach(os.path.join(out_dir, "metrics.jsonl"))
 
     manifest = {
         "run_id": out_dir,
-        "raw_news": raw_news,
+        "raw_news": [n.to_dict() for n in raw_news],
         "slides": []
     }
 
@@ -68,7 +75,8 @@ def main():
 
     # SLIDE 1: Cover (Static Template)
     print("📄 Generating Slide 1 (Cover)...")
-    slide_1_path = build_slide_1_cover(out_dir)
+    with metrics.timed("render.cover"):
+        slide_1_path = build_slide_1_cover(out_dir)
     manifest["slides"].append({"slide": 1, "type": "cover", "path": slide_1_path})
     print(f"✅ Slide 1 complete: {slide_1_path}\n")
 
@@ -82,19 +90,20 @@ def main():
         print(f"   Headline: {headline}")
         print(f"   Insight: {insight}")
         
-        # Try Leonardo Generation (with Text)
-        news_slide_path = generate_leonardo_slide(
-            out_dir,
-            slide_num,
-            headline,
-            insight
-        )
-        
-        # Fallback if AI fails (e.g. no credits or error)
-        if not news_slide_path:
-             print("⚠️ Leonardo failed. Falling back to PIL template...")
-             from ai_brain.yoi_templates import build_news_slide
-             news_slide_path = build_news_slide(out_dir, slide_num, headline, insight)
+        with metrics.timed(f"render.slide_{slide_num}"):
+            # Try Leonardo Generation (with Text)
+            news_slide_path = generate_leonardo_slide(
+                out_dir,
+                slide_num,
+                headline,
+                insight
+            )
+            
+            # Fallback if AI fails (e.g. no credits or error)
+            if not news_slide_path:
+                 print("⚠️ Leonardo failed. Falling back to PIL template...")
+                 from ai_brain.yoi_templates import build_news_slide
+                 news_slide_path = build_news_slide(out_dir, slide_num, headline, insight)
         
         manifest["slides"].append({
             "slide": slide_num,
@@ -107,12 +116,13 @@ def main():
 
     # SLIDE 5: CTA (Static Template)
     print("📄 Generating Slide 5 (CTA)...")
-    slide_5_path = build_slide_5_cta(out_dir)
+    with metrics.timed("render.cta"):
+        slide_5_path = build_slide_5_cta(out_dir)
     manifest["slides"].append({"slide": 5, "type": "cta", "path": slide_5_path})
     print(f"✅ Slide 5 complete: {slide_5_path}\n")
 
     # Save manifest
-    with open(f"{out_dir}/manifest.json", "w", encoding="utf-8") as f:
+    with metrics.timed("save"), open(f"{out_dir}/manifest.json", "w", encoding="utf-8") as f:
         json.dump(manifest, f, indent=2)
 
     print("="*60)
@@ -125,4 +135,13 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Generate a carousel with Leonardo AI slides.")
+    parser.add_argument("--profile", action="store_true", help="dump cProfile stats per stage into the run folder")
+    args = parser.parse_args()
+
+    # Stage and HTTP timings go to <run folder>/metrics.jsonl
+    metrics.start(profile=args.profile)
+    try:
+        main()
+    finally:
+        metrics.stop(http=http_client.get_stats(), llm=usage_summary())
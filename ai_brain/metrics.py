@@ -0,0 +1,225 @@
+"""
+Lightweight run metrics: wall/CPU time per pipeline stage and per
+outbound HTTP call, written as JSON lines (metrics.jsonl) into the run
+folder next to manifest.json.
+
+Entry points call `start()` when a run begins and `attach()` once its
+folder is known; events recorded before that are buffered. With
+profile=True every outermost `timed()` block per thread also runs under
+cProfile and is dumped to <run folder>/profile/<stage>.prof (plus a
+.txt summary of the top functions). Without `start()` nothing is
+recorded and `timed()` is a no-op.
+"""
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+# Functions listed in each profile's .txt summary
+PROFILE_TOP = 30
+
+_lock = threading.Lock()
+_profile_lock = threading.Lock()
+_local = threading.local()
+_state = None
+
+
+class _RunState:
+    __slots__ = ("path", "profile", "started", "buffer", "profiles", "totals", "file")
+
+    def __init__(self, profile):
+        self.path = None
+        self.profile = profile
+        self.started = time.monotonic()
+        self.buffer = []
+        self.profiles = []
+        self.totals = {}
+        self.file = None
+
+
+def start(profile: bool = False):
+    """
+    Begin collecting metrics for a run (replaces any previous run).
+    """
+    global _state
+    with _lock:
+        if _state is not None and _state.file is not None:
+            _state.file.close()
+            _state.file = None
+        _state = _RunState(profile)
+
+
+def attach(path: str):
+    """
+    Write metrics to `path` (JSON lines), flushing anything recorded so far.
+    """
+    with _lock:
+        if _state is None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        _state.path = path
+        _state.file = open(path, "a", encoding="utf-8")
+        for line in _state.buffer:
+            _state.file.write(line)
+        _state.file.flush()
+        _state.buffer = []
+        profiles, _state.profiles = _state.profiles, []
+
+    for name, profiler in profiles:
+        _dump_profile(name, profiler)
+
+
+def enabled() -> bool:
+    return _state is not None
+
+
+def record(event: str, **fields):
+    """
+    Append one event. `t` is seconds since `start()`.
+    """
+    state = _state
+    if state is None:
+        return
+
+    entry = {
+        "event": event,
+        "t": round(time.monotonic() - state.started, 4),
+        "thread": threading.current_thread().name
+    }
+    entry.update(fields)
+    line = json.dumps(entry, default=str, ensure_ascii=False) + "\n"
+
+    with _lock:
+        if state.file is not None:
+            state.file.write(line)
+            state.file.flush()
+        else:
+            state.buffer.append(line)
+
+
+def _add_total(kind: str, name: str, seconds: float):
+    with _lock:
+        if _state is None:
+            return
+        total = _state.totals.setdefault(kind, {}).setdefault(name, {"count": 0, "seconds": 0.0})
+        total["count"] += 1
+        total["seconds"] += seconds
+
+
+@contextmanager
+def timed(stage: str, **fields):
+    """
+    Time a block as a "stage" event (wall and CPU seconds, status ok or
+    error). Nested blocks are recorded too; only the outermost one in a
+    thread is profiled.
+    """
+    state = _state
+    if state is None:
+        yield
+        return
+
+    profiler = None
+    if state.profile and not getattr(_local, "profiling", False):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            _local.profiling = True
+        except ValueError:  # another profiler owns this thread
+            profiler = None
+
+    status = "ok"
+    wall = time.perf_counter()
+    cpu = time.thread_time()
+    try:
+        yield
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        cpu = time.thread_time() - cpu
+        wall = time.perf_counter() - wall
+        if profiler is not None:
+            profiler.disable()
+            _local.profiling = False
+
+        record("stage", stage=stage, seconds=round(wall, 4), cpu_seconds=round(cpu, 4), status=status, **fields)
+        _add_total("stages", stage, wall)
+
+        if profiler is not None:
+            with _lock:
+                pending = state.path is None
+                if pending:
+                    state.profiles.append((stage, profiler))
+            if not pending:
+                _dump_profile(stage, profiler)
+
+
+def record_http(provider: str, method: str, url: str, status, seconds: float, attempt: int = 0):
+    """
+    One outbound HTTP attempt (status None = connection error).
+    """
+    if _state is None:
+        return
+    record("http", provider=provider, method=method, url=url, status=status,
+           seconds=round(seconds, 4), attempt=attempt)
+    _add_total("http", provider, seconds)
+
+
+def _profile_name(stage: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", stage)
+
+
+def _dump_profile(stage: str, profiler):
+    state = _state
+    if state is None or state.path is None:
+        return
+
+    directory = os.path.join(os.path.dirname(os.path.abspath(state.path)), "profile")
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, _profile_name(stage))
+
+    # Stages can run more than once (retries, several brands)
+    with _profile_lock:
+        n = 1
+        path = base
+        while os.path.exists(f"{path}.prof"):
+            n += 1
+            path = f"{base}.{n}"
+        profiler.dump_stats(f"{path}.prof")
+
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+    with open(f"{path}.txt", "w", encoding="utf-8") as f:
+        f.write(out.getvalue())
+
+
+def summary() -> dict:
+    """
+    Totals so far: {"stages": {name: {"count", "seconds"}}, "http": {provider: ...}}.
+    """
+    with _lock:
+        if _state is None:
+            return {}
+        return {kind: {name: dict(t) for name, t in totals.items()} for kind, totals in _state.totals.items()}
+
+
+def stop(**fields):
+    """
+    Write a closing "summary" event (totals plus `fields`, e.g. HTTP and
+    LLM usage stats) and end the run.
+    """
+    global _state
+    if _state is None:
+        return
+    record("summary", seconds=round(time.monotonic() - _state.started, 4), totals=summary(), **fields)
+
+    with _lock:
+        state, _state = _state, None
+        if state.file is not None:
+            state.file.close()
+            state.file = None
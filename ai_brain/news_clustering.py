@@ -0,0 +1,144 @@
+from urllib.parse import urlsplit
+
+from ai_brain.config import NEWS_CLUSTER_THRESHOLD
+from ai_brain.text_similarity import token_set, jaccard, minhash, lsh_bands
+
+# 64 permutations in 32 bands of 2 rows: pairs at Jaccard 0.5 become LSH
+# candidates with ~99.99% probability; candidates are then checked exactly.
+NUM_PERM = 64
+NUM_BANDS = 32
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form for exact-duplicate checks: no scheme, "www.", tracking
+    params, fragment or trailing slash.
+    """
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip().lower()
+
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+
+    query = "&".join(
+        p for p in parts.query.split("&")
+        if p and not p.lower().startswith("utm_")
+    )
+    path = parts.path.rstrip("/")
+
+    return f"{host}{path}?{query}" if query else f"{host}{path}"
+
+
+class NewsClusterer:
+    """
+    Incremental near-duplicate clustering of NewsItem signals.
+
+    Exact URL duplicates collapse first. Otherwise an item joins a cluster
+    when its title tokens reach `threshold` Jaccard similarity with the
+    cluster representative, or its snippet does while the titles still
+    overlap by half that. MinHash LSH over titles keeps each lookup to a
+    handful of candidates. The first item of each cluster is its
+    representative and carries a "cluster_size" count; `members` lists
+    each cluster's items, representative first.
+    """
+
+    def __init__(self, threshold: float = NEWS_CLUSTER_THRESHOLD):
+        self.threshold = threshold
+        self._by_url = {}
+        self._by_band = {}
+        self._titles = []
+        self._snippets = []
+        self.representatives = []
+        self.members = []
+
+    def add(self, item) -> bool:
+        """
+        Add an item. Returns True if it starts a new cluster, False if it
+        was folded into an existing one.
+        """
+        url = normalize_url(item.url)
+        rep = self._by_url.get(url) if url else None
+
+        title = token_set(item.title)
+        snippet = token_set(item.snippet)
+        bands = lsh_bands(minhash(title, NUM_PERM), NUM_BANDS) if title else []
+
+        if rep is None:
+            rep = self._find_near(title, snippet, bands)
+
+        if rep is not None:
+            self.representatives[rep].cluster_size += 1
+            self.members[rep].append(item)
+            if url:
+                self._by_url.setdefault(url, rep)
+            return False
+
+        index = len(self.representatives)
+        item.cluster_size = 1
+        self.representatives.append(item)
+        self.members.append([item])
+        self._titles.append(title)
+        self._snippets.append(snippet)
+
+        if url:
+            self._by_url[url] = index
+        for band in bands:
+            self._by_band.setdefault(band, []).append(index)
+
+        return True
+
+    def _find_near(self, title, snippet, bands):
+        checked = set()
+        for band in bands:
+            for index in self._by_band.get(band, ()):
+                if index in checked:
+                    continue
+                checked.add(index)
+
+                title_sim = jaccard(title, self._titles[index])
+                if title_sim >= self.threshold:
+                    return index
+                if (title_sim >= self.threshold / 2
+                        and jaccard(snippet, self._snippets[index]) >= self.threshold):
+                    return index
+        return None
+
+
+def cluster_news(news_items, threshold: float = NEWS_CLUSTER_THRESHOLD):
+    """
+    Collapse duplicate and near-duplicate news signals, keeping input order.
+    Returns one representative per cluster with a "cluster_size" count.
+    """
+    clusterer = NewsClusterer(threshold)
+    for item in news_items:
+        clusterer.add(item)
+    return clusterer.representatives
+
+
+def cluster_members(news_items, representatives, threshold: float = NEWS_CLUSTER_THRESHOLD):
+    """
+    The signals `representatives` stand for: every item of `news_items`
+    in their clusters, re-clustered the way `cluster_news` did (same input
+    order, same threshold). Representatives are matched by title and URL,
+    so checkpointed copies work too. The input items are left untouched.
+    """
+    wanted = {(item.title, item.url) for item in representatives}
+    if not wanted:
+        return []
+
+    clusterer = NewsClusterer(threshold)
+    original = {}
+    for item in news_items:
+        # Clustering sets cluster_size, so it runs on copies
+        clone = type(item).from_dict(item.to_dict())
+        original[id(clone)] = item
+        clusterer.add(clone)
+
+    members = []
+    for cluster in clusterer.members:
+        if (cluster[0].title, cluster[0].url) in wanted:
+            members.extend(original[id(clone)] for clone in cluster)
+    return members
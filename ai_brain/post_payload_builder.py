@@ -1,5 +1,7 @@
 from datetime import datetime
 
+from ai_brain.records import SlidePayload
+
 VISUAL_MAPPING = {
     "platform": "bold, platform-branded",
     "ads": "performance-focused, data-led",
@@ -24,15 +26,15 @@ def build_post_payload(pipeline_output):
     
     items = []
     for item in approved:
-        category = item.get("category", "platform")
-        items.append({
-            "entity": item.get("entity", ""),
-            "category": category,
-            "headline": item.get("summary", ""),
-            "subheadline": item.get("marketer_impact", ""),
-            "visual_direction": VISUAL_MAPPING.get(category, VISUAL_MAPPING["platform"]),
-            "platform": "instagram"
-        })
+        category = item.category or "platform"
+        items.append(SlidePayload(
+            entity=item.entity,
+            category=category,
+            headline=item.summary,
+            subheadline=item.marketer_impact,
+            visual_direction=VISUAL_MAPPING.get(category, VISUAL_MAPPING["platform"]),
+            platform="instagram"
+        ))
     
     return {
         "publish_date": datetime.utcnow().strftime("%Y-%m-%d"),
@@ -0,0 +1,197 @@
+import math
+import re
+from urllib.parse import urlsplit
+
+from ai_brain.config import PREGATE_THRESHOLD
+from ai_brain.source_filter import domain_set, host_suffixes
+from ai_brain.text_similarity import token_set, jaccard
+from ai_brain.token_budget import estimate_tokens
+from ai_brain.trend_fetcher import ALLOWED_DOMAINS
+
+# Below this many past verdicts the term model stays off
+MIN_HISTORY = 20
+
+# Terms seen fewer times than this carry no weight
+MIN_TERM_COUNT = 2
+
+# Term log-odds are clipped to +/- this, so one title can't dominate
+MAX_TERM_SCORE = 3.0
+
+# Pseudo-verdicts pulling a domain's approval rate towards the global one
+DOMAIN_PRIOR_STRENGTH = 5.0
+
+# Score penalties
+UNLISTED_DOMAIN_PENALTY = 1.0
+LISTICLE_PENALTY = 2.0
+POSTED_SIMILARITY_WEIGHT = 3.0
+
+# With a history index, similarities below this count as 0
+POSTED_SIMILARITY_FLOOR = 0.2
+
+# Completion tokens the gate spends on one rejected verdict
+REJECT_VERDICT_TOKENS = 30
+
+LISTICLE_RE = re.compile(
+    r"\b(?:top \d+|\d+ (?:ways|things|reasons|takeaways|trends)|recap|round-?up"
+    r"|week in review|this week in|everything (?:you need to know|we know)|predictions?)\b",
+    re.IGNORECASE
+)
+
+
+def _logit(p: float) -> float:
+    return math.log(p / (1.0 - p))
+
+
+class PregateScorer:
+    """
+    Cheap, deterministic relevance score run before the editorial gate.
+
+    score = term log-odds (learned from past approve/reject verdicts)
+          + domain prior (per ALLOWED_DOMAINS entry, smoothed by history)
+          - listicle/recap penalty
+          - similarity to already posted titles
+
+    Items scoring below `threshold` are rejected locally as "low_impact".
+    Without history the score is 0 for a clean, listed source, so only
+    recaps, unlisted sources and near-copies of posted titles drop.
+    """
+
+    def __init__(self, term_weights=None, domain_weights=None, posted_titles=(),
+                 threshold: float = PREGATE_THRESHOLD, allow_domains=ALLOWED_DOMAINS,
+                 history_index=None):
+        self.term_weights = dict(term_weights or {})
+        self.domain_weights = dict(domain_weights or {})
+        self.threshold = threshold
+        self._allow = domain_set(allow_domains)
+        self._history = history_index
+        self._posted = [] if history_index is not None else [
+            t for t in (token_set(p) for p in posted_titles or []) if t
+        ]
+
+        self.scored = 0
+        self.rejected = 0
+        self.tokens_saved = 0
+
+    @classmethod
+    def from_history(cls, verdicts, posted_titles=(), threshold: float = PREGATE_THRESHOLD,
+                     allow_domains=ALLOWED_DOMAINS, history_index=None):
+        """
+        Fit term and domain weights from verdict-cache entries
+        ({"verdict", "item", "title", "url"}). Posted-title similarity uses
+        `history_index` (a HistoryIndex) when given, else `posted_titles`.
+        """
+        allow = domain_set(allow_domains)
+        approved_docs = 0
+        rejected_docs = 0
+        term_counts = {}
+        domain_counts = {}
+
+        for entry in verdicts:
+            if not isinstance(entry, dict) or "verdict" not in entry:
+                continue
+            item = entry.get("item") or {}
+            title = entry.get("title") or item.get("title") or ""
+            url = entry.get("url") or item.get("url") or ""
+            approved = entry["verdict"] == "approved"
+
+            if approved:
+                approved_docs += 1
+            else:
+                rejected_docs += 1
+
+            for term in token_set(title):
+                counts = term_counts.setdefault(term, [0, 0])
+                counts[0 if approved else 1] += 1
+
+            domain = _listed_domain(url, allow)
+            if domain:
+                counts = domain_counts.setdefault(domain, [0, 0])
+                counts[0 if approved else 1] += 1
+
+        total = approved_docs + rejected_docs
+        term_weights = {}
+        domain_weights = {}
+
+        if total >= MIN_HISTORY:
+            # Bernoulli naive Bayes log-odds per term, Laplace-smoothed
+            for term, (a, r) in term_counts.items():
+                if a + r >= MIN_TERM_COUNT:
+                    term_weights[term] = (
+                        math.log((a + 1) / (approved_docs + 2))
+                        - math.log((r + 1) / (rejected_docs + 2))
+                    )
+
+            base = (approved_docs + 1) / (total + 2)
+            for domain, (a, r) in domain_counts.items():
+                rate = (a + DOMAIN_PRIOR_STRENGTH * base) / (a + r + DOMAIN_PRIOR_STRENGTH)
+                domain_weights[domain] = _logit(rate) - _logit(base)
+
+        return cls(term_weights, domain_weights, posted_titles, threshold, allow_domains, history_index)
+
+    def score(self, item) -> float:
+        title = item.get("title", "") or ""
+        tokens = token_set(title)
+
+        term = sum(self.term_weights.get(t, 0.0) for t in tokens)
+        score = max(-MAX_TERM_SCORE, min(MAX_TERM_SCORE, term))
+
+        domain = _listed_domain(item.get("url", "") or "", self._allow)
+        if domain is None:
+            score -= UNLISTED_DOMAIN_PENALTY
+        else:
+            score += self.domain_weights.get(domain, 0.0)
+
+        if LISTICLE_RE.search(title):
+            score -= LISTICLE_PENALTY
+
+        if self._history is not None:
+            match = self._history.nearest(title, threshold=POSTED_SIMILARITY_FLOOR)
+            if match:
+                score -= POSTED_SIMILARITY_WEIGHT * match[1]
+        elif self._posted and tokens:
+            score -= POSTED_SIMILARITY_WEIGHT * max(jaccard(tokens, p) for p in self._posted)
+
+        return score
+
+    def check(self, item) -> bool:
+        """
+        True if the item should go to the gate. Rejections count towards
+        `rejected` and `tokens_saved`.
+        """
+        self.scored += 1
+        if self.score(item) >= self.threshold:
+            return True
+
+        self.rejected += 1
+        self.tokens_saved += _prompt_tokens(item)
+        return False
+
+    def stats(self) -> dict:
+        return {
+            "scored": self.scored,
+            "rejected": self.rejected,
+            "tokens_saved": self.tokens_saved
+        }
+
+
+def _listed_domain(url: str, allow):
+    """
+    The ALLOWED_DOMAINS entry a URL falls under (most specific first),
+    or None.
+    """
+    try:
+        host = (urlsplit(url).hostname or "").lower().rstrip(".")
+    except ValueError:
+        return None
+    for suffix in host_suffixes(host):
+        if suffix in allow:
+            return suffix
+    return None
+
+
+def _prompt_tokens(item) -> int:
+    """
+    Estimated gate tokens one item costs: its prompt line plus its verdict.
+    """
+    line = f"- [00] {item.get('title', '')} ({item.get('source', '')})"
+    return estimate_tokens(line) + REJECT_VERDICT_TOKENS
@@ -0,0 +1,151 @@
+"""
+Compact record types for items moving through the pipeline.
+
+NewsItem (raw SERP signal) → ApprovedItem (editorial gate output) →
+SlidePayload (slide-ready content). Each is validated once where it enters
+the pipeline (`from_serp`, `from_llm`, ...), uses __slots__ to stay small
+when thousands are held in memory, and keeps a read-only `get()` so code
+written against the old dicts keeps working.
+"""
+from ai_brain.utils import normalize_date
+
+CATEGORIES = ("platform", "ads", "seo", "privacy", "commerce", "creator_monetization")
+
+
+def _text(value) -> str:
+    if value is None:
+        return ""
+    return " ".join(str(value).split())
+
+
+class _Record:
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name, self._default(name)))
+
+    @staticmethod
+    def _default(name):
+        return ""
+
+    def get(self, key, default=None):
+        if key in self.__slots__:
+            return getattr(self, key)
+        return default
+
+    def __getitem__(self, key):
+        if key in self.__slots__:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    # Records are mutable (cluster_size, title/url links), so they compare
+    # by value but are deliberately unhashable, like the dicts they replace
+    __hash__ = None
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={getattr(self, k)!r}" for k in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """
+        Rebuild a record from `to_dict()` output (e.g. a JSON checkpoint).
+        """
+        return cls(**{k: data[k] for k in cls.__slots__ if k in data})
+
+
+class NewsItem(_Record):
+    """
+    A raw news signal from trend_fetcher.
+    """
+    __slots__ = ("entity", "title", "snippet", "source", "url", "published_at", "query", "cluster_size")
+
+    @staticmethod
+    def _default(name):
+        return 1 if name == "cluster_size" else ""
+
+    @classmethod
+    def from_serp(cls, raw: dict, query: str = ""):
+        """
+        Build from a SerpAPI `news_results` entry. Returns None if the
+        entry has no title or link.
+        """
+        title = _text(raw.get("title"))
+        url = str(raw.get("link") or "").strip()
+        if not title or not url:
+            return None
+
+        source = _text(raw.get("source"))
+        if isinstance(raw.get("source"), dict):
+            source = _text(raw["source"].get("name"))
+
+        return cls(
+            entity=source.split()[0] if source else "",
+            title=title,
+            snippet=_text(raw.get("snippet")),
+            source=source,
+            url=url,
+            published_at=_text(raw.get("date")),
+            query=query
+        )
+
+    @property
+    def published(self):
+        """
+        published_at as a naive UTC datetime (None if unknown). Parsing is
+        cached per distinct date string.
+        """
+        return normalize_date(self.published_at)
+
+
+class ApprovedItem(_Record):
+    """
+    An item approved by the editorial gate (or a Market Insight filler).
+    title/url point at the source article, empty for insights.
+    """
+    __slots__ = ("entity", "category", "summary", "marketer_impact", "confidence", "title", "url")
+
+    @classmethod
+    def from_llm(cls, data):
+        """
+        Validate one `approved` object from the LLM. Returns None if it is
+        not an object or has no summary; unknown categories fall back to
+        "platform".
+        """
+        if not isinstance(data, dict):
+            return None
+
+        summary = _text(data.get("summary"))
+        if not summary:
+            return None
+
+        category = _text(data.get("category")).lower()
+        if category not in CATEGORIES:
+            category = "platform"
+
+        return cls(
+            entity=_text(data.get("entity")),
+            category=category,
+            summary=summary,
+            marketer_impact=_text(data.get("marketer_impact")),
+            confidence=_text(data.get("confidence")) or "confirmed"
+        )
+
+
+class SlidePayload(_Record):
+    """
+    Slide-ready content for one news/insight slide.
+    """
+    __slots__ = ("entity", "category", "headline", "subheadline", "visual_direction", "platform")
@@ -0,0 +1,189 @@
+"""
+Long-lived HTTP render service, so n8n doesn't pay Python/PIL start-up,
+.env loading, font discovery and background decoding on every carousel.
+
+    POST /run           run the pipeline and render a carousel
+                        {"run_id"?: str, "brand"?: name in BRANDS_FILE}
+    POST /render/slide  render one slide and return it as PNG
+                        {"type": "cover" | "news" | "insight" | "cta",
+                         "slide_num"?: 2-4, "headline"?, "insight"?,
+                         "brand"?: name in BRANDS_FILE}
+    POST /jobs          queue a run for the job workers (ai_brain.job_queue)
+                        {"kind"?: "carousel" | "batch", "brand"?, "brands"?},
+                        Idempotency-Key header or "idempotency_key"
+    GET  /jobs/<id>     job status and result
+    GET  /health        liveness, uptime and asset cache state
+    GET  /metrics       stage/HTTP timings, LLM usage, cache hit rates
+
+Fonts, backgrounds and logos stay decoded in memory (yoi_templates
+caches) and are warmed at start-up. Requests only name brands from
+BRANDS_FILE, never file paths. Run with:
+
+    python -m ai_brain.render_service
+    gunicorn -w 2 --threads 4 --preload "ai_brain.render_service:create_app()"
+"""
+import io
+import os
+import re
+import time
+
+from flask import Flask, jsonify, request, send_file
+
+from ai_brain import http_client, job_queue, metrics
+from ai_brain.brand_batch import BrandProfile, load_brand_profiles, run_carousel, new_batch_id
+from ai_brain.config import (
+    OUTPUT_DIR,
+    BRANDS_FILE,
+    RENDER_SERVICE_HOST,
+    RENDER_SERVICE_PORT,
+    RENDER_PNG_COMPRESS_LEVEL,
+)
+from ai_brain.token_budget import usage_summary
+from ai_brain.yoi_templates import render_cover, render_news_slide, render_cta, warm_caches, cache_stats
+
+SLIDE_TYPES = ("cover", "news", "insight", "cta")
+
+# run_id names the run folder
+RUN_ID_RE = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+class RequestError(ValueError):
+    pass
+
+
+def _load_brands():
+    if not os.path.exists(BRANDS_FILE):
+        return {}
+    return {brand.name: brand for brand in load_brand_profiles(BRANDS_FILE)}
+
+
+def _brand(payload, brands):
+    name = payload.get("brand")
+    if not name:
+        return BrandProfile.default()
+    if name not in brands:
+        raise RequestError(f"Unknown brand: {name}")
+    return brands[name]
+
+
+def _render_slide(payload, brand):
+    slide_type = payload.get("type")
+    if slide_type not in SLIDE_TYPES:
+        raise RequestError(f"type must be one of {', '.join(SLIDE_TYPES)}")
+
+    if slide_type == "cover":
+        return render_cover(brand.logo_path, backgrounds=brand.backgrounds)
+    if slide_type == "cta":
+        return render_cta(brand.logo_path, backgrounds=brand.backgrounds, cta=brand.cta)
+
+    headline = str(payload.get("headline") or "").strip()
+    insight = str(payload.get("insight") or payload.get("subheadline") or "").strip()
+    if not headline:
+        raise RequestError("headline is required for news slides")
+    try:
+        slide_num = int(payload.get("slide_num", 2))
+    except (TypeError, ValueError):
+        raise RequestError("slide_num must be an integer")
+    if not 2 <= slide_num <= 4:
+        raise RequestError("slide_num must be between 2 and 4")
+
+    return render_news_slide(slide_num, headline, insight, brand.logo_path, backgrounds=brand.backgrounds)
+
+
+def create_app():
+    """
+    Build the service app: load brands, open the service metrics file and
+    warm the asset caches. Importing the module does none of this.
+    """
+    app = Flask(__name__)
+    started = time.time()
+    brands = _load_brands()
+
+    # Service-wide metrics file; per-run files are for the CLI entry points
+    metrics.start()
+    metrics.attach(os.path.join(OUTPUT_DIR, "render_service", "metrics.jsonl"))
+
+    with metrics.timed("service.warm_caches"):
+        assets_ok = warm_caches()
+        for brand in brands.values():
+            assets_ok = warm_caches(brand.logo_path, brand.backgrounds) and assets_ok
+
+    @app.errorhandler(RequestError)
+    def bad_request(e):
+        return jsonify({"error": str(e)}), 400
+
+    @app.get("/health")
+    def health():
+        return jsonify({
+            "status": "ok",
+            "uptime": round(time.time() - started, 1),
+            "assets_loaded": assets_ok,
+            "brands": sorted(brands),
+            "caches": cache_stats()
+        })
+
+    @app.get("/metrics")
+    def service_metrics():
+        return jsonify({
+            "timings": metrics.summary(),
+            "http": http_client.get_stats(),
+            "llm": usage_summary(),
+            "caches": cache_stats()
+        })
+
+    @app.post("/render/slide")
+    def render_slide():
+        payload = request.get_json(silent=True) or {}
+        brand = _brand(payload, brands)
+
+        with metrics.timed("service.render_slide", slide=payload.get("type"), brand=brand.name):
+            img = _render_slide(payload, brand)
+            out = io.BytesIO()
+            img.save(out, "PNG", compress_level=RENDER_PNG_COMPRESS_LEVEL)
+        out.seek(0)
+        return send_file(out, mimetype="image/png")
+
+    @app.post("/run")
+    def run():
+        payload = request.get_json(silent=True) or {}
+        brand = _brand(payload, brands)
+        run_id = str(payload.get("run_id") or new_batch_id())
+        if not RUN_ID_RE.fullmatch(run_id):
+            raise RequestError("run_id may only contain letters, digits, '-' and '_'")
+
+        with metrics.timed("service.run", run_id=run_id, brand=brand.name):
+            result = run_carousel(run_id, os.path.join(OUTPUT_DIR, f"static_run_{run_id}"), brand)
+        return jsonify(result), 500 if result["status"] == "error" else 200
+
+    @app.post("/jobs")
+    def submit_job():
+        payload = request.get_json(silent=True) or {}
+        kind = payload.get("kind") or "carousel"
+        if kind not in job_queue.HANDLERS:
+            raise RequestError(f"kind must be one of {', '.join(job_queue.HANDLERS)}")
+
+        if kind == "batch":
+            names = [str(name) for name in payload.get("brands") or []]
+            unknown = [name for name in names if name not in brands]
+            if unknown:
+                raise RequestError(f"Unknown brands: {unknown}")
+            job_payload = {"brands": names}
+        else:
+            job_payload = {"brand": _brand(payload, brands).name} if payload.get("brand") else {}
+
+        key = request.headers.get("Idempotency-Key") or payload.get("idempotency_key")
+        job, created = job_queue.submit(kind, job_payload, idempotency_key=str(key) if key else None)
+        return jsonify(job), 202 if created else 200
+
+    @app.get("/jobs/<job_id>")
+    def job_status(job_id):
+        job = job_queue.get_job(job_id)
+        if job is None:
+            return jsonify({"error": f"Unknown job: {job_id}"}), 404
+        return jsonify(job)
+
+    return app
+
+
+if __name__ == "__main__":
+    create_app().run(host=RENDER_SERVICE_HOST, port=RENDER_SERVICE_PORT, threaded=True)
@@ -0,0 +1,129 @@
+import re
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+from ai_brain.utils import normalize_date
+
+
+class FilterRules:
+    """
+    Declarative SERP filter rules.
+
+    allow_domains: hosts (and their subdomains) a link must come from
+    deny_domains: hosts (and their subdomains) that are always rejected
+    reject_phrases: case-insensitive phrases that mark a title as fluff
+    max_age_days: drop items published earlier than this
+    """
+
+    def __init__(self, allow_domains=(), deny_domains=(), reject_phrases=(), max_age_days: int = 3):
+        self.allow_domains = list(allow_domains)
+        self.deny_domains = list(deny_domains)
+        self.reject_phrases = list(reject_phrases)
+        self.max_age_days = max_age_days
+
+
+def domain_set(domains):
+    """
+    Normalized lookup set for a domain list (lower case, no leading dot).
+    """
+    return frozenset(d.lower().strip().lstrip(".") for d in domains if d.strip())
+
+
+def host_suffixes(host: str):
+    """
+    "a.b.example.com" -> "a.b.example.com", "b.example.com", "example.com", "com"
+    """
+    labels = host.split(".")
+    return (".".join(labels[i:]) for i in range(len(labels)))
+
+
+def is_recent(date_str: str, days: int = 3) -> bool:
+    if not date_str:
+        return False
+    published = normalize_date(date_str)
+    if published is None:
+        return True  # Unknown SERP date format, don't hard-fail
+    return published >= datetime.utcnow() - timedelta(days=days)
+
+
+class SourceFilter:
+    """
+    FilterRules compiled for fast batch evaluation.
+
+    Domains are matched on the parsed URL host against hashed suffix sets,
+    so "instagram.com" allows "about.instagram.com" but not
+    "notinstagram.com" or "instagram.com.example.net". All reject phrases
+    are folded into one regex, so adding phrases doesn't add passes.
+    """
+
+    def __init__(self, rules: FilterRules):
+        self.rules = rules
+        self._allow = domain_set(rules.allow_domains)
+        self._deny = domain_set(rules.deny_domains)
+
+        phrases = sorted({p.lower() for p in rules.reject_phrases if p}, key=len, reverse=True)
+        self._phrases = (
+            re.compile("|".join(re.escape(p) for p in phrases), re.IGNORECASE)
+            if phrases else None
+        )
+
+    def allows_url(self, url: str) -> bool:
+        try:
+            host = (urlsplit(url).hostname or "").lower()
+        except ValueError:
+            return False
+        if not host:
+            return False
+
+        suffixes = list(host_suffixes(host.rstrip(".")))
+        if self._deny and any(s in self._deny for s in suffixes):
+            return False
+        if not self._allow:
+            return True
+        return any(s in self._allow for s in suffixes)
+
+    def is_fluff(self, title: str) -> bool:
+        return bool(self._phrases and self._phrases.search(title))
+
+    def is_recent(self, date_str: str) -> bool:
+        return is_recent(date_str, self.rules.max_age_days)
+
+    def check(self, title: str, url: str, date_str: str):
+        """
+        Return None if the item passes, else the rejection reason:
+        "fluff" | "source" | "stale".
+        """
+        if self.is_fluff(title):
+            return "fluff"
+        if not self.allows_url(url):
+            return "source"
+        if not self.is_recent(date_str):
+            return "stale"
+        return None
+
+    def evaluate(self, news_results):
+        """
+        Evaluate a batch of raw SERP news results.
+
+        Returns (accepted, rejected) where rejected is a list of
+        (item, reason) pairs. Items without a title or link are rejected
+        as "incomplete".
+        """
+        accepted = []
+        rejected = []
+
+        for item in news_results:
+            title = item.get("title", "").strip()
+            link = item.get("link", "")
+
+            if not title or not link:
+                rejected.append((item, "incomplete"))
+                continue
+
+            reason = self.check(title, link, item.get("date", ""))
+            if reason:
+                rejected.append((item, reason))
+            else:
+                accepted.append(item)
+
+        return accepted, rejected
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+
+from ai_brain import metrics
+
+logger = logging.getLogger("stage_executor")
+
+_MISSING = object()
+
+
+def _digest(value) -> str:
+    data = json.dumps(value, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+
+class Stage:
+    __slots__ = ("name", "fn", "deps", "key", "persist", "dump", "load", "keep")
+
+    def __init__(self, name, fn, deps=(), key=None, persist=True, dump=None, load=None, keep=None):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.key = key
+        self.persist = persist
+        self.dump = dump
+        self.load = load
+        self.keep = keep
+
+
+class StageExecutor:
+    """
+    Runs a small graph of named stages, checkpointing each output to
+    `<run_dir>/stages/<name>.json`.
+
+    A stage is called with its dependencies' outputs as keyword arguments.
+    Its checkpoint is keyed by its own `key` (JSON-serializable inputs such
+    as the day or the query list) plus the digests of its dependencies'
+    outputs, so re-running a run folder reuses every stage whose inputs
+    are unchanged and resumes at the first one that is missing or stale.
+    Stages whose dependencies are done run in parallel.
+
+    `dump`/`load` convert outputs to and from JSON (e.g. records via
+    to_dict/from_dict). `keep(output)` returning False runs the stage
+    without checkpointing that output (e.g. a failed gate call). Stages
+    with persist=False (local, cheap, not serializable) always run.
+    Without a run_dir nothing is persisted.
+
+    Each stage is timed into the run metrics as "<name>.<stage>", with
+    `tags` (e.g. the run ID) added to its events.
+    """
+
+    def __init__(self, run_dir=None, max_workers: int = 4, name: str = None, tags=None):
+        self.run_dir = Path(run_dir) if run_dir else None
+        self.max_workers = max_workers
+        self.name = name
+        self.tags = dict(tags or {})
+        self.stages = {}
+        self.status = {}  # name -> "cached" | "ran"
+
+    def add(self, name, fn, deps=(), key=None, persist=True, dump=None, load=None, keep=None):
+        """
+        Declare a stage. Dependencies must be declared first, so the graph
+        can't have cycles.
+        """
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"Stage {name} depends on undeclared stage {dep}")
+        self.stages[name] = Stage(name, fn, deps, key, persist, dump, load, keep)
+        return self
+
+    def _metric(self, stage) -> str:
+        return f"{self.name}.{stage.name}" if self.name else stage.name
+
+    def _call(self, stage, kwargs):
+        with metrics.timed(self._metric(stage), **self.tags):
+            return stage.fn(**kwargs)
+
+    def _path(self, name: str) -> Path:
+        return self.run_dir / "stages" / f"{name}.json"
+
+    def _stage_key(self, stage, digests) -> str:
+        return _digest({
+            "stage": stage.name,
+            "key": stage.key,
+            "deps": {dep: digests[dep] for dep in stage.deps}
+        })
+
+    def _checkpointed(self, stage) -> bool:
+        return self.run_dir is not None and stage.persist
+
+    def _load(self, stage, key):
+        """
+        (output, digest) from a matching checkpoint, or _MISSING.
+        """
+        if not self._checkpointed(stage):
+            return _MISSING
+        try:
+            with open(self._path(stage.name), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return _MISSING
+
+        if entry.get("key") != key:
+            return _MISSING
+
+        value = entry.get("output")
+        output = stage.load(value) if stage.load else value
+        return output, entry.get("digest") or _digest(value)
+
+    def _save(self, stage, key, output) -> str:
+        """
+        Checkpoint an output; returns its digest (the stage key for
+        unpersisted stages, which only depends on their inputs).
+        """
+        if not self._checkpointed(stage):
+            return key
+
+        value = stage.dump(output) if stage.dump else output
+        digest = _digest(value)
+        if stage.keep is not None and not stage.keep(output):
+            return digest
+
+        path = self._path(stage.name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"stage": stage.name, "key": key, "digest": digest, "output": value}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        return digest
+
+    def run(self) -> dict:
+        """
+        Run (or restore) every stage; returns {name: output}. If a stage
+        raises, stages already running finish and are checkpointed, then
+        the first error is re-raised.
+        """
+        results = {}
+        digests = {}
+        pending = list(self.stages.values())
+        running = {}
+        error = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while pending or running:
+                progressed = False
+                for stage in list(pending):
+                    if error is not None or not all(dep in results for dep in stage.deps):
+                        continue
+                    pending.remove(stage)
+                    key = self._stage_key(stage, digests)
+
+                    restored = self._load(stage, key)
+                    if restored is not _MISSING:
+                        results[stage.name], digests[stage.name] = restored
+                        self.status[stage.name] = "cached"
+                        logger.info("Stage %s: reused checkpoint", stage.name)
+                        metrics.record("stage", stage=self._metric(stage), seconds=0.0, status="cached", **self.tags)
+                        progressed = True
+                        continue
+
+                    kwargs = {dep: results[dep] for dep in stage.deps}
+                    running[pool.submit(self._call, stage, kwargs)] = (stage, key)
+
+                if error is not None and not running:
+                    break
+                if progressed and not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, key = running.pop(future)
+                    try:
+                        output = future.result()
+                    except Exception as e:
+                        logger.warning("Stage %s failed: %s", stage.name, e)
+                        error = error or e
+                        continue
+                    results[stage.name] = output
+                    digests[stage.name] = self._save(stage, key, output)
+                    self.status[stage.name] = "ran"
+
+        if error is not None:
+            raise error
+        return results
@@ -0,0 +1,82 @@
+import hashlib
+import random
+import re
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in into is it its new now of on or
+our the their this to with will you your
+""".split())
+
+
+def _stem(token: str) -> str:
+    # Plural folding only: "reels" -> "reel", "minutes" -> "minute"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str):
+    """
+    Lowercased alphanumeric tokens, stopwords removed, plurals folded.
+    """
+    return [_stem(t) for t in _TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+def token_set(text: str) -> frozenset:
+    return frozenset(tokenize(text))
+
+
+def jaccard(a, b) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def stable_hash32(feature: str) -> int:
+    """
+    Process-independent 32-bit hash (Python's hash() is salted per run).
+    """
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=4).digest(), "big")
+
+
+def _permutations(num_perm: int):
+    rng = random.Random(num_perm)
+    return [
+        (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+        for _ in range(num_perm)
+    ]
+
+
+_PERMUTATIONS = {}
+
+
+def minhash(features, num_perm: int = 64):
+    """
+    MinHash signature of a feature set. The fraction of equal positions in
+    two signatures estimates the Jaccard similarity of the sets.
+    """
+    perms = _PERMUTATIONS.get(num_perm)
+    if perms is None:
+        perms = _PERMUTATIONS[num_perm] = _permutations(num_perm)
+
+    hashes = [stable_hash32(f) for f in set(features)]
+    if not hashes:
+        return (_MAX_HASH,) * num_perm
+
+    return tuple(
+        min((a * h + b) % _MERSENNE_PRIME & _MAX_HASH for h in hashes)
+        for a, b in perms
+    )
+
+
+def lsh_bands(signature, bands: int):
+    """
+    Split a signature into `bands` hashable (index, rows) keys. Signatures
+    sharing any key are LSH candidates.
+    """
+    rows = len(signature) // bands
+    return [(i, signature[i * rows:(i + 1) * rows]) for i in range(bands)]
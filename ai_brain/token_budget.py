@@ -0,0 +1,155 @@
+import math
+import re
+import threading
+from collections import deque
+
+from ai_brain.config import PROMPT_TOKEN_BUDGET, USAGE_LOG_MAX_ENTRIES
+
+_WORD_RE = re.compile(r"\w+|[^\w\s]")
+
+# Compaction keeps at least this many of the most recent history lines
+# until everything else has been trimmed
+HISTORY_FLOOR = 10
+
+# Snippets are cut to these lengths (chars), in order, while over budget
+SNIPPET_LIMITS = (300, 120)
+
+# Recent calls only; usage_summary reads the running totals, so a
+# long-lived process doesn't rescan (or keep) every call it has made
+_usage_log = deque(maxlen=USAGE_LOG_MAX_ENTRIES)
+_usage_totals = {}
+_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap local token estimate for Llama-family tokenizers: about four
+    characters per token, but never fewer tokens than words/punctuation.
+    """
+    if not text:
+        return 0
+    return max(math.ceil(len(text) / 4), len(_WORD_RE.findall(text)))
+
+
+def _with_snippet(item, limit: int):
+    snippet = item.get("snippet", "") or ""
+    if len(snippet) <= limit:
+        return item
+
+    cut = snippet[:limit].rsplit(" ", 1)[0] + "…"
+    if isinstance(item, dict):
+        return {**item, "snippet": cut}
+    return type(item).from_dict({**item.to_dict(), "snippet": cut})
+
+
+def _drop_lowest_value(items):
+    """
+    Drop the item with the smallest cluster, preferring later items.
+    """
+    sizes = [item.get("cluster_size", 1) or 1 for item in items]
+    smallest = min(sizes)
+    index = len(sizes) - 1 - sizes[::-1].index(smallest)
+    return items[:index] + items[index + 1:]
+
+
+def fit_prompt(build_prompt, news_items, history=(), budget: int = PROMPT_TOKEN_BUDGET):
+    """
+    Build a prompt that fits `budget` estimated tokens.
+
+    `build_prompt(news_items, history)` renders the prompt. While over
+    budget, compaction goes from lowest to highest value input: halve the
+    history (oldest first, down to HISTORY_FLOOR lines), shorten long
+    snippets, drop the history, then drop news items with the smallest
+    clusters from the end. The caller's items are never mutated.
+
+    Returns (prompt, news_items_used, history_used, estimated_tokens).
+    """
+    items = list(news_items)
+    history = list(history or [])
+
+    prompt = build_prompt(items, history)
+    tokens = estimate_tokens(prompt)
+
+    def over():
+        return budget > 0 and tokens > budget
+
+    while over() and len(history) > HISTORY_FLOOR:
+        history = history[-max(HISTORY_FLOOR, len(history) // 2):]
+        prompt = build_prompt(items, history)
+        tokens = estimate_tokens(prompt)
+
+    for limit in SNIPPET_LIMITS:
+        if not over():
+            break
+        items = [_with_snippet(item, limit) for item in items]
+        prompt = build_prompt(items, history)
+        tokens = estimate_tokens(prompt)
+
+    if over() and history:
+        history = []
+        prompt = build_prompt(items, history)
+        tokens = estimate_tokens(prompt)
+
+    while over() and len(items) > 1:
+        items = _drop_lowest_value(items)
+        prompt = build_prompt(items, history)
+        tokens = estimate_tokens(prompt)
+
+    return prompt, items, history, tokens
+
+
+def record_usage(label: str, usage: dict = None, latency: float = None, estimated_prompt_tokens: int = None,
+                 queue_wait: float = None, status: int = None):
+    """
+    Record one LLM call: prompt/completion tokens from the response `usage`
+    field, wall-clock latency in seconds and the local prompt estimate, plus
+    time spent queued for rate-limit headroom and the HTTP status.
+    """
+    usage = usage or {}
+    with _lock:
+        _usage_log.append({
+            "label": label,
+            "prompt_tokens": usage.get("prompt_tokens"),
+            "completion_tokens": usage.get("completion_tokens"),
+            "total_tokens": usage.get("total_tokens"),
+            "estimated_prompt_tokens": estimated_prompt_tokens,
+            "latency": latency,
+            "queue_wait": queue_wait,
+            "status": status
+        })
+
+        s = _usage_totals.setdefault(label, {
+            "calls": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "latency_total": 0.0,
+            "queue_wait_total": 0.0
+        })
+        s["calls"] += 1
+        s["prompt_tokens"] += usage.get("prompt_tokens") or 0
+        s["completion_tokens"] += usage.get("completion_tokens") or 0
+        s["latency_total"] += latency or 0.0
+        s["queue_wait_total"] += queue_wait or 0.0
+
+
+def get_usage_log():
+    """
+    The last USAGE_LOG_MAX_ENTRIES calls, oldest first.
+    """
+    with _lock:
+        return [dict(entry) for entry in _usage_log]
+
+
+def usage_summary():
+    """
+    Per-label totals since the last reset_usage(): calls, prompt/completion
+    tokens, latency and queueing.
+    """
+    with _lock:
+        return {label: dict(s) for label, s in _usage_totals.items()}
+
+
+def reset_usage():
+    with _lock:
+        _usage_log.clear()
+        _usage_totals.clear()
@@ -1,10 +1,36 @@
-import requests
-from datetime import datetime, timedelta
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from urllib.parse import quote_plus
 
-from ai_brain.config import SERPAPI_KEY
+from ai_brain.config import (
+    SERPAPI_KEY,
+    SERP_CONCURRENCY,
+    SERP_QUERY_TIMEOUT,
+    SERP_TOTAL_TIMEOUT,
+    CACHE_DIR,
+    SERP_CACHE_TTL,
+    SERP_CACHE_MAX_ENTRIES,
+    SERP_CACHE_REFRESH,
+    SERP_INCREMENTAL,
+)
+from ai_brain.disk_cache import DiskCache
+from ai_brain.source_filter import FilterRules, SourceFilter
+from ai_brain.fetch_state import load_fetch_state, save_seen, is_new
+from ai_brain.records import NewsItem
+from ai_brain import http_client
+
+logger = logging.getLogger("trend_fetcher")
 
 SERP_ENDPOINT = "https://serpapi.com/search.json"
+SERP_WINDOW = "qdr:3d"
+
+SERP_CACHE = DiskCache(
+    os.path.join(CACHE_DIR, "serp"),
+    ttl=SERP_CACHE_TTL,
+    max_entries=SERP_CACHE_MAX_ENTRIES
+)
 
 # Official sources only
 ALLOWED_DOMAINS = [
@@ -48,69 +74,249 @@ REJECT_KEYWORDS = [
     "what marketers", "why you should"
 ]
 
+# Compiled once at import; evaluated per batch of SERP results
+SOURCE_FILTER = SourceFilter(FilterRules(
+    allow_domains=ALLOWED_DOMAINS,
+    reject_phrases=REJECT_KEYWORDS,
+    max_age_days=3
+))
 
-def _is_recent(date_str: str, days: int = 3) -> bool:
-    if not date_str:
-        return False
-    try:
-        published = datetime.strptime(date_str[:10], "%Y-%m-%d")
-        return published >= datetime.utcnow() - timedelta(days=days)
-    except:
-        return True  # SERP date formats vary, don't hard-fail
 
 
-def _allowed_source(link: str) -> bool:
-    return any(domain in link for domain in ALLOWED_DOMAINS)
+def _search_url(query: str) -> str:
+    q = quote_plus(query)
+
+    return (
+        f"{SERP_ENDPOINT}"
+        f"?q={q}"
+        f"&tbm=nws"
+        f"&tbs={SERP_WINDOW}"
+        f"&api_key={SERPAPI_KEY}"
+    )
+
+
+def _cache_key(query: str) -> str:
+    return f"{query}|tbs={SERP_WINDOW}"
+
+
+def _fetch_query(query: str, timeout: float = SERP_QUERY_TIMEOUT, refresh: bool = False, deadline: float = None):
+    """
+    Run one SerpAPI news search and return its raw `news_results`.
+
+    `timeout` bounds the whole query, retries included, as does the
+    overall `deadline` (time.monotonic()) if given.
+
+    Successful responses are cached on disk for SERP_CACHE_TTL seconds;
+    `refresh` skips the cache read but still stores the fresh response.
+    """
+    key = _cache_key(query)
+
+    if not refresh:
+        cached = SERP_CACHE.get(key)
+        if cached is not None:
+            return cached
+
+    query_deadline = time.monotonic() + timeout
+    if deadline is not None:
+        query_deadline = min(query_deadline, deadline)
+
+    response = http_client.get("serpapi", _search_url(query), timeout=timeout, deadline=query_deadline)
+    data = response.json()
+    news_results = data.get("news_results", [])
 
+    # SerpAPI reports quota/auth problems as {"error": ...}; never cache those
+    if response.ok and "error" not in data:
+        SERP_CACHE.set(key, news_results)
 
-def _is_fluff(title: str) -> bool:
-    t = title.lower()
-    return any(k in t for k in REJECT_KEYWORDS)
+    return news_results
 
 
-def fetch_real_news(max_items: int = 15):
+def _filter_results(news_results, query: str, state: dict = None):
+    """
+    Turn raw SERP news results into NewsItem signals, dropping fluff,
+    unofficial sources and stale items.
+
+    With an incremental fetch `state`, items already seen for this query
+    are dropped before any other filtering.
+    """
     results = []
 
-    for query in SEARCH_QUERIES:
-        q = quote_plus(query)
-
-        url = (
-            f"{SERP_ENDPOINT}"
-            f"?q={q}"
-            f"&tbm=nws"
-            f"&tbs=qdr:3d"
-            f"&api_key={SERPAPI_KEY}"
-        )
-
-        response = requests.get(url, timeout=20)
-        data = response.json()
-
-        for item in data.get("news_results", []):
-            title = item.get("title", "").strip()
-            link = item.get("link", "")
-            snippet = item.get("snippet", "")
-            source = item.get("source", "")
-            date = item.get("date", "")
-
-            if not title or not link:
-                continue
-            if _is_fluff(title):
-                continue
-            if not _allowed_source(link):
-                continue
-            if not _is_recent(date):
-                continue
-
-            results.append({
-                "entity": source.split()[0],
-                "title": title,
-                "snippet": snippet,
-                "source": source,
-                "url": link,
-                "published_at": date
-            })
-
-            if len(results) >= max_items:
-                return results
+    if state is not None:
+        news_results = [
+            item for item in news_results
+            if is_new(state, query, item.get("link", ""), item.get("date", ""))
+        ]
+
+    accepted, _ = SOURCE_FILTER.evaluate(news_results)
+
+    for raw in accepted:
+        item = NewsItem.from_serp(raw, query)
+        if item is not None:
+            results.append(item)
 
     return results
+
+
+def _iter_sequential(query_timeout, total_timeout, refresh, state):
+    """
+    Run queries one after another and yield (query index, signals). No
+    query is started once the overall deadline has passed, and none is
+    given longer than the time left.
+    """
+    deadline = time.monotonic() + total_timeout
+
+    for i, query in enumerate(SEARCH_QUERIES):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            logger.warning("SERP deadline hit, skipping %d queries", len(SEARCH_QUERIES) - i)
+            return
+
+        try:
+            news_results = _fetch_query(query, min(query_timeout, remaining), refresh)
+        except Exception as e:
+            logger.warning("Skipping query %r: %s", query, e)
+            continue
+
+        yield i, _filter_results(news_results, query, state)
+
+
+def _iter_concurrent(concurrency, query_timeout, total_timeout, refresh, state):
+    """
+    Fan queries out over a thread pool and yield (query index, signals) in
+    completion order. Closing the generator cancels the queries still
+    queued; queries that fail or miss the overall deadline are skipped.
+    """
+    deadline = time.monotonic() + total_timeout
+
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    futures = {
+        executor.submit(_fetch_query, query, query_timeout, refresh, deadline): i
+        for i, query in enumerate(SEARCH_QUERIES)
+    }
+    pending = set(futures)
+
+    try:
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning("SERP deadline hit, skipping %d queries", len(pending))
+                return
+
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                i = futures[future]
+                try:
+                    batch = _filter_results(future.result(), SEARCH_QUERIES[i], state)
+                except Exception as e:
+                    logger.warning("Skipping query %r: %s", SEARCH_QUERIES[i], e)
+                    batch = []
+                yield i, batch
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _iter_query_batches(concurrency, query_timeout, total_timeout, refresh, incremental):
+    concurrency = SERP_CONCURRENCY if concurrency is None else concurrency
+    query_timeout = SERP_QUERY_TIMEOUT if query_timeout is None else query_timeout
+    total_timeout = SERP_TOTAL_TIMEOUT if total_timeout is None else total_timeout
+    refresh = SERP_CACHE_REFRESH if refresh is None else refresh
+    incremental = SERP_INCREMENTAL if incremental is None else incremental
+    state = load_fetch_state() if incremental else None
+
+    if concurrency <= 1:
+        return _iter_sequential(query_timeout, total_timeout, refresh, state)
+
+    return _iter_concurrent(concurrency, query_timeout, total_timeout, refresh, state)
+
+
+def fetch_real_news(
+    max_items: int = 15,
+    concurrency: int = None,
+    query_timeout: float = None,
+    total_timeout: float = None,
+    refresh: bool = None,
+    incremental: bool = None
+):
+    """
+    Fetch recent official news signals from SerpAPI.
+
+    Results are merged in SEARCH_QUERIES order whatever order the queries
+    finish in. Once the completed prefix of queries yields `max_items`, the
+    remaining queries are cancelled.
+
+    concurrency: max queries in flight (default SERP_CONCURRENCY, 1 = sequential)
+    query_timeout: per-query request timeout in seconds
+    total_timeout: overall fetch deadline in seconds
+    refresh: bypass the SERP response cache (default SERP_CACHE_REFRESH)
+    incremental: drop items already marked seen by `mark_news_seen`
+        (default SERP_INCREMENTAL)
+    """
+    batches = [None] * len(SEARCH_QUERIES)
+    results = []
+    next_index = 0
+
+    query_batches = _iter_query_batches(concurrency, query_timeout, total_timeout, refresh, incremental)
+
+    try:
+        for i, batch in query_batches:
+            batches[i] = batch
+
+            # Merge the contiguous completed prefix to keep a stable order
+            while next_index < len(batches) and batches[next_index] is not None:
+                results.extend(batches[next_index])
+                next_index += 1
+                if len(results) >= max_items:
+                    return results[:max_items]
+
+        # Failed or timed-out queries leave gaps: keep what finished, in order
+        for batch in batches[next_index:]:
+            if batch:
+                results.extend(batch)
+
+        return results[:max_items]
+    finally:
+        query_batches.close()
+
+
+def iter_real_news(
+    max_items: int = 15,
+    concurrency: int = None,
+    query_timeout: float = None,
+    total_timeout: float = None,
+    refresh: bool = None,
+    incremental: bool = None
+):
+    """
+    Streaming variant of `fetch_real_news`: yield signals as soon as their
+    query returns, in completion order. Stopping iteration early (or
+    reaching `max_items`) cancels the queries still queued.
+    """
+    count = 0
+    query_batches = _iter_query_batches(concurrency, query_timeout, total_timeout, refresh, incremental)
+
+    try:
+        for _, batch in query_batches:
+            for item in batch:
+                yield item
+                count += 1
+                if count >= max_items:
+                    return
+    finally:
+        query_batches.close()
+
+
+def mark_news_seen(news_items, pending=(), advance: bool = True):
+    """
+    Record items as seen in the incremental fetch state (per-query
+    high-water mark + URL hashes). Call once the items have been through
+    the editorial gate, so a failed run doesn't lose them. `pending` are
+    fetched items the gate didn't get to: high-water marks stay at or
+    below their dates, so the next fetch still returns them. With
+    advance=False (a fetch stopped early) only URLs are recorded.
+    """
+    save_seen(
+        ((item.query, item.url, item.published_at) for item in news_items),
+        pending=((item.query, item.published_at) for item in pending),
+        advance=advance
+    )
@@ -1,6 +1,8 @@
 # ai_brain/utils.py
 import re
 import json
+from datetime import datetime, timedelta
+from functools import lru_cache
 
 
 def strip_fences(text: str) -> str:
@@ -11,31 +13,290 @@ def strip_fences(text: str) -> str:
     return text.strip()
 
 
+# Characters that matter when scanning for a JSON block; everything else
+# is skipped by the regex engine instead of a Python-level loop
+_JSON_SCAN = re.compile(r'[{}"\\]')
+
+_SMART_QUOTES = "\u201c\u201d\u201e\u201f"
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class JsonBlockScanner:
+    """
+    Incremental, string-aware scanner for the first balanced {...} block.
+
+    Feed text chunks as they arrive; `feed` returns the block once its
+    closing brace has been seen (and None before that). Braces inside
+    string literals and escaped quotes are handled. `text` holds the block
+    so far, e.g. for repairing a truncated response.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._length = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = -1
+        self.block = None
+
+    @property
+    def started(self) -> bool:
+        return bool(self._parts)
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def feed(self, chunk: str):
+        if self.block is not None:
+            return self.block
+
+        if not self._parts:
+            start = chunk.find("{")
+            if start == -1:
+                return None
+            chunk = chunk[start:]
+
+        base = self._length
+        self._parts.append(chunk)
+        self._length += len(chunk)
+
+        for m in _JSON_SCAN.finditer(chunk):
+            pos = base + m.start()
+            if pos == self._escaped:
+                continue
+
+            ch = m.group()
+            if ch == "\\":
+                if self._in_string:
+                    self._escaped = pos + 1
+            elif ch == '"':
+                self._in_string = not self._in_string
+            elif self._in_string:
+                continue
+            elif ch == "{":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.block = self.text[:pos + 1]
+                    self._parts = [self.block]
+                    return self.block
+
+        return None
+
+
 def find_first_json_block(text: str) -> str:
+    if not isinstance(text, str):
+        raise ValueError("Input not a string")
+    scanner = JsonBlockScanner()
+    block = scanner.feed(text)
+    if block is not None:
+        return block
+    if not scanner.started:
+        raise ValueError("No JSON object start found")
+    raise ValueError("Balanced JSON object not found")
+
+
+def _strip_trailing_comma(out):
+    j = len(out) - 1
+    while j >= 0 and out[j].isspace():
+        j -= 1
+    if j >= 0 and out[j] == ",":
+        del out[j:]
+
+
+def repair_json(text: str) -> str:
+    """
+    Fix common LLM JSON defects in the first object of `text`:
+    smart quotes used as delimiters, trailing commas, and truncation (the
+    output is cut back to the last complete array element or top-level
+    member and closed). Smart quotes inside normal strings are kept.
+    Raises ValueError if nothing complete can be recovered.
+    """
     if not isinstance(text, str):
         raise ValueError("Input not a string")
     start = text.find("{")
     if start == -1:
         raise ValueError("No JSON object start found")
-    depth = 0
-    for i in range(start, len(text)):
-        ch = text[i]
-        if ch == "{":
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0:
-                return text[start:i + 1]
-    raise ValueError("Balanced JSON object not found")
+
+    out = []
+    stack = []
+    in_string = False
+    smart_string = False
+    escape = False
+    safe = None  # (output length, open containers) at the last clean cut
+
+    for ch in text[start:]:
+        if in_string:
+            if escape:
+                escape = False
+                out.append(ch)
+            elif ch == "\\":
+                escape = True
+                out.append(ch)
+            elif smart_string and ch in _SMART_QUOTES:
+                in_string = False
+                out.append('"')
+            elif ch == '"':
+                if smart_string:
+                    out.append('\\"')
+                else:
+                    in_string = False
+                    out.append(ch)
+            elif ch in "\n\r\t":
+                out.append({"\n": "\\n", "\r": "\\r", "\t": "\\t"}[ch])
+            else:
+                out.append(ch)
+            continue
+
+        if ch == '"' or ch in _SMART_QUOTES:
+            in_string = True
+            smart_string = ch != '"'
+            out.append('"')
+        elif ch in "{[":
+            stack.append(ch)
+            out.append(ch)
+        elif ch in "}]":
+            _strip_trailing_comma(out)
+            opener = stack.pop() if stack else "{"
+            out.append(_CLOSERS[opener])
+            if not stack:
+                return "".join(out)
+            if len(stack) == 1 or stack[-1] == "[":
+                safe = (len(out), list(stack))
+        elif ch == ",":
+            if len(stack) == 1 or stack[-1] == "[":
+                _strip_trailing_comma(out)
+                safe = (len(out), list(stack))
+            out.append(ch)
+        else:
+            out.append(ch)
+
+    # Truncated: cut back to the last clean point and close what is open
+    if safe is None:
+        raise ValueError("Truncated JSON with no complete members")
+    length, open_stack = safe
+    out = out[:length]
+    _strip_trailing_comma(out)
+    out.extend(_CLOSERS[opener] for opener in reversed(open_stack))
+    return "".join(out)
 
 
 def safe_load_json(text: str):
+    """
+    Parse LLM JSON output without another round-trip: plain parse first,
+    then the first balanced object, then a locally repaired version of it
+    (see `repair_json`). Raises ValueError if all of these fail.
+    """
     s = strip_fences(text)
     try:
         return json.loads(s)
     except Exception:
-        try:
-            block = find_first_json_block(s)
-            return json.loads(block)
-        except Exception as e:
-            raise ValueError(f"JSON parse failed: {e}")
+        pass
+
+    try:
+        block = find_first_json_block(s)
+        return json.loads(block)
+    except Exception:
+        pass
+
+    try:
+        return json.loads(repair_json(s))
+    except Exception as e:
+        raise ValueError(f"JSON parse failed: {e}")
+
+
+# ============================================
+# DATE NORMALIZATION
+# ============================================
+
+_RELATIVE_DATE = re.compile(
+    r"^(?:(an?|\d+)\s*(second|sec|minute|min|hour|hr|day|week|month|year)s?\s+ago)$"
+)
+
+_RELATIVE_UNITS = {
+    "second": timedelta(seconds=1),
+    "sec": timedelta(seconds=1),
+    "minute": timedelta(minutes=1),
+    "min": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "hr": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+    "month": timedelta(days=30),
+    "year": timedelta(days=365),
+}
+
+_ABSOLUTE_FORMATS = (
+    "%m/%d/%Y, %I:%M %p, %z UTC",  # SerpAPI Google News: "10/16/2025, 07:00 AM, +0000 UTC"
+    "%m/%d/%Y",
+    "%Y-%m-%dT%H:%M:%S%z",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d",
+    "%b %d, %Y",
+    "%B %d, %Y",
+    "%d %b %Y",
+    "%d %B %Y",
+)
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_parts(date_str: str):
+    """
+    Parse once per distinct string. Returns ("abs", naive UTC datetime),
+    ("rel", timedelta before now), or None.
+    """
+    s = " ".join(date_str.strip().split())
+    lowered = s.lower()
+
+    if lowered in ("just now", "now", "today"):
+        return ("rel", timedelta(0))
+    if lowered == "yesterday":
+        return ("rel", timedelta(days=1))
+
+    m = _RELATIVE_DATE.match(lowered)
+    if m:
+        amount = 1 if m.group(1) in ("a", "an") else int(m.group(1))
+        return ("rel", amount * _RELATIVE_UNITS[m.group(2)])
+
+    iso = s[:-1] + "+00:00" if s.endswith("Z") else s
+    try:
+        parsed = datetime.fromisoformat(iso)
+    except ValueError:
+        parsed = None
+
+    if parsed is None:
+        for fmt in _ABSOLUTE_FORMATS:
+            try:
+                parsed = datetime.strptime(s, fmt)
+                break
+            except ValueError:
+                continue
+
+    if parsed is None:
+        return None
+
+    if parsed.tzinfo is not None:
+        parsed = (parsed - parsed.utcoffset()).replace(tzinfo=None)
+    return ("abs", parsed)
+
+
+def normalize_date(date_str: str, now: datetime = None):
+    """
+    Normalize a SERP date ("2 hours ago", "10/16/2025, 07:00 AM, +0000 UTC",
+    "Oct 16, 2025", ISO 8601, ...) to a naive UTC datetime.
+    Returns None for empty or unrecognized input.
+    """
+    if not date_str or not isinstance(date_str, str):
+        return None
+
+    parts = _parse_date_parts(date_str)
+    if parts is None:
+        return None
+
+    kind, value = parts
+    if kind == "rel":
+        return (now or datetime.utcnow()) - value
+    return value
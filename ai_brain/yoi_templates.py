@@ -3,11 +3,117 @@ YOI Marketing Carousel Templates - 100% PIL Implementation
 Recreates the exact design style with grid background, decorative elements, and news content
 """
 import os
+from functools import lru_cache
 from PIL import Image, ImageDraw, ImageFont
 from PIL import Image, ImageDraw, ImageFont, ImagePath
 import math
 from datetime import datetime
 
+# Default CTA slide text
+CTA_TEXT = {
+    "title": "Stay Ahead.",
+    "body": "Join 10k+ Marketers\\nmastering AI with us.",
+    "button": "Follow @YOIMarketing"
+}
+
+
+# ============================================
+# ASSET CACHES
+# ============================================
+# Fonts, decoded backgrounds, logos and emoji glyphs are kept in memory,
+# so a long-lived process (render_service) only pays for drawing. Files
+# are re-read when their mtime changes.
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=128)
+def _font(name, size):
+    try:
+        return ImageFont.truetype(name, size)
+    except Exception:
+        return None
+
+
+def load_font(name, size):
+    """TrueType font from the cache, PIL's default font if missing"""
+    return _font(name, size) or ImageFont.load_default()
+
+
+@lru_cache(maxsize=32)
+def _decoded_background(path, mtime, width, height):
+    with Image.open(path) as raw_bg:
+        bg = raw_bg.convert("RGBA")
+        ratio = max(width / bg.width, height / bg.height)
+        new_size = (int(bg.width * ratio), int(bg.height * ratio))
+        bg = bg.resize(new_size, Image.Resampling.LANCZOS)
+        left = (bg.width - width) / 2
+        top = (bg.height - height) / 2
+        return bg.crop((left, top, left + width, top + height))
+
+
+@lru_cache(maxsize=32)
+def _decoded_logo(path, mtime, size):
+    with Image.open(path) as logo:
+        return logo.resize((size, size), Image.LANCZOS)
+
+
+def load_logo(logo_path, size):
+    """Logo resized to size x size (shared: paste it, don't draw on it)"""
+    return _decoded_logo(logo_path, _mtime(logo_path), size)
+
+
+@lru_cache(maxsize=64)
+def _emoji_image(emoji_char, size, angle):
+    font = _font("seguiemj.ttf", size) or _font("arial.ttf", size)
+    if font is None:
+        return None
+
+    # Draw to temp for rotation
+    buf_size = int(size * 1.5)
+    temp = Image.new('RGBA', (buf_size, buf_size), (0,0,0,0))
+    temp_draw = ImageDraw.Draw(temp)
+    
+    try:
+        temp_draw.text((buf_size//2, buf_size//2), emoji_char, font=font, anchor="mm", embedded_color=True)
+    except TypeError:
+        fill = "white" # Icon default white in dark mode if not emoji
+        temp_draw.text((buf_size//2, buf_size//2), emoji_char, font=font, anchor="mm", fill=fill)
+        
+    if angle != 0:
+        return temp.rotate(angle, expand=True, resample=Image.BICUBIC)
+    return temp
+
+
+def cache_stats():
+    """Hits/misses/size per asset cache"""
+    caches = {
+        "fonts": _font,
+        "backgrounds": _decoded_background,
+        "logos": _decoded_logo,
+        "emoji": _emoji_image
+    }
+    return {name: cache.cache_info()._asdict() for name, cache in caches.items()}
+
+
+def warm_caches(logo_path="assets/yoi_logo.png", backgrounds=None):
+    """
+    Render one slide of each kind in memory so fonts, backgrounds and
+    logos are decoded before the first request. Returns False if an
+    asset is missing.
+    """
+    try:
+        render_cover(logo_path, backgrounds=backgrounds)
+        render_news_slide(2, "Warm up", "Warm up", logo_path, backgrounds=backgrounds)
+        render_cta(logo_path, backgrounds=backgrounds)
+    except (FileNotFoundError, RuntimeError):
+        return False
+    return True
+
 
 # ============================================
 # HELPER FUNCTIONS
@@ -21,12 +127,13 @@ def draw_grid_background(draw, width, height, grid_size=40, color="#222222"):
         draw.line([(0, y), (width, y)], fill=color, width=1)
 
 
-def resolve_background(slide_type):
+def resolve_background(slide_type, backgrounds=None):
     """
     Static background resolver - NO AI, NO FALLBACK.
     
     Args:
         slide_type: "cover" | "news" | "insight" | "cta"
+        backgrounds: optional {slide_type: path} overrides (per brand)
     
     Returns:
         Absolute path to background file
@@ -40,6 +147,7 @@ def resolve_background(slide_type):
         "insight": "assets/backgrounds/bg_insight.jpg",
         "cta": "assets/backgrounds/bg_cta.jpg"
     }
+    mapping.update(backgrounds or {})
     
     bg_path = mapping.get(slide_type)
     
@@ -56,7 +164,7 @@ def resolve_background(slide_type):
     return bg_path
 
 
-def load_background(slide_type, bg_image_path=None, width=1080, height=1350):
+def load_background(slide_type, bg_image_path=None, width=1080, height=1350, backgrounds=None):
     """
     CENTRAL BACKGROUND LOADER - static backgrounds only.
     
@@ -64,6 +172,7 @@ def load_background(slide_type, bg_image_path=None, width=1080, height=1350):
         slide_type: "cover" | "news" | "insight" | "cta"
         bg_image_path: IGNORED (reserved for future use)
         width, height: Canvas dimensions
+        backgrounds: optional {slide_type: path} overrides (per brand)
     
     Returns:
         PIL Image with background loaded
@@ -71,19 +180,11 @@ def load_background(slide_type, bg_image_path=None, width=1080, height=1350):
     W, H = width, height
     
     # Resolve static background
-    bg_source = resolve_background(slide_type)
+    bg_source = resolve_background(slide_type, backgrounds)
     
-    # Load background
+    # Load background (decoded once, copied per slide)
     try:
-        with Image.open(bg_source) as raw_bg:
-            bg = raw_bg.convert("RGBA")
-            ratio = max(W / bg.width, H / bg.height)
-            new_size = (int(bg.width * ratio), int(bg.height * ratio))
-            bg = bg.resize(new_size, Image.Resampling.LANCZOS)
-            left = (bg.width - W) / 2
-            top = (bg.height - H) / 2
-            bg = bg.crop((left, top, left + W, top + H))
-            return bg
+        return _decoded_background(bg_source, _mtime(bg_source), W, H).copy()
     except Exception as e:
         raise RuntimeError(f"Failed to load background {bg_source}: {e}")
 
@@ -96,8 +197,7 @@ def draw_top_brand_bar(img, slide_num, logo_path="assets/yoi_logo.png"):
     # Logo with subtle shadow
     logo_y = 60
     try:
-        logo = Image.open(logo_path)
-        logo = logo.resize((logo_size, logo_size), Image.LANCZOS)
+        logo = load_logo(logo_path, logo_size)
         
         # Shadow for visibility
         shadow = Image.new("RGBA", (logo_size + 10, logo_size + 10), (0, 0, 0, 50))
@@ -109,10 +209,7 @@ def draw_top_brand_bar(img, slide_num, logo_path="assets/yoi_logo.png"):
         logo_center_y = 60 + 50
     
     # Slide number with optical alignment
-    try:
-        number_font = ImageFont.truetype("arialbd.ttf", 140)
-    except:
-        number_font = ImageFont.load_default()
+    number_font = load_font("arialbd.ttf", 140)
     
     draw = ImageDraw.Draw(img)
     
@@ -155,16 +252,12 @@ def draw_glass_card(img, xy, radius=40, fill_color=(20, 20, 20, 210), border_col
 
 def get_fonts():
     """Load fonts with fallbacks"""
-    try:
-        title_font = ImageFont.truetype("arialbd.ttf", 60)
-        subtitle_font = ImageFont.truetype("arial.ttf", 40)
-        body_font = ImageFont.truetype("arial.ttf", 34)
-        small_font = ImageFont.truetype("arial.ttf", 24)
-        return title_font, subtitle_font, body_font, small_font
-    except:
-        # Fallback
-        default = ImageFont.load_default()
-        return default, default, default, default
+    return (
+        load_font("arialbd.ttf", 60),
+        load_font("arial.ttf", 40),
+        load_font("arial.ttf", 34),
+        load_font("arial.ttf", 24)
+    )
 
 
 def wrap_text(text, font, draw, max_width):
@@ -199,31 +292,9 @@ def draw_emoji_icon(img, x, y, emoji_char, size, angle=0):
     """
     Draw an emoji at x, y with rotation support.
     """
-    try:
-        font = ImageFont.truetype("seguiemj.ttf", size)
-        has_color = True 
-    except:
-        try:
-            font = ImageFont.truetype("arial.ttf", size)
-            has_color = False
-        except:
-            return
-
-    # Draw to temp for rotation
-    buf_size = int(size * 1.5)
-    temp = Image.new('RGBA', (buf_size, buf_size), (0,0,0,0))
-    temp_draw = ImageDraw.Draw(temp)
-    
-    try:
-        temp_draw.text((buf_size//2, buf_size//2), emoji_char, font=font, anchor="mm", embedded_color=True)
-    except TypeError:
-        fill = "white" # Icon default white in dark mode if not emoji
-        temp_draw.text((buf_size//2, buf_size//2), emoji_char, font=font, anchor="mm", fill=fill)
-        
-    if angle != 0:
-        rotated = temp.rotate(angle, expand=True, resample=Image.BICUBIC)
-    else:
-        rotated = temp
+    rotated = _emoji_image(emoji_char, size, angle)
+    if rotated is None:
+        return
 
     # Paste
     rw, rh = rotated.size
@@ -234,11 +305,11 @@ def draw_emoji_icon(img, x, y, emoji_char, size, angle=0):
 # SLIDE 1: COVER (DARK MODE)
 # ============================================
 
-def build_slide_1_cover(output_dir, logo_path="assets/yoi_logo.png", bg_image_path=None):
+def render_cover(logo_path="assets/yoi_logo.png", bg_image_path=None, backgrounds=None):
     W, H = 1080, 1350
     
     # 1️⃣ BACKGROUND
-    img = load_background("cover", bg_image_path, W, H)
+    img = load_background("cover", bg_image_path, W, H, backgrounds)
     
     # 2️⃣ GLASS CARD
     card_top = 600
@@ -247,8 +318,7 @@ def build_slide_1_cover(output_dir, logo_path="assets/yoi_logo.png", bg_image_pa
 
     # 3️⃣ LOGO
     try:
-        logo = Image.open(logo_path)
-        logo = logo.resize((140, 140), Image.LANCZOS)
+        logo = load_logo(logo_path, 140)
         glow = Image.new("RGBA", (180, 180), (255,255,255,0))
         gdraw = ImageDraw.Draw(glow)
         gdraw.ellipse([0,0,180,180], fill=(255,255,255,50))
@@ -258,14 +328,9 @@ def build_slide_1_cover(output_dir, logo_path="assets/yoi_logo.png", bg_image_pa
         pass
 
     # 4️⃣ TEXT CONTENT
-    try:
-        eyebrow_font = ImageFont.truetype("arialbd.ttf", 32)
-        headline_font = ImageFont.truetype("arialbd.ttf", 95)
-        sub_font = ImageFont.truetype("arial.ttf", 45)
-    except:
-        eyebrow_font = ImageFont.load_default()
-        headline_font = ImageFont.load_default()
-        sub_font = ImageFont.load_default()
+    eyebrow_font = load_font("arialbd.ttf", 32)
+    headline_font = load_font("arialbd.ttf", 95)
+    sub_font = load_font("arial.ttf", 45)
 
     padding_x = 100
     current_y = card_top + 100
@@ -295,6 +360,11 @@ def build_slide_1_cover(output_dir, logo_path="assets/yoi_logo.png", bg_image_pa
 
     draw_emoji_icon(img, W-150, H-200, "👉", 80)
 
+    return img
+
+
+def build_slide_1_cover(output_dir, logo_path="assets/yoi_logo.png", bg_image_path=None, backgrounds=None):
+    img = render_cover(logo_path, bg_image_path, backgrounds)
     out_path = os.path.join(output_dir, "slide_1_cover.png")
     img.save(out_path, "PNG")
     return out_path
@@ -304,8 +374,8 @@ def build_slide_1_cover(output_dir, logo_path="assets/yoi_logo.png", bg_image_pa
 # SLIDES 2-4: NEWS CONTENT (DARK MODE)
 # ============================================
 
-def build_news_slide(output_dir, slide_num, headline, insight, logo_path="assets/yoi_logo.png", bg_image_path=None):
-    os.makedirs(output_dir, exist_ok=True)
+def render_news_slide(slide_num, headline, insight, logo_path="assets/yoi_logo.png", bg_image_path=None,
+                      backgrounds=None):
     W, H = 1080, 1350
     
     # TEXT NORMALIZATION
@@ -313,7 +383,7 @@ def build_news_slide(output_dir, slide_num, headline, insight, logo_path="assets
     insight = insight.replace("\n", " ").strip()
     
     # 1️⃣ BACKGROUND
-    img = load_background("news", bg_image_path, W, H)
+    img = load_background("news", bg_image_path, W, H, backgrounds)
     
     # 2️⃣ TOP BRAND BAR
     draw_top_brand_bar(img, slide_num, logo_path)
@@ -323,16 +393,10 @@ def build_news_slide(output_dir, slide_num, headline, insight, logo_path="assets
     draw = ImageDraw.Draw(img)
 
     # 4️⃣ TEXT CONTENT
-    try:
-        headline_font = ImageFont.truetype("arialbd.ttf", 60)
-        insight_title_font = ImageFont.truetype("arialbd.ttf", 35)
-        insight_font = ImageFont.truetype("arial.ttf", 45)
-        pill_font = ImageFont.truetype("arialbd.ttf", 30)
-    except:
-        headline_font = ImageFont.load_default()
-        insight_title_font = ImageFont.load_default()
-        insight_font = ImageFont.load_default()
-        pill_font = ImageFont.load_default()
+    headline_font = load_font("arialbd.ttf", 60)
+    insight_title_font = load_font("arialbd.ttf", 35)
+    insight_font = load_font("arial.ttf", 45)
+    pill_font = load_font("arialbd.ttf", 30)
 
     text_x = 120
     current_y = 350
@@ -361,6 +425,13 @@ def build_news_slide(output_dir, slide_num, headline, insight, logo_path="assets
         draw.text((text_x, current_y), line, font=insight_font, fill="#DDDDDD")
         current_y += 60
 
+    return img
+
+
+def build_news_slide(output_dir, slide_num, headline, insight, logo_path="assets/yoi_logo.png", bg_image_path=None,
+                     backgrounds=None):
+    os.makedirs(output_dir, exist_ok=True)
+    img = render_news_slide(slide_num, headline, insight, logo_path, bg_image_path, backgrounds)
     out_path = os.path.join(output_dir, f"slide_{slide_num}.png")
     img.save(out_path, "PNG")
     return out_path
@@ -370,11 +441,15 @@ def build_news_slide(output_dir, slide_num, headline, insight, logo_path="assets
 # SLIDE 5: CTA (DARK MODE)
 # ============================================
 
-def build_slide_5_cta(output_dir, logo_path="assets/yoi_logo.png"):
+def render_cta(logo_path="assets/yoi_logo.png", backgrounds=None, cta=None):
+    """
+    cta: optional {"title", "body", "button"} text overrides (per brand)
+    """
     W, H = 1080, 1350
+    cta = {**CTA_TEXT, **(cta or {})}
     
     # 1️⃣ BACKGROUND (central loader)
-    img = load_background("cta", None, W, H)
+    img = load_background("cta", None, W, H, backgrounds)
     
     # 2️⃣ GLASS CARD
     draw_glass_card(img, (80, 200, W-80, 1150), radius=60, fill_color=(20, 20, 20, 255))
@@ -382,24 +457,18 @@ def build_slide_5_cta(output_dir, logo_path="assets/yoi_logo.png"):
     
     # 3️⃣ LOGO (centered top)
     try:
-        logo = Image.open(logo_path)
-        logo = logo.resize((220, 220), Image.LANCZOS)
+        logo = load_logo(logo_path, 220)
         img.paste(logo, (W//2 - 110, 300), logo if logo.mode == 'RGBA' else None)
     except:
         pass
     
     # 4️⃣ TEXT CONTENT
-    try:
-        title_font = ImageFont.truetype("arialbd.ttf", 70)
-        body_font = ImageFont.truetype("arial.ttf", 40)
-        button_font = ImageFont.truetype("arialbd.ttf", 35)
-    except:
-        title_font = ImageFont.load_default()
-        body_font = ImageFont.load_default()
-        button_font = ImageFont.load_default()
+    title_font = load_font("arialbd.ttf", 70)
+    body_font = load_font("arial.ttf", 40)
+    button_font = load_font("arialbd.ttf", 35)
     
-    draw.text((W//2, 600), "Stay Ahead.", font=title_font, fill="white", anchor="mm")
-    draw.text((W//2, 750), "Join 10k+ Marketers\\nmastering AI with us.", font=body_font, fill="#AAAAAA", anchor="mm", align="center")
+    draw.text((W//2, 600), cta["title"], font=title_font, fill="white", anchor="mm")
+    draw.text((W//2, 750), cta["body"], font=body_font, fill="#AAAAAA", anchor="mm", align="center")
     
     # Icons
     icon_y = 920
@@ -411,8 +480,13 @@ def build_slide_5_cta(output_dir, logo_path="assets/yoi_logo.png"):
     
     # Button
     draw.rounded_rectangle([300, 1050, 780, 1180], radius=40, fill="#FF6600")
-    draw.text((540, 1115), "Follow @YOIMarketing", font=button_font, fill="white", anchor="mm")
+    draw.text((540, 1115), cta["button"], font=button_font, fill="white", anchor="mm")
     
+    return img
+
+
+def build_slide_5_cta(output_dir, logo_path="assets/yoi_logo.png", backgrounds=None, cta=None):
+    img = render_cta(logo_path, backgrounds, cta)
     out_path = os.path.join(output_dir, "slide_5_cta.png")
     img.save(out_path, "PNG")
     return out_path
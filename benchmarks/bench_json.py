@@ -0,0 +1,138 @@
+"""
+Micro-benchmark for LLM JSON extraction and repair over large responses.
+
+    python -m benchmarks.bench_json              # ~4 MB response
+    python -m benchmarks.bench_json --size-mb 16 --chunk 64
+
+Builds a gate-shaped response ({"approved": [...], "rejected": [...]})
+with braces, escaped quotes and smart quotes inside strings, wrapped in
+prose and a ```json fence, then times each parse path on it: the clean
+path, the string-aware block scan (whole and streamed in SSE-sized
+chunks), local repair of trailing commas and truncation, and the
+streaming item parser. The per-character brace counter that the scanner
+replaced is timed as a reference.
+"""
+import argparse
+import json
+import time
+
+from ai_brain.json_stream import JsonItemStream, load_llm_json
+from ai_brain.utils import JsonBlockScanner, find_first_json_block, repair_json, safe_load_json
+
+
+def _item(i: int) -> dict:
+    return {
+        "id": i,
+        "entity": "Meta",
+        "category": "ads",
+        "summary": f"Ads Manager {{beta}} adds \"Reels\" placements #{i} for “Advantage+” campaigns",
+        "marketer_impact": "Budgets can shift to Reels without new creative } or { rebuilding audiences.",
+        "confidence": "confirmed"
+    }
+
+
+def build_response(size_mb: float) -> str:
+    approved = []
+    rejected = []
+    total = 0
+    i = 0
+    while total < size_mb * 1024 * 1024:
+        item = _item(i)
+        if i % 4 == 3:
+            item = {"id": i, "title": item["summary"], "reason": "opinion"}
+            rejected.append(item)
+        else:
+            approved.append(item)
+        total += len(json.dumps(item))
+        i += 1
+    body = json.dumps({"approved": approved, "rejected": rejected}, ensure_ascii=False, indent=1)
+    return f"Here is the classification:\n```json\n{body}\n```\nLet me know if you need more."
+
+
+def _legacy_brace_count(text: str) -> str:
+    """
+    The extractor JsonBlockScanner replaced: a Python loop over every
+    character that ignores string literals.
+    """
+    start = text.find("{")
+    depth = 0
+    for i in range(start, len(text)):
+        ch = text[i]
+        if ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    raise ValueError("Balanced JSON object not found")
+
+
+def _scan_streamed(text: str, chunk: int):
+    scanner = JsonBlockScanner()
+    for i in range(0, len(text), chunk):
+        block = scanner.feed(text[i:i + chunk])
+        if block is not None:
+            return block
+    return None
+
+
+def _stream_items(text: str, chunk: int) -> int:
+    parser = JsonItemStream()
+    count = 0
+    for i in range(0, len(text), chunk):
+        count += len(parser.feed(text[i:i + chunk]))
+    return count
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LLM JSON extraction and repair.")
+    parser.add_argument("--size-mb", type=float, default=4.0, help="approximate response size (default 4)")
+    parser.add_argument("--chunk", type=int, default=32, help="characters per streamed delta (default 32)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case; the best is reported (default 3)")
+    args = parser.parse_args()
+
+    text = build_response(args.size_mb)
+    body = text[text.index("{"):text.rindex("}") + 1]
+    trailing_commas = body.replace("}\n ]", "},\n ]")
+    truncated = body[:int(len(body) * 0.9)]
+    expected = json.loads(body)
+    items = len(expected["approved"]) + len(expected["rejected"])
+
+    # Same result on every path before anything is timed
+    assert find_first_json_block(text) == body
+    assert _scan_streamed(text, args.chunk) == body
+    assert safe_load_json(text) == expected
+    assert json.loads(repair_json(trailing_commas)) == expected
+    assert _stream_items(text, args.chunk) == items
+
+    cases = [
+        ("json.loads (clean body, reference)", lambda: json.loads(body)),
+        ("per-character brace count (old, reference)", lambda: _legacy_brace_count(text)),
+        ("find_first_json_block", lambda: find_first_json_block(text)),
+        (f"JsonBlockScanner, {args.chunk}-char chunks", lambda: _scan_streamed(text, args.chunk)),
+        ("safe_load_json (prose + fence)", lambda: safe_load_json(text)),
+        ("safe_load_json (trailing commas)", lambda: safe_load_json(trailing_commas)),
+        ("safe_load_json (truncated at 90%)", lambda: safe_load_json(truncated)),
+        ("load_llm_json (truncated at 90%)", lambda: load_llm_json(truncated)),
+        (f"JsonItemStream, {args.chunk}-char chunks", lambda: _stream_items(text, args.chunk)),
+    ]
+
+    mb = len(text.encode("utf-8")) / (1024 * 1024)
+    print(f"Response: {mb:.1f} MB, {items} items, best of {args.repeat}\n")
+    print(f"{'case':<46} {'seconds':>9} {'MB/s':>9}")
+    for name, fn in cases:
+        seconds = _time(fn, args.repeat)
+        print(f"{name:<46} {seconds:>9.4f} {mb / seconds:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import argparse
+import json
+import os
+import sys
+
+from ai_brain import http_client, metrics
+from ai_brain.brand_batch import load_brand_profiles, run_brand_batch, new_batch_id, batch_folder
+from ai_brain.config import BRANDS_FILE
+from ai_brain.token_budget import usage_summary
+
+
+def generate_brand_carousels(brands_file: str = BRANDS_FILE, run_id: str = None):
+    """
+    One static-background carousel per brand profile in `brands_file`,
+    from a single news fetch. Pass the run_id of a failed batch to resume it.
+    """
+    print("🚀 Starting Multi-Brand Carousel Generation...")
+    
+    brands = load_brand_profiles(brands_file)
+    if not brands:
+        print(f"❌ ERROR: No brand profiles in {brands_file}")
+        sys.exit(1)
+    
+    print(f"\n  Brands: {', '.join(brand.name for brand in brands)}")
+    run_id = run_id or new_batch_id()
+    metrics.attach(os.path.join(batch_folder(run_id), "metrics.jsonl"))
+    result = run_brand_batch(brands, run_id)
+    
+    for brand in result["brands"]:
+        if brand["status"] == "success":
+            print(f"    ✅ {brand['brand']}: {brand['output_dir']}")
+        elif brand["status"] == "no_publish_today":
+            print(f"    ⚠️  {brand['brand']}: no approved content today")
+        else:
+            print(f"    ❌ {brand['brand']}: {brand['error']}")
+    
+    print(f"\n✨ Batch Complete! Output: {result['output_dir']}")
+    
+    # JSON for n8n
+    print("---JSON_START---")
+    print(json.dumps(result))
+    print("---JSON_END---")
+    
+    if result["status"] != "success":
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate carousels for several brands from one news fetch.")
+    parser.add_argument("--brands", default=BRANDS_FILE, help="brand profiles JSON (default BRANDS_FILE)")
+    parser.add_argument("--run-id", help="resume this batch (reuses outputs/batch_<run-id>)")
+    parser.add_argument("--profile", action="store_true", help="dump cProfile stats per stage into the batch folder")
+    args = parser.parse_args()
+    
+    # Stage and HTTP timings go to <batch folder>/metrics.jsonl
+    metrics.start(profile=args.profile)
+    try:
+        generate_brand_carousels(args.brands, args.run_id)
+    finally:
+        metrics.stop(http=http_client.get_stats(), llm=usage_summary())
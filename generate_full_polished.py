@@ -1,21 +1,34 @@
+import argparse
 import os
 import sys
 import time
 import json
 
+from ai_brain import http_client, metrics
 from ai_brain.config import OUTPUT_DIR
 from ai_brain.daily_pipeline import run_daily_pipeline
 from ai_brain.post_payload_builder import build_post_payload
+from ai_brain.stage_executor import StageExecutor
+from ai_brain.token_budget import usage_summary
 from ai_brain.yoi_templates import build_slide_1_cover, build_news_slide, build_slide_5_cta
 
 
-def generate_interactive_carousel():
+def generate_interactive_carousel(run_id: str = None):
+    """
+    Pass the run_id of a failed run to resume it: pipeline stages already
+    checkpointed in its folder are not fetched or evaluated again.
+    """
     print("🚀 Starting Static Carousel Generation...")
     print("⚠️  Leonardo disabled — using static backgrounds only")
     
+    run_id = run_id or f"{int(time.time())}-{os.getpid()}"
+    carousel_dir = os.path.join(OUTPUT_DIR, f"static_run_{run_id}")
+    os.makedirs(carousel_dir, exist_ok=True)
+    metrics.attach(os.path.join(carousel_dir, "metrics.jsonl"))
+    
     # 1. Run daily pipeline
-    print("\n[1/3] Running daily pipeline...")
-    pipeline_result = run_daily_pipeline()
+    print(f"\n[1/3] Running daily pipeline (run {run_id})...")
+    pipeline_result = run_daily_pipeline(run_id=run_id, run_dir=carousel_dir)
     
     if pipeline_result.get("status") == "no_publish_today":
         print("❌ ERROR: No approved content for today.")
@@ -26,7 +39,8 @@ def generate_interactive_carousel():
     
     # 2. Build post payload
     print("\n[2/3] Building post payload...")
-    post_payload = build_post_payload(pipeline_result)
+    with metrics.timed("payload"):
+        post_payload = build_post_payload(pipeline_result)
     
     if post_payload.get("status") == "no_publish_today":
         print("❌ ERROR: Post payload build failed.")
@@ -35,48 +49,49 @@ def generate_interactive_carousel():
     # 3. Build slides with static backgrounds
     print("\n[3/3] Building slides with static backgrounds...")
     
-    carousel_dir = os.path.join(OUTPUT_DIR, f"static_run_{int(time.time())}")
-    os.makedirs(carousel_dir, exist_ok=True)
-    
     items = post_payload.get("items", [])
     
     if len(items) < 3:
         print(f"❌ ERROR: Expected 3 items, got {len(items)}")
         sys.exit(1)
     
-    # Cover slide
+    # Slides don't depend on each other: render them in parallel
+    slides = StageExecutor(name="render")
+    
     print("\n  Building cover slide...")
-    build_slide_1_cover(carousel_dir)
-    print("    ✅ Cover complete")
+    slides.add("cover", lambda: build_slide_1_cover(carousel_dir))
     
     # News/Insight slides - UNIQUE ITEMS ONLY
     for idx in range(3):
         item = items[idx]
         slide_num = idx + 2
         
-        category = item.get("category", "platform")
-        headline = item.get("headline", "")
-        subheadline = item.get("subheadline", "")
-        entity = item.get("entity", "")
+        headline = item.headline
+        subheadline = item.subheadline
+        entity = item.entity
         
         # Determine slide type
         slide_type = "insight" if entity == "Market Insight" else "news"
         
         print(f"\n  Building slide {slide_num} ({slide_type})...")
         print(f"    Headline: {headline[:50]}...")
-        build_news_slide(carousel_dir, slide_num, headline, subheadline)
-        print(f"    ✅ Slide {slide_num} complete")
+        slides.add(
+            f"slide_{slide_num}",
+            lambda n=slide_num, h=headline, s=subheadline: build_news_slide(carousel_dir, n, h, s)
+        )
     
-    # CTA slide
     print("\n  Building CTA slide...")
-    build_slide_5_cta(carousel_dir)
-    print("    ✅ CTA complete")
+    slides.add("cta", lambda: build_slide_5_cta(carousel_dir))
+    
+    slides.run()
+    print("    ✅ Cover, news and CTA slides complete")
     
     print(f"\n✨ Generation Complete! Output: {carousel_dir}")
     
     # JSON for n8n
     result = {
         "status": "success",
+        "run_id": run_id,
         "output_dir": carousel_dir,
         "files": [f for f in os.listdir(carousel_dir) if f.endswith(".png")],
         "pipeline_summary": {
@@ -91,4 +106,14 @@ def generate_interactive_carousel():
 
 
 if __name__ == "__main__":
-    generate_interactive_carousel()
+    parser = argparse.ArgumentParser(description="Generate the daily static-background carousel.")
+    parser.add_argument("--run-id", help="resume this run (reuses outputs/static_run_<run-id>)")
+    parser.add_argument("--profile", action="store_true", help="dump cProfile stats per stage into the run folder")
+    args = parser.parse_args()
+    
+    # Stage and HTTP timings go to <run folder>/metrics.jsonl
+    metrics.start(profile=args.profile)
+    try:
+        generate_interactive_carousel(args.run_id)
+    finally:
+        metrics.stop(http=http_client.get_stats(), llm=usage_summary())
@@ -4,6 +4,7 @@ import logging
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
+from ai_brain import http_replay, metrics
 
 logger = logging.getLogger("drive_uploader")
 
@@ -13,6 +14,10 @@ class DriveUploadError(Exception):
 class DriveUploader:
     def __init__(self, credentials_json_path="credentials.json", scopes=None):
         scopes = scopes or ["https://www.googleapis.com/auth/drive"]
+        self.service = None
+        if http_replay.is_replaying():
+            # Uploads are served from the fixture; no credentials needed
+            return
         if not os.path.exists(credentials_json_path):
             raise DriveUploadError("credentials_json_missing")
         creds = service_account.Credentials.from_service_account_file(credentials_json_path, scopes=scopes)
@@ -20,6 +25,16 @@ class DriveUploader:
 
     def upload_file(self, local_path, filename=None, folder_id=None):
         filename = filename or local_path.split("/")[-1]
+        with metrics.timed("upload", file=filename):
+            return self._upload_file(local_path, filename, folder_id)
+
+    def _upload_file(self, local_path, filename, folder_id):
+        replay_key = f"{folder_id or ''}/{filename}"
+        if http_replay.is_replaying():
+            result = http_replay.replay_call("drive", replay_key)
+            if result is None:
+                raise DriveUploadError("no_recorded_upload")
+            return result["id"], result["webViewLink"]
         file_metadata = {"name": filename}
         if folder_id:
             file_metadata["parents"] = [folder_id]
@@ -33,4 +48,6 @@ class DriveUploader:
             # then build a direct download or view link
         except Exception:
             logger.warning("Could not set file public; continuing")
+        if http_replay.is_recording():
+            http_replay.record_call("drive", replay_key, {"id": file_id, "webViewLink": web_view_link})
         return file_id, web_view_link
@@ -1,8 +1,8 @@
 import os
 import time
-import requests
 from typing import Optional, Dict, Any
 from PIL import Image
+from ai_brain import http_client
 from ai_brain.config import (
     LEONARDO_API_KEY,
     LEONARDO_CREATE_URL,
@@ -29,7 +29,8 @@ HEADERS = {
 def _safe_post(payload: dict) -> Dict[str, Any]:
     """POST wrapper to Leonardo with error safety."""
     try:
-        r = requests.post(LEONARDO_CREATE_URL, headers=HEADERS, json=payload, timeout=60)
+        # Not idempotent: only a 429 is retried, never a 5xx that may have queued a job
+        r = http_client.post("leonardo", LEONARDO_CREATE_URL, headers=HEADERS, json=payload, timeout=60)
         return {"status_code": r.status_code, "json": _safe_json(r)}
     except Exception as e:
         return {"error": f"Request failed: {e}"}
@@ -115,7 +116,7 @@ def poll_generation(generation_id: str) -> Dict[str, Any]:
 
     while True:
         try:
-            resp = requests.get(url, headers=HEADERS, timeout=30)
+            resp = http_client.get("leonardo", url, headers=HEADERS, timeout=30)
             data = _safe_json(resp)
         except Exception as e:
             return {"error": f"Poll request failed: {e}"}
@@ -185,7 +186,7 @@ def extract_image_url(resp: dict) -> Optional[str]:
 
 def download_image(url: str, out_path: str) -> Dict[str, Any]:
     try:
-        r = requests.get(url, timeout=60)
+        r = http_client.get("leonardo_cdn", url, timeout=60)
         r.raise_for_status()
 
         os.makedirs(os.path.dirname(out_path), exist_ok=True)
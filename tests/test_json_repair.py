@@ -0,0 +1,130 @@
+import json
+
+import pytest
+
+from ai_brain.utils import JsonBlockScanner, find_first_json_block, repair_json, safe_load_json
+
+
+# ----------------------------
+# find_first_json_block / JsonBlockScanner
+# ----------------------------
+
+def test_braces_inside_strings_are_ignored():
+    text = 'Here you go: {"summary": "Ads } now { support", "n": 1} trailing {"x": 2}'
+    assert json.loads(find_first_json_block(text)) == {"summary": "Ads } now { support", "n": 1}
+
+
+def test_escaped_quotes_do_not_end_strings():
+    block = find_first_json_block(r'{"title": "He said \"}\" twice", "ok": true}')
+    assert json.loads(block) == {"title": 'He said "}" twice', "ok": True}
+
+
+def test_escaped_backslash_before_closing_quote():
+    # "a\\" ends the string; the brace after it closes the object
+    block = find_first_json_block(r'{"path": "C:\\"} {"next": 1}')
+    assert json.loads(block) == {"path": "C:\\"}
+
+
+def test_no_object_or_unbalanced_raises():
+    with pytest.raises(ValueError):
+        find_first_json_block("no json here")
+    with pytest.raises(ValueError):
+        find_first_json_block('{"approved": [{"a": 1}')
+
+
+def test_scanner_one_character_at_a_time():
+    text = 'prose {"a": "x}\\"{", "b": {"c": [1, 2]}} after'
+    scanner = JsonBlockScanner()
+    results = [scanner.feed(ch) for ch in text]
+
+    block = '{"a": "x}\\"{", "b": {"c": [1, 2]}}'
+    first = results.index(block)
+    assert all(r is None for r in results[:first])
+    assert text[:first + 1].endswith(block)
+    assert scanner.block == block
+
+
+def test_scanner_escape_split_across_chunks():
+    # The quote after the split backslash is escaped, so the brace after
+    # it is still inside the string
+    scanner = JsonBlockScanner()
+    assert scanner.feed('{"s": "a\\') is None
+    assert scanner.feed('"} b", "t": 1') is None
+    assert json.loads(scanner.feed("}")) == {"s": 'a"} b', "t": 1}
+
+
+def test_scanner_text_before_start():
+    scanner = JsonBlockScanner()
+    assert scanner.feed("```json\n") is None
+    assert not scanner.started
+    assert scanner.feed('{"a": 1') is None
+    assert scanner.started
+    assert scanner.text == '{"a": 1'
+
+
+# ----------------------------
+# repair_json
+# ----------------------------
+
+def test_smart_quote_delimiters():
+    text = "{\u201capproved\u201d: [{\u201csummary\u201d: \u201cMeta adds \\\"Reels\\\" ads\u201d}]}"
+    assert json.loads(repair_json(text)) == {"approved": [{"summary": 'Meta adds "Reels" ads'}]}
+
+
+def test_smart_quotes_inside_normal_strings_are_kept():
+    text = '{"summary": "Google calls it \u201cAI Mode\u201d"}'
+    assert json.loads(repair_json(text)) == {"summary": "Google calls it \u201cAI Mode\u201d"}
+
+
+def test_straight_quote_inside_smart_string_is_escaped():
+    text = "{\u201csummary\u201d: \u201c5\" screens\u201d}"
+    assert json.loads(repair_json(text)) == {"summary": '5" screens'}
+
+
+def test_trailing_commas():
+    text = '{"approved": [{"id": 1,}, {"id": 2},\n], "rejected": [],}'
+    assert json.loads(repair_json(text)) == {"approved": [{"id": 1}, {"id": 2}], "rejected": []}
+
+
+def test_raw_newlines_in_strings():
+    assert json.loads(repair_json('{"s": "line one\nline two\tend"}')) == {"s": "line one\nline two\tend"}
+
+
+def test_truncated_mid_item_keeps_complete_items():
+    text = '{"approved": [{"id": 1}, {"id": 2, "summary": "Tik'
+    assert json.loads(repair_json(text)) == {"approved": [{"id": 1}]}
+
+
+def test_truncated_array_with_no_complete_item_is_dropped():
+    text = '{"approved": [{"id": 1}], "rejected": [{"id": 2, "reason": "re'
+    assert json.loads(repair_json(text)) == {"approved": [{"id": 1}]}
+
+
+def test_truncated_with_nothing_complete_raises():
+    with pytest.raises(ValueError):
+        repair_json('{"approved": [{"id": 1')
+    with pytest.raises(ValueError):
+        repair_json("no object")
+
+
+# ----------------------------
+# safe_load_json
+# ----------------------------
+
+def test_safe_load_plain_and_fenced():
+    assert safe_load_json('{"a": 1}') == {"a": 1}
+    assert safe_load_json('```json\n{"a": [1, 2]}\n```') == {"a": [1, 2]}
+
+
+def test_safe_load_prose_around_object():
+    assert safe_load_json('Sure! Here is the JSON: {"a": "}{"} Hope it helps.') == {"a": "}{"}
+
+
+def test_safe_load_repairs_without_round_trip():
+    text = '```json\n{"rejected": [], "approved": [{"id": 1}, {"id": 2},], "notes": "cut off mid-sen'
+    assert safe_load_json(text) == {"rejected": [], "approved": [{"id": 1}, {"id": 2}]}
+
+
+def test_safe_load_raises_value_error():
+    with pytest.raises(ValueError):
+        safe_load_json("the model refused")
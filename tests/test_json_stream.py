@@ -0,0 +1,111 @@
+import json
+
+import pytest
+
+from ai_brain.json_stream import JsonItemStream, iter_chat_stream, load_llm_json
+
+RESPONSE = (
+    '```json\n'
+    '{"approved": [\n'
+    '  {"id": 1, "summary": "Ads } now { \\"support\\" Reels", "tags": ["a", {"b": 1}]},\n'
+    '  {"id": 2, "summary": "Search “AI Mode” ships"}\n'
+    '], "notes": [{"id": 9}], "rejected": [{"id": 3, "reason": "opinion"}]}\n'
+    '```'
+)
+
+EXPECTED = [
+    ("approved", {"id": 1, "summary": 'Ads } now { "support" Reels', "tags": ["a", {"b": 1}]}),
+    ("approved", {"id": 2, "summary": "Search “AI Mode” ships"}),
+    ("rejected", {"id": 3, "reason": "opinion"}),
+]
+
+
+def _feed_all(chunks, keys=("approved", "rejected")):
+    stream = JsonItemStream(keys=keys)
+    emitted = []
+    for chunk in chunks:
+        emitted.extend(stream.feed(chunk))
+    return emitted
+
+
+def test_whole_response_at_once():
+    assert _feed_all([RESPONSE]) == EXPECTED
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+def test_any_chunking_gives_the_same_items(size):
+    chunks = [RESPONSE[i:i + size] for i in range(0, len(RESPONSE), size)]
+    assert _feed_all(chunks) == EXPECTED
+
+
+def test_items_are_emitted_as_soon_as_they_close():
+    stream = JsonItemStream()
+    end_of_first = RESPONSE.index('Reels", "tags": ["a", {"b": 1}]}') + len('Reels", "tags": ["a", {"b": 1}]}')
+
+    assert stream.feed(RESPONSE[:end_of_first - 1]) == []
+    assert stream.feed(RESPONSE[end_of_first - 1:end_of_first]) == [EXPECTED[0]]
+
+
+def test_unwatched_keys_are_ignored():
+    assert _feed_all([RESPONSE], keys=("rejected",)) == [EXPECTED[2]]
+
+
+def test_broken_item_is_repaired_or_skipped():
+    text = '{"approved": [{"id": 1, "tags": ["x",],}, {"id": 2 "bad": 3}, {"id": 4}]}'
+    assert _feed_all([text]) == [("approved", {"id": 1, "tags": ["x"]}), ("approved", {"id": 4})]
+
+
+def test_truncated_stream_keeps_complete_items():
+    assert _feed_all([RESPONSE[:RESPONSE.index('{"id": 2')] + '{"id": 2, "summ']) == [EXPECTED[0]]
+
+
+def test_load_llm_json_salvages_complete_items():
+    text = '{"approved": [{"id": 1}, {"id": 2 "bad": 3}, {"id": 4}], "rejected": [{"id": 5}]}'
+    assert load_llm_json(text) == {"approved": [{"id": 1}, {"id": 4}], "rejected": [{"id": 5}]}
+
+
+def test_load_llm_json_prefers_a_clean_parse():
+    assert load_llm_json(RESPONSE) == {
+        "approved": [item for key, item in EXPECTED if key == "approved"],
+        "notes": [{"id": 9}],
+        "rejected": [EXPECTED[2][1]],
+    }
+
+
+def test_load_llm_json_raises_when_nothing_is_recoverable():
+    with pytest.raises(ValueError):
+        load_llm_json("I can't help with that.")
+
+
+class _FakeResponse:
+    def __init__(self, lines):
+        self.lines = lines
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.lines)
+
+
+def _event(content=None, usage=None):
+    event = {"choices": [{"delta": {"content": content} if content else {}}]}
+    if usage:
+        event["x_groq"] = {"usage": usage}
+    return "data: " + json.dumps(event)
+
+
+def test_iter_chat_stream_deltas_and_usage():
+    usage = {}
+    response = _FakeResponse([
+        ": keep-alive",
+        "",
+        _event('{"approved": ['),
+        "data: {not json",
+        _event('{"id": 1}]}'),
+        _event(usage={"prompt_tokens": 10, "completion_tokens": 4}),
+        "data: [DONE]",
+        _event("after done"),
+    ])
+    deltas = list(iter_chat_stream(response, on_usage=usage.update))
+
+    assert deltas == ['{"approved": [', '{"id": 1}]}']
+    assert usage == {"prompt_tokens": 10, "completion_tokens": 4}
+    assert _feed_all(deltas) == [("approved", {"id": 1})]